@@ -157,6 +157,7 @@ class MayaControllerTool():
         self.icon_file = os.path.join(self.current_dir,'icon-bg.png') 
         self.qt_window = None
         self.ifFlip_checkBox_widget = None
+        self.matrix_checkBox_widget = None
         # 优先使用 Qt 界面
         try:
             self.show_qt_ui()
@@ -318,6 +319,29 @@ class MayaControllerTool():
             pass
         return False
 
+    def is_matrix_constraint_enabled(self):
+        """读取是否使用矩阵约束（仅 Qt 界面提供该选项，默认关闭）"""
+        try:
+            if self.matrix_checkBox_widget is not None:
+                return bool(self.matrix_checkBox_widget.isChecked())
+        except Exception:
+            pass
+        return False
+
+    def matrix_constrain(self, control, picker):
+        """使用 multMatrix + decomposeMatrix 网络代替父子约束与缩放约束（不保持偏移）"""
+        mult = cmds.createNode('multMatrix', name='{}_mtxCon_mm'.format(picker))
+        decompose = cmds.createNode('decomposeMatrix', name='{}_mtxCon_dm'.format(picker))
+        cmds.connectAttr('{}.worldMatrix[0]'.format(control), '{}.matrixIn[0]'.format(mult))
+        cmds.connectAttr('{}.parentInverseMatrix[0]'.format(picker), '{}.matrixIn[1]'.format(mult))
+        cmds.connectAttr('{}.matrixSum'.format(mult), '{}.inputMatrix'.format(decompose))
+        cmds.connectAttr('{}.rotateOrder'.format(picker), '{}.inputRotateOrder'.format(decompose))
+        cmds.connectAttr('{}.outputTranslate'.format(decompose), '{}.translate'.format(picker), f=True)
+        cmds.connectAttr('{}.outputRotate'.format(decompose), '{}.rotate'.format(picker), f=True)
+        cmds.connectAttr('{}.outputScale'.format(decompose), '{}.scale'.format(picker), f=True)
+        cmds.connectAttr('{}.outputShear'.format(decompose), '{}.shear'.format(picker), f=True)
+        return mult, decompose
+
     def aboutWin(self):
         try:
             cmds.deleteUI('win_abt')
@@ -387,6 +411,14 @@ class MayaControllerTool():
         Returns:
             str: Name of the generated curve when combining or name of the first curve in the list when only one found.
         """
+        # CK Tool 的曲线合并模块可用时直接使用（世界变换写入 CV，单次父级与删除，无需冻结与刷新）
+        try:
+            import combine_curves
+        except ImportError:
+            combine_curves = None
+        if combine_curves is not None:
+            return combine_curves.combine_curves_list(curve_list, convert_bezier_to_nurbs)
+
         function_name = "Combine Curves List"
         try:
             cmds.undoInfo(openChunk=True, chunkName=function_name)
@@ -412,24 +444,25 @@ class MayaControllerTool():
                 return curve_list[0]
 
             if len(bezier_shapes) > 0 and convert_bezier_to_nurbs:
-                for bezier in bezier_shapes:
-                    logger.debug(str(bezier))
-                    cmds.select(bezier)
-                    cmds.bezierCurveToNurbs()
+                # 一次选择全部贝塞尔曲线并转换
+                cmds.select(bezier_shapes, replace=True)
+                cmds.bezierCurveToNurbs()
 
             self.freeze_channels(list(valid_curve_transforms))
-            # Re-parent Shapes
+            # Re-parent Shapes（一次父级全部形状）
             shapes = nurbs_shapes + bezier_shapes
             group = cmds.group(empty=True, world=True, name=curve_list[0])
             cmds.refresh()  # Without a refresh, Maya ignores the freeze operation
-            for shape in shapes:
-                cmds.select(clear=True)
-                cmds.parent(shape, group, relative=True, shape=True)
-            # Delete empty transforms
-            for transform in valid_curve_transforms:
-                children = cmds.listRelatives(transform, children=True) or []
-                if not children and cmds.objExists(transform):
-                    cmds.delete(transform)
+            cmds.select(clear=True)
+            cmds.parent(shapes, group, relative=True, shape=True)
+            # Delete empty transforms（一次查询子级，一次删除）
+            transforms = [t for t in valid_curve_transforms if cmds.objExists(t)]
+            occupied = set()
+            for child in (cmds.listRelatives(transforms, children=True, fullPath=True) or []) if transforms else []:
+                occupied.add(child.rsplit("|", 1)[0])
+            empty = [t for t in cmds.ls(transforms, long=True) or [] if t not in occupied] if transforms else []
+            if empty:
+                cmds.delete(empty)
             # Clean-up
             combined_curve = cmds.rename(group, curve_list[0])
             if cmds.objExists(combined_curve):
@@ -589,7 +622,22 @@ class MayaControllerTool():
         if size == 0: 
             cmds.warning("No object is selected!") 
             return 
-            
+
+        # CK Tool 的配色模块可用时一次写入全部形状（单个修改器，只写入变化的值）
+        try:
+            import color_scheme
+        except ImportError:
+            color_scheme = None
+        if color_scheme is not None:
+            dag_nodes = cmds.ls(sel, type="dagNode", long=True) or []
+            with_shapes = set(cmds.listRelatives(cmds.listRelatives(dag_nodes, s=True, fullPath=True) or [],
+                                                 parent=True, fullPath=True) or []) if dag_nodes else set()
+            color_scheme.set_override_colors([(obj, Index[0]) for obj in dag_nodes if obj in with_shapes])
+            # 没有形状的节点（如直接选择的形状）写入节点本身
+            color_scheme.set_override_colors([(obj, Index[0]) for obj in dag_nodes if obj not in with_shapes],
+                                             use_shapes=False)
+            return
+
         for obj in sel: 
             shapes = cmds.listRelatives(obj,s=True) 
             if shapes == None: 
@@ -683,8 +731,11 @@ class MayaControllerTool():
         cmds.connectAttr ('{}.matrix'.format(picker),'{}.transform'.format(transNode),f=True) 
         cmds.connectAttr ('{}.outputGeometry'.format(transNode),'{}.create'.format(shape_picker),f=True) 
 
-        cmds.parentConstraint(control,picker,mo=0,w=1) 
-        cmds.scaleConstraint (control,picker,offset=[1,1,1],w=1) 
+        if self.is_matrix_constraint_enabled():
+            self.matrix_constrain(control, picker)
+        else:
+            cmds.parentConstraint(control,picker,mo=0,w=1) 
+            cmds.scaleConstraint (control,picker,offset=[1,1,1],w=1) 
 
     def get_python_curve_code(self, crv_list):
         """
@@ -1080,8 +1131,11 @@ class MayaControllerTool():
         cmds.connectAttr ('{}.matrix'.format(picker),'{}.transform'.format(transNode),f=True) 
         cmds.connectAttr ('{}.outputGeometry'.format(transNode),'{}.create'.format(shape_picker),f=True) 
 
-        cmds.parentConstraint(control,picker,mo=0,w=1) 
-        cmds.scaleConstraint (control,picker,offset=[1,1,1],w=1) 
+        if self.is_matrix_constraint_enabled():
+            self.matrix_constrain(control, picker)
+        else:
+            cmds.parentConstraint(control,picker,mo=0,w=1) 
+            cmds.scaleConstraint (control,picker,offset=[1,1,1],w=1) 
         
         print(u'控制器 %s 已关联到面板形状' % control)
 
@@ -1184,6 +1238,10 @@ class ControllerToolWindow(QDialog):
         btn_link_panel = QPushButton(u"关联控制器到面板形状")
         btn_link_panel.clicked.connect(self.tool.curve_picker)
         tools_bar2.addWidget(btn_link_panel)
+        # 矩阵约束选项：关联面板时用矩阵节点网络代替约束节点
+        if QCheckBox is not None:
+            self.tool.matrix_checkBox_widget = QCheckBox(u"矩阵约束")
+            tools_bar2.addWidget(self.tool.matrix_checkBox_widget)
         main_layout.addLayout(tools_bar2)
 
         btn_shot = QPushButton(u"截屏控制器")
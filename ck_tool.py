@@ -31,7 +31,23 @@ def get_script_path():
 
 
 sys.path.append(os.path.join(get_script_path(), "tool"))
-from common_utils import reload_module
+from common_utils import reload_module, get_joint_hierarchy, match_world_transforms, get_world_matrices
+import matrix_constraint
+import incremental_build
+import stamp_build
+import sub_controller_builder
+import reparent_planner
+import history_purge
+import shared_shapes
+import rig_spec
+import joint_builder
+import auto_fit
+import nearest_snap
+import symmetry_map
+import tag_index
+import tag_storage
+import tag_query
+import color_scheme
 
 
 # 辅助函数：加载模块
@@ -341,22 +357,17 @@ def attach_external_methods_to_combined_tool():
         return unique_name
 
     def get_color_index_from_name(self, name):
+        # 创建时仅识别名称中间的 _l_ / _r_ / _m_ 侧面标记（规则配色的 side_from_name 还接受 c、开头的 l_ 与结尾的 _l）
+        # 颜色与规则配色引擎一致：左 6 蓝色 / 右 13 红色 / 中线 17 黄色
         name_lower = name.lower()
-        if "_l_" in name_lower:
-            return 6  # 蓝色（左侧）
-        elif "_r_" in name_lower:
-            return 13  # 红色（右侧）
-        elif "_m_" in name_lower:
-            return 17  # 黄色（中线）
+        for side in ("l", "r", "m"):
+            if f"_{side}_" in name_lower:
+                return color_scheme.SIDE_COLOR_INDEX[side]
         return None
 
     @with_undo_support
     def apply_color_index(self, obj, color_index):
-        shapes = cmds.listRelatives(obj, shapes=True) or []
-        for shape in shapes:
-            cmds.setAttr(f"{shape}.overrideEnabled", 1)
-            cmds.setAttr(f"{shape}.overrideRGBColors", 0)
-            cmds.setAttr(f"{shape}.overrideColor", color_index)
+        color_scheme.set_override_colors([(obj, color_index)])
         print(f"物体 '{obj}' 已应用颜色索引 {color_index}。")
 
     @with_undo_support
@@ -366,18 +377,13 @@ def attach_external_methods_to_combined_tool():
         base_name = f"{prefix}{formatted_side}_{name}"
         joint_name = self.generate_unique_name(base_name, start_index=index or 1)
 
-        cmds.select(clear=True)
-        joint = cmds.joint(name=joint_name)
-        cmds.joint(joint, edit=True, oj=orient, sao=sec_axis_orient, ch=True, zso=True)
-        cmds.xform(joint, scale=scale, ws=True, a=True, translation=translation, rotation=rotation)
-        cmds.setAttr(f"{joint}.preferredAngle", *preferred_angles)
+        # 单个骨骼同样使用批量创建：平移、朝向、首选角度与集合一次写入
+        joint = joint_builder.create_joints([joint_name], [translation], [-1], orient, sec_axis_orient,
+                                            preferred_angles, joint_set)[0]
+        if tuple(rotation) != (0, 0, 0) or tuple(scale) != (1, 1, 1):
+            cmds.xform(joint, scale=scale, ws=True, a=True, rotation=rotation)
 
-        if joint_set:
-            if not cmds.objExists(joint_set) or cmds.nodeType(joint_set) != "objectSet":
-                joint_set = cmds.sets(name=joint_set, empty=True)
-            cmds.sets(joint, edit=True, forceElement=joint_set)
-
-        return joint_name
+        return joint
 
     @with_undo_support
     def create_custom_controller(self, name, side, index, size=1, color_rgb=(1.0, 1.0, 1.0),
@@ -414,13 +420,13 @@ def attach_external_methods_to_combined_tool():
         # 处理颜色索引（如果有）
         color_index = self.get_color_index_from_name(ctrl_name)
         if color_index is not None:
-            shapes = cmds.listRelatives(ctrl, shapes=True) or []
-            for shape in shapes:
-                cmds.setAttr(f"{shape}.overrideEnabled", 1)
-                cmds.setAttr(f"{shape}.overrideRGBColors", 0)
-                cmds.setAttr(f"{shape}.overrideColor", color_index)
+            color_scheme.set_override_colors([(ctrl, color_index)])
             print(f"物体 '{ctrl_name}' 已应用颜色索引 {color_index}。")
 
+        # 共享形状：相同类型、大小与颜色的控制器引用同一个实例化形状
+        if self.shared_shape_check.isChecked():
+            shared_shapes.adopt_shared_shape(ctrl_name, shared_shapes.shape_key(controller_type, size, ctrl_name))
+
         return ctrl_name
 
     @with_undo_support
@@ -479,6 +485,19 @@ def attach_external_methods_to_combined_tool():
 
         self.custom_group_name = self.custom_group_input.text().strip() if self.enable_custom_group else ""
 
+        # 增量重建：按确定的名称复用已存在的组件，只创建缺失部分
+        incremental = self.incremental_rebuild_check.isChecked()
+        builder = incremental_build.IncrementalBuilder(incremental)
+
+        # 原型冲压：每个侧面只完整创建一个组件作为原型，其余组件在循环结束后批量复制
+        stamp_mode = self.stamp_mode_check.isChecked() and not incremental
+        prototypes = {}
+        stamp_jobs = []
+        reserved_names = set()
+        # 子控制器在循环结束后一次批量创建；父级到其输出组的关节也延后处理
+        pending_subs = []
+        pending_joints = []
+
         # 为每个侧面创建指定数量的组件
         for side in sides:
             # 转换为小写并验证侧面输入是否有效
@@ -514,114 +533,122 @@ def attach_external_methods_to_combined_tool():
 
                 # 生成唯一的 zero 组名称并提取后缀
                 zero_base_name = f"zero{formatted_side}_{base_name}"
-                zero_group_name = self.generate_unique_name(zero_base_name, start_index=i + 1)
+                if incremental:
+                    # 增量模式使用固定序号，确保重复运行时命中同一组件
+                    zero_group_name = f"{zero_base_name}_{i + 1:03d}"
+                elif stamp_mode:
+                    # 冲压组件延后创建，名称需同时避开场景与本次已规划的名称
+                    index = i + 1
+                    zero_group_name = f"{zero_base_name}_{index:03d}"
+                    while zero_group_name in reserved_names or cmds.objExists(zero_group_name):
+                        index += 1
+                        zero_group_name = f"{zero_base_name}_{index:03d}"
+                    reserved_names.add(zero_group_name)
+                else:
+                    zero_group_name = self.generate_unique_name(zero_base_name, start_index=i + 1)
                 # 提取后缀（例如 "_001"）
                 suffix = re.search(r"_(\d+)$", zero_group_name).group(0) if re.search(r"_(\d+)$",
                                                                                       zero_group_name) else f"_{i + 1:03d}"
 
+                if stamp_mode and side in prototypes:
+                    # 记录冲压任务，占位保持 created_groups 与选择物体的对应顺序
+                    created_groups.append(None)
+                    stamp_jobs.append((len(created_groups) - 1, side, f"{formatted_side}_{base_name}{suffix}"))
+                    continue
+
                 ctrl = None
                 joint = None
                 last_group = None
 
                 # 创建层级结构，所有层级使用相同的后缀
                 if self.use_hierarchy_logic:
-                    zero_group = cmds.group(name=zero_group_name, empty=True)
+                    zero_group = builder.group(zero_group_name)
                     driven_group_name = f"driven{formatted_side}_{base_name}{suffix}"
                     connect_group_name = f"connect{formatted_side}_{base_name}{suffix}"
                     offset_group_name = f"offset{formatted_side}_{base_name}{suffix}"
 
-                    driven_group = cmds.group(name=driven_group_name, empty=True, parent=zero_group)
-                    connect_group = cmds.group(name=connect_group_name, empty=True, parent=driven_group)
-                    offset_group = cmds.group(name=offset_group_name, empty=True, parent=connect_group)
+                    driven_group = builder.group(driven_group_name, zero_group)
+                    connect_group = builder.group(connect_group_name, driven_group)
+                    offset_group = builder.group(offset_group_name, connect_group)
                     last_group = offset_group
                 else:
-                    zero_group = cmds.group(name=zero_group_name, empty=True)
+                    zero_group = builder.group(zero_group_name)
                     offset_group_name = f"grpOffset{formatted_side}_{base_name}{suffix}"
-                    offset_group = cmds.group(name=offset_group_name, empty=True, parent=zero_group)
+                    offset_group = builder.group(offset_group_name, zero_group)
                     last_group = offset_group
 
                 # 创建控制器或空组，使用相同的后缀
                 if self.create_controller_flag:
                     ctrl_base = f"ctrl{formatted_side}_{base_name}"
                     ctrl_name = f"{ctrl_base}{suffix}"
-                    ctrl = self.create_custom_controller(
-                        name=name,
-                        side=side,
-                        index=None,
-                        size=size,
-                        color_rgb=self.color_rgb,
-                        translation=(0, 0, 0),
-                        controller_type=self.controller_type
-                    )
-                    ctrl = cmds.rename(ctrl, ctrl_name)  # 重命名以确保后缀一致
-                    cmds.parent(ctrl, offset_group)
+                    if builder.exists(ctrl_name):
+                        # 复用已存在的控制器，仅修正父级
+                        ctrl = ctrl_name
+                        builder.parent(ctrl, offset_group)
+                    else:
+                        ctrl = self.create_custom_controller(
+                            name=name,
+                            side=side,
+                            index=None,
+                            size=size,
+                            color_rgb=self.color_rgb,
+                            translation=(0, 0, 0),
+                            controller_type=self.controller_type
+                        )
+                        ctrl = cmds.rename(ctrl, ctrl_name)  # 重命名以确保后缀一致
+                        cmds.parent(ctrl, offset_group)
+                        builder.created()
                     
                     # 确保控制器的旋转顺序是可见和可关键帧的
                     cmds.setAttr(f"{ctrl}.rotateOrder", channelBox=True, keyable=True)
 
-                    # 如果启用了子控制器选项，创建子控制器和输出组
-                    if self.create_sub_controller_flag:
-                        # 使用单独方法创建子控制器
-                        sub_ctrl_name, output_name = self.create_sub_controller(
-                            parent_ctrl=ctrl,
-                            name=name,
-                            formatted_side=formatted_side,
-                            suffix=suffix
-                        )
-
-                        if sub_ctrl_name and output_name:
-                            # 层级关系和属性连接已在create_sub_controller方法中完成
-                            print(f"已设置控制器层级: '{sub_ctrl_name}' 和 '{output_name}' 作为 '{ctrl}' 的子级")
+                    # 如果启用了子控制器选项，创建子控制器和输出组（增量模式下已存在则复用）
+                    if self.create_sub_controller_flag and not builder.exists(f"{ctrl}Sub"):
+                        pending_subs.append((ctrl, formatted_side))
 
                 elif not self.create_joint_flag and not self.create_controller_flag:
                     ctrl_name = f"ctrl{formatted_side}_{base_name}{suffix}"
-                    ctrl = cmds.group(name=ctrl_name, empty=True)
-                    cmds.parent(ctrl, offset_group)
+                    ctrl = builder.group(ctrl_name, offset_group)
                 elif self.create_joint_flag and not self.use_hierarchy_logic:
                     ctrl_name = f"ctrl{formatted_side}_{base_name}{suffix}"
-                    ctrl = cmds.group(name=ctrl_name, empty=True)
-                    cmds.parent(ctrl, offset_group)
+                    ctrl = builder.group(ctrl_name, offset_group)
 
                 # 创建关节，使用相同的后缀
                 if self.create_joint_flag:
                     joint_base = f"jntSkin{formatted_side}_{base_name}"
                     joint_name = f"{joint_base}{suffix}"
-                    joint = self.create_joint(
-                        prefix="jntSkin",
-                        name=name,
-                        side=side,
-                        index=None,
-                        translation=(0, 0, 0),
-                        rotation=(0, 0, 0),
-                        scale=(1, 1, 1),
-                        orient="xyz",
-                        sec_axis_orient="yup",
-                        preferred_angles=(0, 0, 0),
-                        joint_set=joint_set
-                    )
-                    joint = cmds.rename(joint, joint_name)  # 重命名以确保后缀一致
+                    if builder.exists(joint_name):
+                        joint = joint_name
+                    else:
+                        joint = self.create_joint(
+                            prefix="jntSkin",
+                            name=name,
+                            side=side,
+                            index=None,
+                            translation=(0, 0, 0),
+                            rotation=(0, 0, 0),
+                            scale=(1, 1, 1),
+                            orient="xyz",
+                            sec_axis_orient="yup",
+                            preferred_angles=(0, 0, 0),
+                            joint_set=joint_set
+                        )
+                        joint = cmds.rename(joint, joint_name)  # 重命名以确保后缀一致
+                        builder.created()
 
                     # 如果创建了控制器且创建了子控制器，则将关节父级到output组
                     if ctrl and self.create_controller_flag and self.create_sub_controller_flag:
-                        # 找到与控制器关联的output组
+                        # 与控制器关联的output组在循环结束后随子控制器一起创建，关节父级延后处理
                         output_name = ctrl.replace(f"ctrl{formatted_side}_", f"output{formatted_side}_")
-                        if cmds.objExists(output_name):
-                            # 确保output组是ctrl的子级
-                            if not cmds.listRelatives(output_name, parent=True) or cmds.listRelatives(output_name, parent=True)[0] != ctrl:
-                                cmds.parent(output_name, ctrl)
-                                print(f"已将输出组 '{output_name}' 父级到控制器 '{ctrl}'")
-                            
-                            # 将关节放到output组下
-                            cmds.parent(joint, output_name)
-                            print(f"已将关节 '{joint}' 父级到输出组 '{output_name}'")
-                        else:
-                            cmds.parent(joint, ctrl)
+                        pending_joints.append((joint, ctrl, output_name))
                     elif ctrl:  # 如果 ctrl 存在（控制器或空组），关节父级到 ctrl
-                        cmds.parent(joint, ctrl)
+                        builder.parent(joint, ctrl)
                     else:  # 否则父级到 offset_group
-                        cmds.parent(joint, offset_group)
+                        builder.parent(joint, offset_group)
 
                 created_groups.append(zero_group)
+                if stamp_mode:
+                    prototypes[side] = (zero_group, f"{formatted_side}_{base_name}{suffix}")
                 
                 # 如果启用了根据选择物体数量创建功能，立即匹配到对应的选择物体
                 if self.use_selection_count_flag and selected_objects:
@@ -637,10 +664,10 @@ def attach_external_methods_to_combined_tool():
                         cmds.select(zero_group)
                         
                         # 执行匹配变换
-                        cmds.matchTransform(zero_group, target_transform,
-                                            pos=self.match_position,
-                                            rot=self.match_rotation,
-                                            scl=self.match_scale)
+                        builder.match_transform(zero_group, target_transform,
+                                                self.match_position,
+                                                self.match_rotation,
+                                                self.match_scale)
                         
                         # 恢复之前的选择状态
                         cmds.select(clear=True)
@@ -649,15 +676,36 @@ def attach_external_methods_to_combined_tool():
                         
                         print(f"已将组件 '{zero_group}' 匹配到物体 '{target_transform}' 的变换")
 
+        # 一次修改器批量创建全部子控制器与输出组（需在原型冲压之前，冲压会复制原型中的子控制器）
+        if pending_subs:
+            for (ctrl, _), (sub_ctrl_name, output_name) in zip(pending_subs, self.create_sub_controllers(pending_subs)):
+                print(f"已设置控制器层级: '{sub_ctrl_name}' 和 '{output_name}' 作为 '{ctrl}' 的子级")
+
+        for joint, ctrl, output_name in pending_joints:
+            if cmds.objExists(output_name):
+                # 确保output组是ctrl的子级
+                output_parent = cmds.listRelatives(output_name, parent=True)
+                if not output_parent or output_parent[0] != ctrl:
+                    cmds.parent(output_name, ctrl)
+                    print(f"已将输出组 '{output_name}' 父级到控制器 '{ctrl}'")
+
+                # 将关节放到output组下
+                builder.parent(joint, output_name)
+                print(f"已将关节 '{joint}' 父级到输出组 '{output_name}'")
+            else:
+                builder.parent(joint, ctrl)
+
+        if stamp_jobs:
+            self.stamp_components(prototypes, stamp_jobs, created_groups, selected_objects, joint_set)
+
         # 处理自定义组
         if self.enable_custom_group and self.custom_group_name:
             custom_group = self.custom_group_name
             if not cmds.objExists(custom_group):
                 custom_group = cmds.group(empty=True, name=custom_group)
                 print(f"已创建自定义组 '{custom_group}'")
-            for zero_group in created_groups:
-                cmds.parent(zero_group, custom_group)
-                print(f"已将 '{zero_group}' 父级到自定义组 '{custom_group}'")
+            builder.parent_many([(zero_group, custom_group) for zero_group in created_groups])
+            print(f"已将 {len(created_groups)} 个 zero 组父级到自定义组 '{custom_group}'")
 
         # 在所有组件创建完成后，将zero组匹配到目标物体
         # 如果启用了根据选择物体数量创建功能，则跳过统一匹配（已在创建过程中完成个别匹配）
@@ -671,10 +719,10 @@ def attach_external_methods_to_combined_tool():
                 cmds.select(group)
                 
                 # 执行匹配变换
-                cmds.matchTransform(group, target_obj,
-                                    pos=self.match_position,
-                                    rot=self.match_rotation,
-                                    scl=self.match_scale)
+                builder.match_transform(group, target_obj,
+                                        self.match_position,
+                                        self.match_rotation,
+                                        self.match_scale)
                 
                 # 恢复之前的选择状态
                 cmds.select(clear=True)
@@ -685,12 +733,62 @@ def attach_external_methods_to_combined_tool():
         elif self.use_selection_count_flag and selected_objects:
             print(f"已完成根据选择物体数量创建: 每个组件已匹配到对应选择物体的变换。")
 
+        # 自动适配大小：按目标物体的模型顶点缩放并旋转控制器形状（增量重建时保留复用控制器的形状）
+        if self.auto_fit_check.isChecked() and self.create_controller_flag and target_obj and not incremental:
+            fit_pairs = []
+            for i, zero_group in enumerate(created_groups):
+                if self.use_selection_count_flag and selected_objects:
+                    if i >= len(selected_objects):
+                        continue
+                    fit_pairs.append((self.controller_from_zero_group(zero_group), selected_objects[i]))
+                else:
+                    fit_pairs.append((self.controller_from_zero_group(zero_group), target_obj))
+            self.auto_fit_controllers(fit_pairs)
+
         # 处理新的层级关系选项
         if selected_objects and (self.controller_parent_original_check.isChecked() or self.original_parent_controller_check.isChecked()):
             self.apply_hierarchy_relationships(created_groups, selected_objects)
         
         print(
             f"已完成创建：共 {len(sides)} 个侧面 ({','.join(sides)})，每个侧面 {count} 个组件，总计 {len(created_groups)} 个组")
+        builder.report()
+
+    def stamp_components(self, prototypes, stamp_jobs, created_groups, selected_objects, joint_set):
+        """
+        按原型批量复制组件并填充 created_groups 中的占位
+
+        参数:
+            prototypes (dict): 侧面 -> (原型 zero 组, 原型名称标记)
+            stamp_jobs (list): (created_groups 索引, 侧面, 名称标记) 列表
+            created_groups (list): 组件 zero 组列表，冲压组件位置为 None
+            selected_objects (list): 当前选择的物体
+            joint_set (str): 蒙皮关节集
+        """
+        stamped = []
+        for side, (prototype, prototype_token) in prototypes.items():
+            jobs = [job for job in stamp_jobs if job[1] == side]
+            if not jobs:
+                continue
+            new_roots = stamp_build.stamp_hierarchies(prototype, prototype_token, [job[2] for job in jobs])
+            for (position, _, token), root in zip(jobs, new_roots):
+                created_groups[position] = root
+                stamped.append((position, root, token))
+
+        roots = [root for _, root, _ in stamped]
+        # 原型可能已匹配到选择物体，复制体统一恢复为默认变换后再匹配
+        cmds.xform(roots, translation=(0, 0, 0), rotation=(0, 0, 0), scale=(1, 1, 1))
+
+        if self.create_joint_flag and cmds.objExists(joint_set):
+            joints = [f"jntSkin{token}" for _, _, token in stamped if cmds.objExists(f"jntSkin{token}")]
+            if joints:
+                cmds.sets(joints, edit=True, forceElement=joint_set)
+
+        if self.use_selection_count_flag and selected_objects:
+            pairs = [(root, selected_objects[position]) for position, root, _ in stamped
+                     if position < len(selected_objects)]
+            match_world_transforms(pairs, self.match_position, self.match_rotation, self.match_scale)
+
+        print(f"原型冲压：由 {len(prototypes)} 个原型复制出 {len(stamped)} 个组件")
 
     def apply_hierarchy_relationships(self, created_groups, selected_objects):
         """
@@ -704,6 +802,9 @@ def attach_external_methods_to_combined_tool():
             cmds.warning("两个层级关系选项都被选中，将优先使用'控制器作为原物体父级'选项")
             original_parent_controller = False
         
+        # 先收集全部父级操作（逐项过滤无效节点），再一次性批量执行
+        planner = reparent_planner.ReparentPlanner()
+        messages = []
         for i, zero_group in enumerate(created_groups):
             if i < len(selected_objects):
                 original_object = selected_objects[i]
@@ -714,20 +815,82 @@ def attach_external_methods_to_combined_tool():
                 if controller and cmds.objExists(original_object):
                     if controller_parent_original:
                         # 控制器作为原物体父级：原物体成为控制器的子级
-                        try:
-                            cmds.parent(original_object, controller)
-                            print(f"层级关系: 已将原物体 '{original_object}' 父级到控制器 '{controller}'")
-                        except Exception as e:
-                            print(f"警告: 无法将 '{original_object}' 父级到 '{controller}': {e}")
-                    
+                        child, parent = original_object, controller
+                        message = f"层级关系: 已将原物体 '{original_object}' 父级到控制器 '{controller}'"
                     elif original_parent_controller:
                         # 原物体作为控制器父级：控制器成为原物体的子级
-                        try:
-                            cmds.parent(zero_group, original_object)
-                            print(f"层级关系: 已将控制器组 '{zero_group}' 父级到原物体 '{original_object}'")
-                        except Exception as e:
-                            print(f"警告: 无法将 '{zero_group}' 父级到 '{original_object}': {e}")
+                        child, parent = zero_group, original_object
+                        message = f"层级关系: 已将控制器组 '{zero_group}' 父级到原物体 '{original_object}'"
+                    else:
+                        continue
+
+                    # 非 DAG 节点或父级到自身子级的操作单独跳过，不影响其他操作
+                    child_path = cmds.ls(child, type="dagNode", long=True) or []
+                    parent_path = cmds.ls(parent, type="dagNode", long=True) or []
+                    if len(child_path) != 1 or len(parent_path) != 1:
+                        print(f"警告: 设置层级关系失败: '{child}' 或 '{parent}' 不是唯一的 DAG 节点，已跳过")
+                        continue
+                    if parent_path[0] == child_path[0] or parent_path[0].startswith(child_path[0] + "|"):
+                        print(f"警告: 设置层级关系失败: 无法将 '{child}' 父级到其自身或子级 '{parent}'，已跳过")
+                        continue
+                    planner.add(child_path[0], parent_path[0])
+                    messages.append(message)
+
+        try:
+            planner.execute()
+        except Exception as e:
+            print(f"警告: 批量设置层级关系失败: {e}")
+            return
+        for message in messages:
+            print(message)
     
+    def controller_from_zero_group(self, zero_group):
+        """
+        在 zero 组层级中查找按命名规范对应的控制器（zero_l_arm_001 -> ctrl_l_arm_001），
+        返回完整路径，场景中存在同名控制器时也不会有歧义
+        """
+        if not zero_group or not cmds.objExists(zero_group):
+            return None
+        leaf = zero_group.split("|")[-1]
+        if not leaf.startswith("zero"):
+            return None
+        ctrl_leaf = "ctrl" + leaf[len("zero"):]
+        descendants = cmds.listRelatives(zero_group, allDescendents=True, type="transform", fullPath=True) or []
+        matches = [path for path in descendants if path.split("|")[-1] == ctrl_leaf]
+        # 层级最浅的同名节点即为该组件的控制器
+        return min(matches, key=lambda path: path.count("|")) if matches else None
+
+    def auto_fit_controllers(self, pairs):
+        """
+        按目标骨骼的蒙皮顶点或目标物体的模型批量适配控制器（存在子控制器时一并适配）
+
+        参数:
+            pairs (list): (控制器, 目标骨骼或物体) 列表
+        """
+        fit_pairs = []
+        scales = []
+        for ctrl, target in pairs:
+            if not ctrl or not cmds.objExists(ctrl) or not cmds.objExists(target):
+                continue
+            fit_pairs.append((ctrl, target))
+            scales.append(1.0)
+            # 创建组件的子控制器为 ctrlSub（0.9 倍），FK层级的子控制器为 ctrl_sub（0.8 倍），都位于控制器下
+            leaf = ctrl.split("|")[-1]
+            sub_scales = {f"{leaf}Sub": sub_controller_builder.SUB_SCALE, f"{leaf}_sub": 0.8}
+            for sub in cmds.listRelatives(ctrl, children=True, type="transform", fullPath=True) or []:
+                scale = sub_scales.get(sub.split("|")[-1])
+                if scale is not None:
+                    fit_pairs.append((sub, target))
+                    scales.append(scale)
+        if not fit_pairs:
+            return
+        try:
+            fitted = auto_fit.fit_controllers(fit_pairs, scales)
+            print(f"自动适配大小: 已适配 {fitted}/{len(fit_pairs)} 个控制器")
+        except Exception as e:
+            cmds.warning(f"自动适配大小失败: {str(e)}")
+            print(f"错误详情: {str(e)}")
+
     def find_controller_in_hierarchy(self, zero_group):
         """
         在层级结构中查找控制器
@@ -845,8 +1008,8 @@ def attach_external_methods_to_combined_tool():
             cmds.warning("请至少选择一个控制器！")
             return
 
-        for ctrl in selected_controllers:
-            self.apply_color_index(ctrl, index)
+        color_scheme.set_override_colors([(ctrl, index) for ctrl in selected_controllers])
+        print(f"已为 {len(selected_controllers)} 个控制器应用颜色索引 {index}。")
 
         index_to_rgb = {13: [1.0, 0.0, 0.0], 17: [1.0, 1.0, 0.0], 6: [0.0, 0.0, 1.0]}
         self.color_rgb = index_to_rgb.get(index, [1.0, 1.0, 1.0])
@@ -859,13 +1022,9 @@ def attach_external_methods_to_combined_tool():
             cmds.warning("请至少选择一个控制器！")
             return
 
-        for ctrl in selected_controllers:
-            shapes = cmds.listRelatives(ctrl, shapes=True) or []
-            for shape in shapes:
-                cmds.setAttr(f"{shape}.overrideEnabled", 1)
-                cmds.setAttr(f"{shape}.overrideRGBColors", 1)
-                cmds.setAttr(f"{shape}.overrideColorRGB", *self.color_rgb)
-            print(f"控制器 '{ctrl}' 已应用颜色 RGB {self.color_rgb}。")
+        color = tuple(self.color_rgb)
+        color_scheme.set_override_colors([(ctrl, color) for ctrl in selected_controllers])
+        print(f"已为 {len(selected_controllers)} 个控制器应用颜色 RGB {self.color_rgb}。")
 
     @with_undo_support
     def reset_color(self):
@@ -1154,22 +1313,26 @@ def attach_external_methods_to_combined_tool():
         if not tag_name:
             cmds.warning("请输入 Tag 名称！")
             return
+        if not tag_query.is_tag_name(tag_name):
+            cmds.warning(f"'{tag_name}' 不是有效的 Tag 名称（表达式只能用于选择）！")
+            return
 
         selected_objects = cmds.ls(sl=True)
         if not selected_objects:
             cmds.warning("请至少选择一个物体！")
             return
 
-        for obj in selected_objects:
-            if not cmds.objExists(f"{obj}.{tag_name}"):
-                cmds.addAttr(obj, ln=tag_name, at="bool", dv=1)
-                cmds.setAttr(f"{obj}.{tag_name}", keyable=False, channelBox=False)
-                print(f"已为物体 '{obj}' 添加 Tag '{tag_name}'")
-                if tag_name not in self.tag_history:
-                    self.tag_history.append(tag_name)
-                    self.update_tag_history_combo()
-            else:
-                print(f"物体 '{obj}' 已存在 Tag '{tag_name}'，跳过添加")
+        # 批量添加：先在内存中筛选缺少该 Tag 的物体，再用一个修改器一次写入（紧凑存储时写入 ckTags）
+        compact = self.compact_tag_check.isChecked()
+        changed = tag_storage.add_tags(selected_objects, [tag_name], compact=compact)
+        storage = "（ckTags）" if compact else ""
+        print(f"已为 {len(changed)} 个物体添加 Tag '{tag_name}'{storage}，{len(selected_objects) - len(changed)} 个已存在，跳过添加")
+        if changed:
+            tag_index.get_index().add(tag_name, changed)
+            # 历史记录只在最后更新一次
+            if tag_name not in self.tag_history:
+                self.tag_history.append(tag_name)
+                self.update_tag_history_combo()
 
     def select_objects_with_tag(self):
         tag_name = self.tag_name_input.text().strip()
@@ -1177,15 +1340,19 @@ def attach_external_methods_to_combined_tool():
             cmds.warning("请输入 Tag 名称！")
             return
 
-        all_objects = cmds.ls(transforms=True)
-        tagged_objects = [obj for obj in all_objects if cmds.attributeQuery(tag_name, node=obj, exists=True)]
+        # 支持 Tag 表达式（如 "face & ctrl & !sub"），每个 Tag 通过 Tag 索引解析一次后做集合运算
+        try:
+            tagged_objects = sorted(tag_query.query(tag_name))
+        except ValueError as e:
+            cmds.warning(f"Tag 表达式无效: {str(e)}")
+            return
 
         if not tagged_objects:
-            cmds.warning(f"场景中没有物体具有 Tag '{tag_name}'！")
+            cmds.warning(f"场景中没有物体满足 Tag '{tag_name}'！")
             return
 
         cmds.select(tagged_objects, replace=True)
-        print(f"已选择 {len(tagged_objects)} 个具有 Tag '{tag_name}' 的物体：{tagged_objects}")
+        print(f"已选择 {len(tagged_objects)} 个满足 Tag '{tag_name}' 的物体")
 
     @with_undo_support
     def remove_tag_attribute(self):
@@ -1193,23 +1360,22 @@ def attach_external_methods_to_combined_tool():
         if not tag_name:
             cmds.warning("请输入 Tag 名称！")
             return
+        if not tag_query.is_tag_name(tag_name):
+            cmds.warning(f"'{tag_name}' 不是有效的 Tag 名称（表达式只能用于选择）！")
+            return
 
         selected_objects = cmds.ls(selection=True)
         if not selected_objects:
             cmds.warning("请至少选择一个物体！")
             return
 
-        objects_with_tag = [obj for obj in selected_objects
-                            if cmds.attributeQuery(tag_name, node=obj, exists=True)]
+        # 同时从布尔属性与 ckTags 中删除
+        objects_with_tag = tag_storage.remove_tags(selected_objects, [tag_name])
 
         if not objects_with_tag:
             cmds.warning(f"选中的物体中没有包含 Tag '{tag_name}'！")
             return
 
-        for obj in objects_with_tag:
-            cmds.deleteAttr(f"{obj}.{tag_name}")
-            print(f"已从物体 '{obj}' 删除 Tag '{tag_name}'")
-
         print(f"已从 {len(objects_with_tag)} 个物体删除 Tag '{tag_name}'。")
 
     def identify_object_tags(self):
@@ -1218,15 +1384,13 @@ def attach_external_methods_to_combined_tool():
             cmds.warning("请至少选择一个物体！")
             return
 
+        # 与迁移使用同一个 Tag 判定（布尔属性与 ckTags 合并）
         identified_tags = set()
-        for obj in selected_objects:
-            attrs = cmds.listAttr(obj, userDefined=True) or []
-            for attr in attrs:
-                if cmds.getAttr(f"{obj}.{attr}", type=True) == "bool":
-                    identified_tags.add(attr)
+        for tags in tag_storage.read_tags(selected_objects).values():
+            identified_tags.update(tags)
 
         if not identified_tags:
-            cmds.warning("选中的物体没有自定义布尔属性！")
+            cmds.warning("选中的物体没有 Tag！")
             return
 
         new_tags = [tag for tag in identified_tags if tag not in self.tag_history]
@@ -1237,6 +1401,30 @@ def attach_external_methods_to_combined_tool():
         else:
             print(f"识别到 {len(identified_tags)} 个 Tag，但均已存在于历史记录中：{identified_tags}")
 
+    @with_undo_support
+    def migrate_tags_to_compact(self):
+        """将选中物体的布尔 Tag 属性迁移到 ckTags 字符串数组并删除原属性"""
+        selected_objects = cmds.ls(selection=True, long=True)
+        if not selected_objects:
+            cmds.warning("请至少选择一个物体！")
+            return
+
+        count = tag_storage.migrate_to_compact(selected_objects)
+        tag_index.get_index().clear()
+        print(f"已将 {count} 个布尔 Tag 迁移到 {tag_storage.TAGS_ATTR}（{len(selected_objects)} 个物体）")
+
+    @with_undo_support
+    def migrate_tags_to_attributes(self):
+        """将 ckTags 中的 Tag 迁移回布尔属性（有选择时仅处理选择，否则处理整个场景）"""
+        nodes = cmds.ls(selection=True, long=True) or tag_storage.compact_nodes()
+        if not nodes:
+            cmds.warning(f"场景中没有使用 {tag_storage.TAGS_ATTR} 的物体")
+            return
+
+        count = tag_storage.migrate_to_attributes(nodes)
+        tag_index.get_index().clear()
+        print(f"已将 {count} 个 Tag 从 {tag_storage.TAGS_ATTR} 迁移为布尔属性")
+
     def on_tag_history_selected(self, tag):
         if tag != "无记录":
             self.tag_name_input.setText(tag)
@@ -1307,150 +1495,121 @@ def attach_external_methods_to_combined_tool():
         Returns:
             tuple: (子控制器名称, 输出组名称)
         """
-        try:
-            # 创建子控制器 - 直接使用父控制器名称+Sub
-            sub_ctrl_name = f"{parent_ctrl}Sub"
-            sub_ctrl = cmds.duplicate(parent_ctrl, name=sub_ctrl_name)[0]
-            # 先临时将子控制器放在父控制器下
-            cmds.parent(sub_ctrl, parent_ctrl)
-            cmds.setAttr(f"{sub_ctrl}.scale", 0.9, 0.9, 0.9)
-            cmds.makeIdentity(sub_ctrl, apply=True, scale=True)
-
-            # 创建输出组
-            output_name = parent_ctrl.replace(f"ctrl{formatted_side}_", f"output{formatted_side}_")
-            
-            # 检查输出组是否已存在，如果存在则删除
-            if cmds.objExists(output_name):
-                print(f"警告: 输出组 '{output_name}' 已存在，将被删除并重新创建")
-                cmds.delete(output_name)
-                
-            # 创建输出组并立即父级到控制器下
-            output = cmds.createNode('transform', name=output_name, parent=parent_ctrl)
-
-            # 连接属性
-            cmds.connectAttr(f"{sub_ctrl}.translate", f"{output_name}.translate")
-            cmds.connectAttr(f"{sub_ctrl}.rotate", f"{output_name}.rotate")
-            cmds.connectAttr(f"{sub_ctrl}.rotateOrder", f"{output_name}.rotateOrder")
-            cmds.connectAttr(f"{sub_ctrl}.scale", f"{output_name}.scale")  # 添加缩放属性连接
-
-            # 显示旋转顺序
-            cmds.setAttr(f"{parent_ctrl}.rotateOrder", channelBox=True, keyable=True)
-            cmds.setAttr(f"{sub_ctrl}.rotateOrder", channelBox=True, keyable=True)
-
-            # 添加子控制器可见性属性 - 在锁定visibility之前添加
-            if not cmds.attributeQuery("subCtrlVis", node=parent_ctrl, exists=True):
-                cmds.addAttr(parent_ctrl, longName='subCtrlVis', attributeType='bool', defaultValue=False)
-                cmds.setAttr(f"{parent_ctrl}.subCtrlVis", channelBox=True, keyable=False)
-                # 设置为可以在通道框中显示但不可k帧
-                print(f"已在 '{parent_ctrl}' 上添加 subCtrlVis 属性，并设置为通道框可见但不可关键帧")
-            else:
-                # 确保属性是不可关键帧的但在通道框可见
-                cmds.setAttr(f"{parent_ctrl}.subCtrlVis", channelBox=True, keyable=False)
-                
-            # 连接子控制器可见性
-            cmds.connectAttr(f"{parent_ctrl}.subCtrlVis", f"{sub_ctrl}.visibility")
-
-            # 调整子控制器颜色 - 使用稍浅的颜色
-            # 首先获取父控制器的形状节点颜色设置
-            parent_shapes = cmds.listRelatives(parent_ctrl, shapes=True) or []
-            parent_rgb_colors = None
-            parent_index = None
-            use_rgb = False
-
-            # 获取父控制器的颜色设置
-            if parent_shapes:
-                parent_shape = parent_shapes[0]
-                if cmds.getAttr(f"{parent_shape}.overrideEnabled"):
-                    if cmds.getAttr(f"{parent_shape}.overrideRGBColors"):
-                        # 父控制器使用RGB颜色
-                        use_rgb = True
-                        parent_rgb_colors = cmds.getAttr(f"{parent_shape}.overrideColorRGB")[0]
-                    else:
-                        # 父控制器使用索引颜色
-                        parent_index = cmds.getAttr(f"{parent_shape}.overrideColor")
+        results = self.create_sub_controllers([(parent_ctrl, formatted_side)])
+        return results[0] if results else (None, None)
 
-            # 应用颜色到子控制器
-            shapes = cmds.listRelatives(sub_ctrl, shapes=True) or []
-            for shape in shapes:
-                cmds.setAttr(f"{shape}.overrideEnabled", 1)
-
-                if use_rgb and parent_rgb_colors:
-                    # 如果父控制器使用RGB颜色，则子控制器也使用RGB但颜色更淡
-                    cmds.setAttr(f"{shape}.overrideRGBColors", 1)
-                    # 将RGB颜色调亮一些，但保持原始色调
-                    lighter_rgb = [min(c * 1.3, 1.0) for c in parent_rgb_colors]
-                    cmds.setAttr(f"{shape}.overrideColorRGB", *lighter_rgb)
-                    print(f"子控制器 '{sub_ctrl_name}' 颜色设为淡化的RGB: {lighter_rgb}")
-                elif parent_index is not None:
-                    # 如果父控制器使用索引颜色，则子控制器使用更淡的索引颜色
-                    cmds.setAttr(f"{shape}.overrideRGBColors", 0)
+    @with_undo_support
+    def create_sub_controllers(self, items):
+        """
+        批量创建子控制器与输出组：全部形状、输出组、可见性属性与连接在一个修改器中执行，
+        之后一次写入全部子控制器颜色
 
-                    # Maya颜色索引映射表 - 从深色到浅色
-                    color_map = {
-                        # 红色系
-                        4: 31,  # 暗红 -> 粉红
-                        12: 31,  # 红棕 -> 粉红
-                        13: 20,  # 红色 -> 浅红
-                        24: 20,  # 红色 -> 浅红
-                        31: 9,  # 粉红 -> 淡粉
-
-                        # 蓝色系
-                        5: 18,  # 深蓝 -> 浅蓝
-                        6: 18,  # 蓝色 -> 浅蓝
-                        15: 18,  # 海军蓝 -> 浅蓝
-                        18: 29,  # 浅蓝 -> 淡蓝
-
-                        # 绿色系
-                        7: 19,  # 绿色 -> 浅绿
-                        19: 29,  # 浅绿 -> 淡绿
-                        23: 19,  # 深绿 -> 浅绿
-
-                        # 黄色系
-                        17: 22,  # 黄色 -> 浅黄
-                        21: 22,  # 黄褐色 -> 浅黄
-                        11: 21,  # 棕色 -> 黄褐色
-                        10: 11,  # 深棕 -> 棕色
-
-                        # 紫色系
-                        8: 30,  # 紫色 -> 淡紫
-                        9: 30,  # 淡紫红 -> 淡紫
-
-                        # 青色系
-                        14: 29,  # 亮蓝 -> 淡蓝
-                        16: 29,  # 青色 -> 淡蓝绿
-
-                        # 灰色系
-                        0: 3,  # 黑色 -> 深灰
-                        1: 3,  # 黑色 -> 深灰
-                        2: 3,  # 深灰2 -> 深灰
-                        3: 2,  # 深灰 -> 灰色
-                        25: 22,  # 棕黄 -> 浅黄
-                        26: 19,  # 草绿 -> 浅绿
-                        27: 30,  # 深紫 -> 淡紫
-                        28: 16,  # 褐色 -> 青色
-                    }
-
-                    # 使用映射表或简单加亮规则
-                    if parent_index in color_map:
-                        new_index = color_map[parent_index]
-                    else:
-                        # 默认规则：如果没有特定映射，使用索引+2 (限制在有效范围内)
-                        new_index = min(parent_index + 2, 31)
+        Args:
+            items: (父控制器名称, 格式化的侧面字符串) 列表
 
-                    cmds.setAttr(f"{shape}.overrideColor", new_index)
-                    print(f"子控制器 '{sub_ctrl_name}' 颜色索引从 {parent_index} 改为 {new_index}")
-                else:
-                    # 如果父控制器没有设置颜色，使用默认淡蓝色
-                    cmds.setAttr(f"{shape}.overrideRGBColors", 0)
-                    cmds.setAttr(f"{shape}.overrideColor", 18)  # 浅蓝色
-                    print(f"子控制器 '{sub_ctrl_name}' 设置默认颜色索引 18 (浅蓝色)")
+        Returns:
+            list: 与 items 顺序一致的 (子控制器名称, 输出组名称)，失败时返回空列表
+        """
+        parent_ctrls = [parent_ctrl for parent_ctrl, _ in items]
+        # 子控制器直接使用父控制器名称+Sub，输出组将 ctrl 前缀替换为 output
+        sub_names = [f"{parent_ctrl}Sub" for parent_ctrl in parent_ctrls]
+        output_names = [parent_ctrl.replace(f"ctrl{formatted_side}_", f"output{formatted_side}_")
+                        for parent_ctrl, formatted_side in items]
+
+        # 检查输出组是否已存在，如果存在则一次删除后重新创建
+        existing = [output_name for output_name in output_names if cmds.objExists(output_name)]
+        for output_name in existing:
+            print(f"警告: 输出组 '{output_name}' 已存在，将被删除并重新创建")
+        if existing:
+            cmds.delete(existing)
 
-            return sub_ctrl_name, output_name
+        try:
+            results = sub_controller_builder.build_sub_controllers(
+                parent_ctrls, sub_names, output_names,
+                matrix_output=self.matrix_constraint_check.isChecked())
         except Exception as e:
             print(f"创建子控制器时出错: {str(e)}")
-            return None, None
+            return []
 
+        assignments = []
+        for parent_ctrl, (sub_ctrl, _) in zip(parent_ctrls, results):
+            # 显示旋转顺序
+            cmds.setAttr(f"{parent_ctrl}.rotateOrder", channelBox=True, keyable=True)
+            cmds.setAttr(f"{sub_ctrl}.rotateOrder", channelBox=True, keyable=True)
+            assignments.append((sub_ctrl, self.sub_controller_color(parent_ctrl, sub_ctrl)))
 
+        # 调整子控制器颜色 - 使用稍浅的颜色，全部一次写入
+        color_scheme.set_override_colors(assignments)
+        return results
+
+    def sub_controller_color(self, parent_ctrl, sub_ctrl):
+        """
+        由父控制器的颜色得到子控制器的颜色（更浅的 RGB 或索引），父控制器没有颜色时为浅蓝色索引 18
+        """
+        parent_shapes = cmds.listRelatives(parent_ctrl, shapes=True, fullPath=True) or []
+        if parent_shapes and cmds.getAttr(f"{parent_shapes[0]}.overrideEnabled"):
+            parent_shape = parent_shapes[0]
+            if cmds.getAttr(f"{parent_shape}.overrideRGBColors"):
+                # 如果父控制器使用RGB颜色，则子控制器也使用RGB但颜色更淡，保持原始色调
+                lighter_rgb = tuple(min(c * 1.3, 1.0) for c in cmds.getAttr(f"{parent_shape}.overrideColorRGB")[0])
+                print(f"子控制器 '{sub_ctrl}' 颜色设为淡化的RGB: {list(lighter_rgb)}")
+                return lighter_rgb
+
+            # 如果父控制器使用索引颜色，则子控制器使用更淡的索引颜色
+            parent_index = cmds.getAttr(f"{parent_shape}.overrideColor")
+            # Maya颜色索引映射表 - 从深色到浅色
+            color_map = {
+                # 红色系
+                4: 31,  # 暗红 -> 粉红
+                12: 31,  # 红棕 -> 粉红
+                13: 20,  # 红色 -> 浅红
+                24: 20,  # 红色 -> 浅红
+                31: 9,  # 粉红 -> 淡粉
+
+                # 蓝色系
+                5: 18,  # 深蓝 -> 浅蓝
+                6: 18,  # 蓝色 -> 浅蓝
+                15: 18,  # 海军蓝 -> 浅蓝
+                18: 29,  # 浅蓝 -> 淡蓝
+
+                # 绿色系
+                7: 19,  # 绿色 -> 浅绿
+                19: 29,  # 浅绿 -> 淡绿
+                23: 19,  # 深绿 -> 浅绿
+
+                # 黄色系
+                17: 22,  # 黄色 -> 浅黄
+                21: 22,  # 黄褐色 -> 浅黄
+                11: 21,  # 棕色 -> 黄褐色
+                10: 11,  # 深棕 -> 棕色
+
+                # 紫色系
+                8: 30,  # 紫色 -> 淡紫
+                9: 30,  # 淡紫红 -> 淡紫
+
+                # 青色系
+                14: 29,  # 亮蓝 -> 淡蓝
+                16: 29,  # 青色 -> 淡蓝绿
+
+                # 灰色系
+                0: 3,  # 黑色 -> 深灰
+                1: 3,  # 黑色 -> 深灰
+                2: 3,  # 深灰2 -> 深灰
+                3: 2,  # 深灰 -> 灰色
+                25: 22,  # 棕黄 -> 浅黄
+                26: 19,  # 草绿 -> 浅绿
+                27: 30,  # 深紫 -> 淡紫
+                28: 16,  # 褐色 -> 青色
+            }
+
+            # 使用映射表或简单加亮规则（默认索引+2，限制在有效范围内）
+            new_index = color_map.get(parent_index, min(parent_index + 2, 31))
+            print(f"子控制器 '{sub_ctrl}' 颜色索引从 {parent_index} 改为 {new_index}")
+            return new_index
+
+        # 如果父控制器没有设置颜色，使用默认淡蓝色
+        print(f"子控制器 '{sub_ctrl}' 设置默认颜色索引 18 (浅蓝色)")
+        return 18
 
     def parse_object_name(self, object_name, ignore_suffix=True):
         """解析物体名称，提取控制器名称
@@ -1527,6 +1686,45 @@ def attach_external_methods_to_combined_tool():
         if exclude_last and len(joint_chain) > 1:
             joint_chain.pop()
         
+        # 单链时每个骨骼的父级就是前一个骨骼
+        parent_indices = list(range(-1, len(joint_chain) - 1))
+        self.build_fk_hierarchy(joint_chain, parent_indices)
+
+    @with_undo_support
+    def create_fk_tree(self):
+        """为选中的根骨骼创建包含所有分支的FK控制器树（如手掌下的全部手指）"""
+        selected = cmds.ls(selection=True, type="joint")
+        
+        if not selected:
+            cmds.warning("请先选择一个或多个骨骼作为FK树的根")
+            return
+        
+        # 一次性预取整个骨骼树
+        joints, parent_indices = get_joint_hierarchy(selected)
+        
+        # 排除末端骨骼：移除所有没有子骨骼的叶子（仅剩根骨骼时保留）
+        if self.exclude_last_joint_check.isChecked() and len(joints) > 1:
+            has_children = set(parent_indices)
+            keep = [i for i in range(len(joints)) if i in has_children or parent_indices[i] == -1]
+            remap = {old_index: new_index for new_index, old_index in enumerate(keep)}
+            joints = [joints[i] for i in keep]
+            parent_indices = [remap.get(parent_indices[i], -1) for i in keep]
+        
+        if not joints:
+            cmds.warning("选中的骨骼下没有有效的骨骼树")
+            return
+        
+        branch_count = sum(1 for i in range(len(joints)) if parent_indices.count(i) > 1)
+        print(f"已预取骨骼树：{len(joints)} 个骨骼，{branch_count} 个分支点")
+        self.build_fk_hierarchy(joints, parent_indices)
+
+    def build_fk_hierarchy(self, joint_chain, parent_indices):
+        """根据骨骼列表与父级索引创建FK控制器层级
+        
+        参数:
+            joint_chain (list): 骨骼列表，父骨骼必须排在子骨骼之前
+            parent_indices (list): 每个骨骼的父骨骼在列表中的索引，-1 表示位于世界空间
+        """
         # 检查是否启用物体名称识别
         use_auto_naming = self.auto_name_from_joint_check.isChecked()
         
@@ -1557,6 +1755,10 @@ def attach_external_methods_to_combined_tool():
         scale_constraint = self.scale_constraint_check.isChecked()
         scale_offset = self.scale_offset_check.isChecked()
         
+        # 增量重建：复用已存在的节点，只创建缺失部分并修正错误的父级、变换与约束
+        incremental = self.incremental_rebuild_check.isChecked()
+        builder = incremental_build.IncrementalBuilder(incremental)
+        
         # ==== 修改逻辑：先创建所有控制器及组结构 ====
         
         # 存储创建的控制器和组的信息，以便后续处理
@@ -1635,7 +1837,7 @@ def attach_external_methods_to_combined_tool():
             
             # 创建组层级结构
             if use_hierarchy_logic:
-                zero_group = cmds.group(name=zero_group_name, empty=True)
+                zero_group = builder.group(zero_group_name)
                 
                 # 根据命名方式确定其他组的名称
                 if use_auto_naming and "_" in base_name and base_name.split("_")[0].lower() in ["l", "r", "c", "m"]:
@@ -1649,12 +1851,12 @@ def attach_external_methods_to_combined_tool():
                     connect_group_name = f"connect{formatted_side}_{base_name}{suffix}"
                     offset_group_name = f"offset{formatted_side}_{base_name}{suffix}"
                 
-                driven_group = cmds.group(name=driven_group_name, empty=True, parent=zero_group)
-                connect_group = cmds.group(name=connect_group_name, empty=True, parent=driven_group)
-                offset_group = cmds.group(name=offset_group_name, empty=True, parent=connect_group)
+                driven_group = builder.group(driven_group_name, zero_group)
+                connect_group = builder.group(connect_group_name, driven_group)
+                offset_group = builder.group(offset_group_name, connect_group)
                 last_group = offset_group
             else:
-                zero_group = cmds.group(name=zero_group_name, empty=True)
+                zero_group = builder.group(zero_group_name)
                 
                 # 根据命名方式确定offset组的名称
                 if use_auto_naming and "_" in base_name and base_name.split("_")[0].lower() in ["l", "r", "c", "m"]:
@@ -1664,25 +1866,38 @@ def attach_external_methods_to_combined_tool():
                     # 不包含侧面信息的情况
                     offset_group_name = f"offset{formatted_side}_{base_name}{suffix}"
                     
-                offset_group = cmds.group(name=offset_group_name, empty=True, parent=zero_group)
+                offset_group = builder.group(offset_group_name, zero_group)
                 last_group = offset_group
             
             # 创建控制器
+            sub_created = False
+            ctrl_created = False
             if create_controller_flag:
-                ctrl = controller_shapes.create_custom_controller(
-                    ctrl_name=ctrl_name, 
-                    controller_type=controller_type, 
-                    size=ctrl_size
-                )
-                
-                # 设置控制器颜色
-                controller_shapes.apply_color_to_controller(ctrl, self.color_rgb)
-                
-                # 为控制器形状节点重命名为"曲线名称_Shape"格式
-                controller_shapes.rename_controller_shape(ctrl)
-                
-                # 父级控制器到最后一个组
-                cmds.parent(ctrl, last_group)
+                if builder.exists(ctrl_name):
+                    # 复用已存在的控制器，仅修正父级
+                    ctrl = ctrl_name
+                    builder.parent(ctrl, last_group)
+                else:
+                    ctrl = controller_shapes.create_custom_controller(
+                        ctrl_name=ctrl_name, 
+                        controller_type=controller_type, 
+                        size=ctrl_size
+                    )
+                    ctrl_created = True
+                    builder.created()
+                    
+                    # 设置控制器颜色
+                    controller_shapes.apply_color_to_controller(ctrl, self.color_rgb)
+                    
+                    # 为控制器形状节点重命名为"曲线名称_Shape"格式
+                    controller_shapes.rename_controller_shape(ctrl)
+
+                    # 共享形状：相同类型、大小与颜色的控制器引用同一个实例化形状
+                    if self.shared_shape_check.isChecked():
+                        shared_shapes.adopt_shared_shape(ctrl, shared_shapes.shape_key(controller_type, ctrl_size, ctrl))
+                    
+                    # 父级控制器到最后一个组
+                    cmds.parent(ctrl, last_group)
                 
                 # 确保旋转顺序是可见的和可关键帧的
                 cmds.setAttr(f"{ctrl}.rotateOrder", channelBox=True, keyable=True)
@@ -1693,18 +1908,23 @@ def attach_external_methods_to_combined_tool():
                 if create_sub_controller_flag:
                     # 创建子控制器
                     sub_ctrl_name = f"{ctrl_name}_sub"
-                    sub_ctrl = controller_shapes.create_custom_controller(
-                        ctrl_name=sub_ctrl_name,
-                        controller_type=controller_type,
-                        size=ctrl_size * 0.8
-                    )
-                    
-                    # 为子控制器形状节点重命名为"曲线名称_Shape"格式
-                    controller_shapes.rename_controller_shape(sub_ctrl)
-                    
-                    # 设置子控制器颜色 (稍微暗一点)
-                    sub_color = tuple(c * 0.8 for c in self.color_rgb)
-                    controller_shapes.apply_color_to_controller(sub_ctrl, sub_color)
+                    if builder.exists(sub_ctrl_name):
+                        sub_ctrl = sub_ctrl_name
+                    else:
+                        sub_ctrl = controller_shapes.create_custom_controller(
+                            ctrl_name=sub_ctrl_name,
+                            controller_type=controller_type,
+                            size=ctrl_size * 0.8
+                        )
+                        sub_created = True
+                        builder.created()
+                        
+                        # 为子控制器形状节点重命名为"曲线名称_Shape"格式
+                        controller_shapes.rename_controller_shape(sub_ctrl)
+                        
+                        # 设置子控制器颜色 (稍微暗一点)
+                        sub_color = tuple(c * 0.8 for c in self.color_rgb)
+                        controller_shapes.apply_color_to_controller(sub_ctrl, sub_color)
                     
                     # 创建输出组 - 这将用于连接FK链和约束
                     if use_auto_naming and "_" in base_name and base_name.split("_")[0].lower() in ["l", "r", "c", "m"]:
@@ -1713,33 +1933,34 @@ def attach_external_methods_to_combined_tool():
                     else:
                         # 不包含侧面信息的情况
                         output_name = f"output{formatted_side}_{base_name}{suffix}"
-                    output_group = cmds.group(name=output_name, empty=True)
+                    output_group = builder.group(output_name)
                     
                     # 重要：将子控制器和输出组都放在控制器下面
-                    cmds.parent(sub_ctrl, ctrl)
-                    cmds.parent(output_group, ctrl)
+                    builder.parent(sub_ctrl, ctrl)
+                    builder.parent(output_group, ctrl)
                     
                     # 添加调试输出
-                    print(f"层级结构: 已创建子控制器 '{sub_ctrl}' 和输出组 '{output_group}'，并放置在控制器 '{ctrl}' 下")
+                    print(f"层级结构: 子控制器 '{sub_ctrl}' 和输出组 '{output_group}' 已放置在控制器 '{ctrl}' 下")
                     
                     # 添加子控制器可见性属性，默认设置为不可见
-                    cmds.addAttr(ctrl, longName="subCtrlVis", attributeType="bool", defaultValue=0)
+                    if not cmds.attributeQuery("subCtrlVis", node=ctrl, exists=True):
+                        cmds.addAttr(ctrl, longName="subCtrlVis", attributeType="bool", defaultValue=0)
                     cmds.setAttr(f"{ctrl}.subCtrlVis", channelBox=True, keyable=False)
-                    cmds.connectAttr(f"{ctrl}.subCtrlVis", f"{sub_ctrl}.visibility")
+                    builder.connect(f"{ctrl}.subCtrlVis", f"{sub_ctrl}.visibility")
                     print(f"可见性: 子控制器 '{sub_ctrl}' 默认设置为隐藏，可在通道框中显示但不可关键帧")
                     
                     # 确保子控制器的旋转顺序是可见的和可关键帧的
                     cmds.setAttr(f"{sub_ctrl}.rotateOrder", channelBox=True, keyable=True)
                     
                     # 连接子控制器到输出组 - 确保子控制器驱动输出组
-                    cmds.connectAttr(f"{sub_ctrl}.translate", f"{output_group}.translate")
-                    cmds.connectAttr(f"{sub_ctrl}.rotate", f"{output_group}.rotate")
-                    cmds.connectAttr(f"{sub_ctrl}.rotateOrder", f"{output_group}.rotateOrder")
-                    cmds.connectAttr(f"{sub_ctrl}.scale", f"{output_group}.scale")
+                    builder.connect(f"{sub_ctrl}.translate", f"{output_group}.translate")
+                    builder.connect(f"{sub_ctrl}.rotate", f"{output_group}.rotate")
+                    builder.connect(f"{sub_ctrl}.rotateOrder", f"{output_group}.rotateOrder")
+                    builder.connect(f"{sub_ctrl}.scale", f"{output_group}.scale")
                     print(f"连接: 已将子控制器 '{sub_ctrl}' 变换连接到输出组 '{output_group}'")
             else:
                 # 如果不创建控制器，创建一个空组作为控制器
-                ctrl = cmds.group(name=ctrl_name, empty=True, parent=last_group)
+                ctrl = builder.group(ctrl_name, last_group)
                 sub_ctrl = None
                 output_group = None
             
@@ -1750,14 +1971,19 @@ def attach_external_methods_to_combined_tool():
                 'ctrl': ctrl,
                 'sub_ctrl': sub_ctrl,
                 'output_group': output_group,
-                'last_group': last_group
+                'last_group': last_group,
+                'sub_created': sub_created,
+                'ctrl_created': ctrl_created
             })
             
             controllers.append(ctrl)
         
-        # 第二步：建立FK层级关系（使第一个控制器保持在世界空间，其余控制器成为链）
-        for i in range(1, len(controller_info)):
-            prev_info = controller_info[i-1]
+        # 第二步：建立FK层级关系（根控制器保持在世界空间，其余控制器跟随父骨骼对应的控制器）
+        fk_parent_pairs = []
+        for i in range(len(controller_info)):
+            if parent_indices[i] < 0:
+                continue
+            prev_info = controller_info[parent_indices[i]]
             curr_info = controller_info[i]
             
             # 重要：当启用子控制器时，确保零组连接到前一个控制器的output组
@@ -1770,13 +1996,37 @@ def attach_external_methods_to_combined_tool():
                 prev_output = prev_info['ctrl']
                 parent_type = "控制器"
             
-            # 将当前zero组父级到确定的节点（output组或控制器）
-            cmds.parent(curr_info['zero_group'], prev_output)
+            # 将当前zero组父级到确定的节点（output组或控制器），全部收集后批量执行
+            fk_parent_pairs.append((curr_info['zero_group'], prev_output))
             
             # 添加调试输出
             print(f"FK链接: 将 '{curr_info['zero_group']}' 父级到前一个{parent_type} '{prev_output}'")
+        builder.parent_many(fk_parent_pairs)
         
         # 第三步：匹配位置和旋转，应用约束
+        use_matrix_constraint = self.matrix_constraint_check.isChecked()
+        matrix_pairs = []
+        # 本次请求的完整驱动集合：约束类型，或矩阵约束及其通道（增量模式下删除集合之外的旧驱动）
+        requested_types = []
+        requested_channels = set()
+        if parent_constraint:
+            requested_types.append("parentConstraint")
+            requested_channels.update(("translate", "rotate"))
+        else:
+            if point_constraint:
+                requested_types.append("pointConstraint")
+                requested_channels.add("translate")
+            if orient_constraint:
+                requested_types.append("orientConstraint")
+                requested_channels.add("rotate")
+        if scale_constraint:
+            requested_types.append("scaleConstraint")
+            requested_channels.add("scale")
+        if use_matrix_constraint:
+            requested_types = []
+        else:
+            requested_channels = set()
+
         for info in controller_info:
             joint = info['joint']
             zero_group = info['zero_group']
@@ -1784,13 +2034,14 @@ def attach_external_methods_to_combined_tool():
             sub_ctrl = info['sub_ctrl']
             output_group = info['output_group']
             
-            # 匹配zero组到关节位置
-            cmds.matchTransform(zero_group, joint, position=True, rotation=True)
+            # 匹配zero组到关节位置（增量模式下仅在位置或旋转不一致时匹配）
+            builder.match_transform(zero_group, joint)
             
-            # 如果有子控制器和输出组，匹配它们到控制器
+            # 如果有子控制器和输出组，匹配它们到控制器（复用的子控制器保留其现有姿态）
             if sub_ctrl and output_group:
-                cmds.matchTransform(sub_ctrl, ctrl, position=True, rotation=True)
-                cmds.matchTransform(output_group, ctrl, position=True, rotation=True)
+                if not incremental or info['sub_created']:
+                    cmds.matchTransform(sub_ctrl, ctrl, position=True, rotation=True)
+                    cmds.matchTransform(output_group, ctrl, position=True, rotation=True)
                 
                 # 应用约束到骨骼
                 constraint_target = output_group
@@ -1799,21 +2050,63 @@ def attach_external_methods_to_combined_tool():
                 constraint_target = ctrl
                 print(f"将使用控制器 '{ctrl}' 约束骨骼 '{joint}'")
             
-            # 应用约束
+            # 切换约束模式时删除不再需要的约束或矩阵网络，避免骨骼被新旧驱动同时驱动
+            builder.prune_drivers(joint, requested_types, requested_channels)
+
+            # 矩阵约束模式：先收集驱动关系，循环结束后批量创建
+            if use_matrix_constraint:
+                matrix_pairs.append((constraint_target, joint))
+                continue
+
+            # 应用约束（增量模式下复用目标一致的约束，只重建错误的约束）
             if parent_constraint:
-                constraint = cmds.parentConstraint(constraint_target, joint, maintainOffset=parent_offset)
-                print(f"已创建父子约束 '{constraint}' 从 '{constraint_target}' 到 '{joint}'")
+                constraint = builder.constraint("parentConstraint", constraint_target, joint, parent_offset)
+                print(f"父子约束 '{constraint}' 从 '{constraint_target}' 到 '{joint}'")
             else:
                 if point_constraint:
-                    constraint = cmds.pointConstraint(constraint_target, joint, maintainOffset=point_offset)
-                    print(f"已创建点约束 '{constraint}' 从 '{constraint_target}' 到 '{joint}'")
+                    constraint = builder.constraint("pointConstraint", constraint_target, joint, point_offset)
+                    print(f"点约束 '{constraint}' 从 '{constraint_target}' 到 '{joint}'")
                 if orient_constraint:
-                    constraint = cmds.orientConstraint(constraint_target, joint, maintainOffset=orient_offset)
-                    print(f"已创建方向约束 '{constraint}' 从 '{constraint_target}' 到 '{joint}'")
+                    constraint = builder.constraint("orientConstraint", constraint_target, joint, orient_offset)
+                    print(f"方向约束 '{constraint}' 从 '{constraint_target}' 到 '{joint}'")
             
             if scale_constraint:
-                constraint = cmds.scaleConstraint(constraint_target, joint, maintainOffset=scale_offset)
-                print(f"已创建缩放约束 '{constraint}' 从 '{constraint_target}' 到 '{joint}'")
+                constraint = builder.constraint("scaleConstraint", constraint_target, joint, scale_offset)
+                print(f"缩放约束 '{constraint}' 从 '{constraint_target}' 到 '{joint}'")
+
+        # 自动适配大小：新建的控制器按骨骼的蒙皮顶点缩放并旋转形状（复用的控制器保留现有形状）
+        if create_controller_flag and self.auto_fit_check.isChecked():
+            self.auto_fit_controllers([(info['ctrl'], info['joint']) for info in controller_info
+                                       if info['ctrl_created']])
+
+        if matrix_pairs and incremental:
+            # 已由正确驱动者按相同通道矩阵约束的骨骼不再重建
+            missing_pairs = incremental_build.filter_matrix_constraint_pairs(matrix_pairs, requested_channels)
+            builder.fixed(len(missing_pairs))
+            matrix_pairs = missing_pairs
+
+        if matrix_pairs:
+            # 按"保持偏移"设置对通道分组，同一设置的通道共用一个矩阵网络
+            channel_groups = {}
+            if parent_constraint:
+                channel_groups.setdefault(parent_offset, set()).update(("translate", "rotate"))
+            else:
+                if point_constraint:
+                    channel_groups.setdefault(point_offset, set()).add("translate")
+                if orient_constraint:
+                    channel_groups.setdefault(orient_offset, set()).add("rotate")
+            if scale_constraint:
+                channel_groups.setdefault(scale_offset, set()).add("scale")
+
+            for maintain_offset, channels in channel_groups.items():
+                nodes = matrix_constraint.create_matrix_constraints(
+                    matrix_pairs,
+                    maintain_offset=maintain_offset,
+                    translate="translate" in channels,
+                    rotate="rotate" in channels,
+                    scale="scale" in channels
+                )
+                print(f"已批量创建矩阵约束：{len(matrix_pairs)} 个骨骼，通道 {sorted(channels)}，共 {len(nodes)} 个矩阵节点")
         
         # 如果成功创建控制器，选择第一个控制器
         if controllers:
@@ -1828,9 +2121,35 @@ def attach_external_methods_to_combined_tool():
                         
             cmds.select(controllers[0])
             print(f"成功创建FK层级链，共 {len(controllers)} 个控制器")
+            builder.report()
         else:
             cmds.warning("创建FK层级链失败")
 
+    @with_undo_support
+    def convert_constraints_to_matrix(self):
+        """将选中物体（未选择时为整个场景）上的单目标约束转换为矩阵约束网络"""
+        selected = cmds.ls(selection=True, long=True)
+        constraints = None
+        if selected:
+            constraints = cmds.listRelatives(selected, allDescendents=True, fullPath=True,
+                                             type=list(matrix_constraint.CONSTRAINT_OUTPUT_CHANNELS)) or []
+            if not constraints:
+                cmds.warning("选中的物体下没有约束节点")
+                return
+
+        try:
+            result = matrix_constraint.convert_constraints_to_matrix(constraints)
+        except Exception as e:
+            cmds.warning(f"转换约束失败: {str(e)}")
+            print(f"错误详情: {str(e)}")
+            return
+
+        if result["converted"]:
+            message = f"已转换 {len(result['converted'])} 个约束，保留 {len(result['skipped'])} 个"
+            if result["before_ms"] is not None and result["after_ms"] is not None:
+                message += f"，每帧求值 {result['before_ms']:.2f} ms → {result['after_ms']:.2f} ms"
+            cmds.inViewMessage(amg=f"<hl>{message}</hl>", pos='midCenterTop', fade=True)
+
     def get_joint_chain(self, root_joint):
         """获取从指定根骨骼开始的骨骼链
         
@@ -1840,22 +2159,29 @@ def attach_external_methods_to_combined_tool():
         返回:
             list: 骨骼链列表
         """
-        joint_chain = [root_joint]
-        current = root_joint
+        # 一次性预取整个骨骼树，避免逐个骨骼调用 listRelatives
+        joints, parent_indices = get_joint_hierarchy([root_joint])
+        if not joints:
+            return [root_joint]
+        
+        children_map = {}
+        for index, parent_index in enumerate(parent_indices):
+            children_map.setdefault(parent_index, []).append(index)
+        
+        chain_indices = []
+        current = 0
         
-        # 循环查找子骨骼，直到没有子骨骼为止
+        # 循环查找子骨骼，直到没有子骨骼或遇到分支为止
         while True:
-            children = cmds.listRelatives(current, children=True, type="joint") or []
-            
-            # 如果没有子骨骼或有多个子骨骼，停止
-            if not children or len(children) > 1:
+            children = children_map.get(current, [])
+            if len(children) != 1:
                 break
-            
-            # 添加到链中并更新当前骨骼
-            joint_chain.append(children[0])
             current = children[0]
+            chain_indices.append(current)
         
-        return joint_chain
+        # 一次查询得到与根骨骼一致的短名称
+        chain_paths = [joints[index] for index in chain_indices]
+        return [root_joint] + ((cmds.ls(chain_paths) or []) if chain_paths else [])
 
    
 
@@ -1877,6 +2203,32 @@ def attach_external_methods_to_combined_tool():
                               scl=self.match_scale)
         print(f"已将 {len(source_objects)} 个物体匹配到 '{target_obj}' 的变换")
 
+    @with_undo_support
+    def snap_to_nearest_targets(self):
+        """将选中的控制器层级吸附到容差范围内最近的骨骼、定位器或模型顶点（顶点模式下同时选择模型）"""
+        selected = cmds.ls(selection=True, type="transform", long=True) or []
+        target_type = nearest_snap.TARGET_TYPES[self.snap_target_combo.currentIndex()]
+        meshes = []
+        if target_type == "vertex":
+            meshes = [obj for obj in selected if cmds.listRelatives(obj, shapes=True, type="mesh")]
+            selected = [obj for obj in selected if obj not in meshes]
+            if not meshes:
+                cmds.warning("顶点模式下请同时选择作为目标的模型")
+                return
+        if not selected:
+            cmds.warning("请先选择需要吸附的控制器")
+            return
+
+        result = nearest_snap.snap_to_nearest(selected, target_type, self.snap_tolerance_spin.value(), meshes,
+                                              self.match_position, self.match_rotation, self.match_scale)
+        for ctrl in result["unmatched"]:
+            print(f"未匹配: '{ctrl}' 在容差范围内没有目标")
+        for ctrl, reason in result["ambiguous"]:
+            print(f"有歧义: '{ctrl}' {reason}，已跳过")
+        if result["unmatched"] or result["ambiguous"]:
+            cmds.warning(f"{len(result['unmatched'])} 个控制器未匹配，{len(result['ambiguous'])} 个有歧义，详情见脚本编辑器")
+        print(f"最近目标吸附: 已吸附 {len(result['snapped'])}/{len(selected)} 个控制器层级")
+
     def toggle_always_draw_on_top(self):
         """切换选中曲线的alwaysDrawOnTop属性"""
         selected = cmds.ls(selection=True, long=True)
@@ -1912,6 +2264,150 @@ def attach_external_methods_to_combined_tool():
         else:
             cmds.warning('选择的物体中没有有效的曲线。')
 
+    @with_undo_support
+    def create_joint_chain_from_selection(self):
+        """按选择顺序在选中物体的位置批量创建一条骨骼链（一次读取位置，一次创建全部骨骼）"""
+        selected = cmds.ls(selection=True, type="transform", long=True)
+        if not selected:
+            cmds.warning("请按骨骼链顺序选择物体！")
+            return
+
+        name = self.name_text.text().strip() or "joint"
+        side = (self.side_text.text().split(",")[0].strip() or "none").lower()
+        formatted_side = f"_{side}" if side != "none" else ""
+
+        reserved = set()
+        names = []
+        for i in range(len(selected)):
+            index = i + 1
+            joint_name = f"jntSkin{formatted_side}_{name}_{index:03d}"
+            while joint_name in reserved or cmds.objExists(joint_name):
+                index += 1
+                joint_name = f"jntSkin{formatted_side}_{name}_{index:03d}"
+            reserved.add(joint_name)
+            names.append(joint_name)
+
+        positions = [(matrix[12], matrix[13], matrix[14]) for matrix in get_world_matrices(selected)]
+        joints = joint_builder.create_joints(names, positions, [i - 1 for i in range(len(selected))],
+                                             joint_set="Skin_Joints_Set")
+        cmds.select(joints, replace=True)
+        print(f"已按选择创建 {len(joints)} 个骨骼的骨骼链")
+
+    @with_undo_support
+    def build_rig_from_spec(self):
+        """选择 JSON / YAML 控制器规格文件，校验后一次性批量构建全部控制器"""
+        result = cmds.fileDialog2(fileFilter="控制器规格 (*.json *.yaml *.yml)", dialogStyle=2, fileMode=1,
+                                  caption="选择控制器规格文件")
+        if not result:
+            return
+
+        try:
+            built = rig_spec.build_rig_from_file(result[0])
+        except Exception as e:
+            cmds.warning(f"从规格构建控制器失败: {str(e)}")
+            print(f"错误详情: {str(e)}")
+            return
+
+        if built:
+            cmds.select(built["controllers"], replace=True)
+            print(f"已从规格 '{result[0]}' 构建 {len(built['controllers'])} 个控制器")
+
+    @with_undo_support
+    def unshare_controller_shapes(self):
+        """为选中控制器的共享形状创建独立副本，之后可单独编辑"""
+        selected = cmds.ls(selection=True, type="transform", long=True)
+        if not selected:
+            cmds.warning("请先选择需要取消共享形状的控制器。")
+            return
+
+        count = shared_shapes.unshare_shapes(selected)
+        if count:
+            print(f"已为 {len(selected)} 个控制器取消共享 {count} 个形状")
+        else:
+            print("选中的控制器没有共享形状")
+
+    @with_undo_support
+    def build_symmetry_map(self):
+        """按位置计算左右对称映射并缓存到场景（有选择时仅处理选择，否则处理全部骨骼与曲线控制器）"""
+        selected = cmds.ls(selection=True, type="transform", long=True)
+        try:
+            result = symmetry_map.build_and_cache(selected or None, self.symmetry_plane_combo.currentText(),
+                                                  self.symmetry_tolerance_spin.value())
+        except Exception as e:
+            cmds.warning(f"构建对称映射失败: {str(e)}")
+            print(f"错误详情: {str(e)}")
+            return
+
+        for node in result["unmatched"]:
+            print(f"未配对: '{node}' 在镜像位置附近没有对应节点")
+        for node in result["ambiguous"]:
+            print(f"有歧义: '{node}' 的镜像位置附近有两个距离相近的节点，未配对")
+        print(f"对称映射: {len(result['pairs'])} 对，{len(result['center'])} 个中线节点，"
+              f"{len(result['unmatched'])} 个未配对，{len(result['ambiguous'])} 个有歧义，"
+              f"已缓存到 '{symmetry_map.MAP_NODE}'")
+
+    @with_undo_support
+    def apply_symmetry_colors(self):
+        """按缓存的对称映射为曲线控制器设置侧面颜色索引（左 6 / 右 13 / 中 17）"""
+        lookup = symmetry_map.mirror_lookup()
+        if not lookup:
+            cmds.warning("场景中没有对称映射，请先构建对称映射")
+            return
+
+        controllers = set(color_scheme.scene_controllers())
+        assignments = [(node, color_scheme.SIDE_COLOR_INDEX[color_scheme.SIDE_ALIASES[side]])
+                       for node, (side, _) in lookup.items() if node in controllers]
+        color_scheme.set_override_colors(assignments)
+        print(f"已按对称映射为 {len(assignments)} 个控制器着色")
+
+    @with_undo_support
+    def apply_rule_color_scheme(self):
+        """按配色规则为控制器重新着色（有选择时仅处理选择及其子级，否则处理整个场景）"""
+        selected = cmds.ls(selection=True, long=True)
+        try:
+            result = color_scheme.apply_color_scheme(self.color_rules, selected or None)
+        except Exception as e:
+            cmds.warning(f"按规则配色失败: {str(e)}")
+            print(f"错误详情: {str(e)}")
+            return
+
+        print(f"按规则配色: {result['colored']} 个控制器匹配规则，{result['changed']} 个形状颜色已更新，"
+              f"{len(result['unmatched'])} 个未匹配任何规则")
+
+    def load_color_rules(self):
+        """选择 JSON / YAML 配色规则文件，取消时恢复默认规则（按侧面与主/子控制器）"""
+        result = cmds.fileDialog2(fileFilter="配色规则 (*.json *.yaml *.yml)", dialogStyle=2, fileMode=1,
+                                  caption="选择配色规则文件（取消则使用默认规则）")
+        if not result:
+            self.color_rules = None
+            print("已恢复默认配色规则")
+            return
+
+        try:
+            self.color_rules = color_scheme.load_rules(result[0])
+        except Exception as e:
+            cmds.warning(f"读取配色规则失败: {str(e)}")
+            print(f"错误详情: {str(e)}")
+            return
+        print(f"已加载 {len(self.color_rules)} 条配色规则: '{result[0]}'")
+
+    @with_undo_support
+    def purge_controller_history(self):
+        """批量清理控制器曲线上无用的构建历史（有选择时仅处理选择及其子级，否则处理整个场景）"""
+        selected = cmds.ls(selection=True, long=True)
+        try:
+            curves, node_count = history_purge.purge_curve_history(selected or None)
+        except Exception as e:
+            cmds.warning(f"清理曲线构建历史失败: {str(e)}")
+            print(f"错误详情: {str(e)}")
+            return
+
+        if curves:
+            cmds.inViewMessage(amg=f"<hl>完成！共清理 {len(curves)} 条曲线，删除 {node_count} 个构建历史节点。</hl>",
+                               pos='midCenterTop', fade=True)
+        else:
+            print("未找到带有构建历史的控制器曲线")
+
     # 自动绑定本函数内定义的以 self 为首参数的方法（支持装饰器）
     for _name, _obj in list(locals().items()):
         if _name.startswith("_"):
@@ -47,8 +47,11 @@ def create_cube_controller(ctrl_name, size=1.0):
     ctrl = cmds.curve(name=ctrl_name, degree=1, point=points)
     return ctrl
 
-def create_circle_controller(ctrl_name, size=1.0):
-    """创建圆形控制器"""
+def create_circle_controller(ctrl_name, size=1.0, construction_history=False):
+    """创建圆形控制器（默认由 CV 数据直接创建，不保留 makeNurbCircle 构建历史）"""
+    if not construction_history:
+        from common_utils import create_circle_curve
+        return create_circle_curve(ctrl_name, radius=size, sections=16, normal=(1, 0, 0))
     ctrl = cmds.circle(
         name=ctrl_name,
         center=(0, 0, 0),
@@ -212,11 +215,9 @@ def apply_color_to_controller(ctrl, color_rgb=(1.0, 1.0, 1.0)):
         ctrl (str): 控制器名称
         color_rgb (tuple): RGB颜色值，范围0-1
     """
-    shapes = cmds.listRelatives(ctrl, shapes=True) or []
-    for shape in shapes:
-        cmds.setAttr(f"{shape}.overrideEnabled", 1)
-        cmds.setAttr(f"{shape}.overrideRGBColors", 1)
-        cmds.setAttr(f"{shape}.overrideColorRGB", *color_rgb)
+    import color_scheme
+
+    color_scheme.set_override_colors([(ctrl, tuple(color_rgb))])
 
 def rename_controller_shape(ctrl):
     """重命名控制器的形状节点
@@ -172,7 +172,7 @@ def open_trans_curve_shape(self):
 
             trans_module = sys.modules[module_name]
             if hasattr(trans_module, "trans_curve_shape"):
-                trans_module.trans_curve_shape()
+                trans_module.trans_curve_shape(shared=self.shared_shape_check.isChecked())
                 print("已运行 trans_curve_shape.py 中的 trans_curve_shape 函数，替换曲线形状")
             else:
                 cmds.warning("trans_curve_shape.py 中未找到 trans_curve_shape 函数")
@@ -229,7 +229,7 @@ def reparent_shape_nodes(self):
 
             # 调用函数
             if hasattr(reparent_module, "reparent_shape_nodes"):
-                reparent_module.reparent_shape_nodes()
+                reparent_module.reparent_shape_nodes(shared=self.shared_shape_check.isChecked())
                 print("已运行 reparentShapeNodes.py 中的 reparent_shape_nodes 函数，添加形状节点")
             else:
                 cmds.warning("reparentShapeNodes.py 中未找到 reparent_shape_nodes 函数")
@@ -329,7 +329,9 @@ def apply_random_colors(self):
         """调用随机颜色功能"""
         try:
             # 使用load_module函数加载并执行随机颜色模块
-            load_module("random_colors", os.path.join(TOOL_DIR, "random_colors.py"), "assign_random_colors")
+            # 调色板模式下材质数量固定，重复着色时复用已有材质
+            load_module("random_colors", os.path.join(TOOL_DIR, "random_colors.py"), "assign_random_colors",
+                        palette=self.palette_color_check.isChecked())
         except Exception as e:
             cmds.warning(f"执行 random_colors.py 中的 assign_random_colors 函数时出错: {str(e)}")
             print(f"错误详情: {str(e)}")
@@ -374,4 +376,29 @@ def combine_selected_curves(self):
                 cmds.warning("combine_curves.py 中未找到 selected_curves_combine 函数")
         except Exception as e:
             cmds.warning(f"运行 combine_curves.py 失败: {str(e)}")
-            print(f"错误详情: {str(e)}")
\ No newline at end of file
+            print(f"错误详情: {str(e)}")
+# 骨骼生成曲线
+def open_create_curve_from_joints(self):
+        create_curve_file = os.path.join(TOOL_DIR, "create_curve_from_joints.py")
+        if not os.path.exists(create_curve_file):
+            cmds.warning(f"未找到 create_curve_from_joints.py 文件: {create_curve_file}")
+            return
+
+        try:
+            import importlib
+            module_name = "create_curve_from_joints"
+            if module_name in sys.modules:
+                importlib.reload(sys.modules[module_name])
+            else:
+                importlib.import_module(module_name)
+
+            curve_module = sys.modules[module_name]
+
+            if hasattr(curve_module, "create_curve_ui"):
+                curve_module.create_curve_ui()
+                print("已运行 create_curve_from_joints.py 中的 create_curve_ui 函数，显示骨骼曲线工具窗口")
+            else:
+                cmds.warning("create_curve_from_joints.py 中未找到 create_curve_ui 函数")
+        except Exception as e:
+            cmds.warning(f"加载 create_curve_from_joints.py 失败: {str(e)}")
+            print(f"错误详情: {str(e)}")
@@ -2,41 +2,74 @@
 import maya.cmds as cmds
 
 
+def mirror_curve(con, con_dist, axis=0):
+    """
+    将 con 的 CV 沿指定世界轴（0/1/2 对应 X/Y/Z）镜像写入 con_dist
+
+    返回:
+        bool: 控制点数量一致并完成镜像时返回 True
+    """
+    count = cmds.getAttr(con + '.controlPoints', size=True)
+    if not count == cmds.getAttr(con_dist + '.controlPoints', size=True):
+        cmds.warning(u'%s 与 %s 的CV点数量不相同.' % (con, con_dist))
+        return False
+
+    # 一次读取全部控制点的世界坐标
+    points = cmds.xform(con + '.controlPoints[*]', query=True, translation=True, worldSpace=True)
+    for i in range(count):
+        P = list(points[i * 3:i * 3 + 3])
+        P[axis] = -P[axis]
+        cmds.xform(con_dist + '.controlPoints[%s]' % i, t=P, ws=True)
+    return True
+
+
+def MirrorSymmetricCurveShapes(curves):
+    """
+    使用场景中缓存的对称映射（按位置配对）为每条曲线找到对应侧曲线并镜像，不依赖 _l_ / _r_ 命名
+    """
+    import symmetry_map
+
+    symmetry = symmetry_map.load_symmetry_map()
+    if not symmetry:
+        cmds.warning(u'场景中没有对称映射，请先构建对称映射，或选择两根曲线进行镜像.')
+        return
+    lookup = symmetry_map.mirror_lookup(symmetry)
+    axis = symmetry_map.PLANE_AXES.get(symmetry["plane"], 0)
+
+    mirrored = 0
+    for curve in curves:
+        side, partner = lookup.get(curve, (None, None))
+        if side is None or side == "center":
+            cmds.warning(u'%s 没有对称映射中的对应曲线，已跳过.' % curve)
+            continue
+        if mirror_curve(curve, partner, axis):
+            mirrored += 1
+    print(u"已按对称映射镜像 %d 条曲线形状." % mirrored)
+
+
 def MirrorCurveShape():
     """
     镜像两曲线形状：
     - 选择两个曲线，将第一个曲线的形状沿 X 轴镜像到第二个。
-    - 如果控制点数量不一致或未选择两个对象，会弹出警告。
+    - 选择一个或多于两个曲线时，按场景中缓存的对称映射镜像到各自的对应曲线。
+    - 如果控制点数量不一致或未选择对象，会弹出警告。
     - 支持全局撤销。
     """
-    # 打开撤销块
-    cmds.undoInfo(openChunk=True)
-    try:
-        # 获取选择的两个曲线对象
-        con, con_dist = cmds.ls(sl=True)
-    except ValueError:
+    selection = cmds.ls(sl=True, long=True)
+    if not selection:
         cmds.warning(u'请选择两根需要镜像的曲线.')
         return
-    finally:
-        # 如果发生异常，确保关闭撤销块
-        cmds.undoInfo(closeChunk=True)
 
-    # 打开新的撤销块以包含后续操作
+    # 打开撤销块以包含后续操作
     cmds.undoInfo(openChunk=True)
     try:
-        # 检查两曲线的控制点数量是否一致
-        if not cmds.getAttr(con + '.controlPoints', size=True) == cmds.getAttr(con_dist + '.controlPoints', size=True):
-            cmds.warning(u'所选控制器CV点的数量不相同.')
+        if len(selection) != 2:
+            MirrorSymmetricCurveShapes(selection)
             return
 
-        # 遍历控制点并进行镜像
-        for i in range(cmds.getAttr(con + '.controlPoints', size=True)):
-            # 获取源曲线控制点的位置
-            P = cmds.pointPosition(con + '.controlPoints[%s]' % i)
-            # 将目标曲线的控制点沿 X 轴镜像（X 取反，Y 和 Z 不变）
-            cmds.xform(con_dist + '.controlPoints[%s]' % i, t=(-1 * P[0], P[1], P[2]), ws=True)
-
-        print(u"曲线形状已成功沿 X 轴镜像.")
+        con, con_dist = selection
+        if mirror_curve(con, con_dist):
+            print(u"曲线形状已成功沿 X 轴镜像.")
     except Exception as e:
         cmds.warning(u"镜像曲线形状失败: %s" % str(e))
         raise  # 抛出异常以便调试
@@ -47,4 +80,4 @@ def MirrorCurveShape():
 
 # 可选：直接运行函数
 if __name__ == "__main__":
-    MirrorCurveShape()
\ No newline at end of file
+    MirrorCurveShape()
@@ -1,8 +1,13 @@
 import maya.cmds as cmds
-
-def create_controller(obj, ctrl_type, base_name):
-    # 创建控制器类型
-    if ctrl_type == 'Circle':
+import matrix_constraint
+import auto_fit
+from common_utils import create_circle_curve
+
+def create_controller(obj, ctrl_type, base_name, construction_history=False):
+    # 创建控制器类型（圆形默认由 CV 数据直接创建，不保留构建历史）
+    if ctrl_type == 'Circle' and not construction_history:
+        controller = create_circle_curve('ctrl_m_{}_001'.format(base_name), radius=1, sections=8, normal=(0, 1, 0))
+    elif ctrl_type == 'Circle':
         controller = cmds.circle(name='ctrl_m_{}_001'.format(base_name),
                                  center=(0, 0, 0), normal=(0, 1, 0), sweep=360,
                                  radius=1, degree=3, useTolerance=0, tolerance=0.01,
@@ -19,13 +24,19 @@ def create_controller(obj, ctrl_type, base_name):
         controller = cmds.curve(name='ctrl_m_{}_001'.format(base_name), degree=1,
                                 point=[(-1, 0, 1), (1, 0, 1), (1, 0, -1),
                                        (-1, 0, -1), (-1, 0, 1)])
+    elif not construction_history:
+        controller = create_circle_curve('ctrl_m_{}_001'.format(base_name), radius=1, sections=8, normal=(1, 0, 0))
     else:
         controller = cmds.circle(name='ctrl_m_{}_001'.format(base_name), normal=(1, 0, 0))[0]
     return controller
 
-def create_controller_for_selected_objects(ctrl_type):
+def create_controller_for_selected_objects(ctrl_type, use_matrix_constraint=False):
     # 获取当前选择的物体
     selected_objects = cmds.ls(selection=True)
+    # 矩阵约束模式下收集 (控制器, 偏移组)，最后批量创建
+    matrix_pairs = []
+    # 收集 (控制器, 物体)，最后一次性按物体模型适配控制器形状
+    fit_pairs = []
 
     for obj in selected_objects:
         # 获取物体名称的基本部分
@@ -51,23 +62,27 @@ def create_controller_for_selected_objects(ctrl_type):
         cmds.parent(controller, zero_ctrl_group)
         cmds.matchTransform(zero_ctrl_group, obj)
 
-        # 缩放控制器匹配物体大小
-        bbox = cmds.exactWorldBoundingBox(obj)
-        size_x = bbox[3] - bbox[0]
-        size_y = bbox[4] - bbox[1]
-        size_z = bbox[5] - bbox[2]
-        cmds.scale(size_x, size_y, size_z, controller, absolute=True)
-        cmds.makeIdentity(controller, apply=True, scale=True)
+        fit_pairs.append((controller, obj))
 
         # 约束物体偏移组
-        cmds.parentConstraint(controller, offset_group, maintainOffset=True)
-        cmds.scaleConstraint(controller, offset_group, maintainOffset=True)
+        if use_matrix_constraint:
+            matrix_pairs.append((controller, offset_group))
+        else:
+            cmds.parentConstraint(controller, offset_group, maintainOffset=True)
+            cmds.scaleConstraint(controller, offset_group, maintainOffset=True)
 
         # 创建rig组
         rig_group = cmds.group(empty=True, name='grp_rig_{}_001'.format(base_name))
         cmds.parent(zero_group, rig_group)
         cmds.parent(zero_ctrl_group, rig_group)
 
+    # 按物体模型的主方向包围盒适配控制器形状（替代逐个世界包围盒缩放与冻结）
+    auto_fit.fit_controllers(fit_pairs)
+
+    # 层级全部建立完成后再批量创建矩阵约束，保证烘焙的偏移基于最终层级
+    if matrix_pairs:
+        matrix_constraint.create_matrix_constraints(matrix_pairs, maintain_offset=True)
+
 def create_ui():
     if cmds.window("controllerUI", exists=True):
         cmds.deleteUI("controllerUI")
@@ -81,9 +96,12 @@ def create_ui():
     for ctrl_type in controller_types:
         cmds.menuItem(label=ctrl_type)
 
+    matrix_check = cmds.checkBox(label='Matrix Constraint', value=False)
+
     def on_create_pressed(*args):
         selected_ctrl_type = cmds.optionMenu(ctrl_type_menu, query=True, value=True)
-        create_controller_for_selected_objects(selected_ctrl_type)
+        use_matrix = cmds.checkBox(matrix_check, query=True, value=True)
+        create_controller_for_selected_objects(selected_ctrl_type, use_matrix_constraint=use_matrix)
 
     cmds.button(label='Create Controller', command=on_create_pressed)
     cmds.button(label='Close', command=('cmds.deleteUI(\"' + window + '\", window=True)'))
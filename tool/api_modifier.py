@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+"""
+可撤销的 API 修改器执行工具
+om2 的 MDGModifier / MDagModifier 直接调用 doIt() 不会进入 Maya 的撤销队列，
+本文件同时是一个极小的命令插件：通过 ckApplyModifier 命令执行修改器，使批量操作可以撤销与重做。
+
+作者: CK Tool
+"""
+
+import os
+import sys
+
+import maya.cmds as cmds
+import maya.api.OpenMaya as om2
+
+COMMAND_NAME = "ckApplyModifier"
+MODULE_NAME = "api_modifier"
+
+# 等待 ckApplyModifier 命令取走的修改器
+_pending = []
+
+
+def maya_useNewAPI():
+    """声明插件使用 Python API 2.0"""
+    pass
+
+
+def _queue():
+    """插件加载时可能以同名模块重新执行本文件，统一通过 sys.modules 访问等待队列"""
+    module = sys.modules.get(MODULE_NAME) or sys.modules[__name__]
+    return module._pending
+
+
+class ApplyModifierCommand(om2.MPxCommand):
+    """执行队列中的修改器，并在撤销/重做时调用其 undoIt/doIt"""
+
+    def __init__(self):
+        om2.MPxCommand.__init__(self)
+        self.modifier = None
+
+    @staticmethod
+    def creator():
+        return ApplyModifierCommand()
+
+    def doIt(self, args):
+        self.modifier = _queue().pop(0)
+        self.modifier.doIt()
+
+    def redoIt(self):
+        self.modifier.doIt()
+
+    def undoIt(self):
+        self.modifier.undoIt()
+
+    def isUndoable(self):
+        return True
+
+
+def initializePlugin(plugin):
+    om2.MFnPlugin(plugin, "CK Tool").registerCommand(COMMAND_NAME, ApplyModifierCommand.creator)
+
+
+def uninitializePlugin(plugin):
+    om2.MFnPlugin(plugin).deregisterCommand(COMMAND_NAME)
+
+
+def _ensure_plugin():
+    """加载本文件作为插件，失败时返回 False"""
+    path = os.path.splitext(os.path.abspath(__file__))[0] + ".py"
+    try:
+        if not cmds.pluginInfo(path, query=True, loaded=True):
+            cmds.loadPlugin(path, quiet=True)
+        return True
+    except RuntimeError as e:
+        cmds.warning(f"无法加载撤销插件，修改器将直接执行且不可撤销: {str(e)}")
+        print(f"错误详情: {str(e)}")
+        return False
+
+
+def execute(modifier):
+    """
+    执行 MDGModifier / MDagModifier，插件可用时通过命令执行以支持撤销
+
+    参数:
+        modifier (om2.MDGModifier): 已记录好全部操作的修改器
+
+    返回:
+        om2.MDGModifier: 已执行的修改器
+    """
+    if not _ensure_plugin():
+        modifier.doIt()
+        return modifier
+    _queue().append(modifier)
+    try:
+        getattr(cmds, COMMAND_NAME)()
+    finally:
+        if modifier in _queue():
+            _queue().remove(modifier)
+    return modifier
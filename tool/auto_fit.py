@@ -0,0 +1,253 @@
+# -*- coding: utf-8 -*-
+"""
+控制器自动适配大小工具
+为每个目标骨骼或物体读取相关的模型顶点（骨骼读取蒙皮权重足够大的顶点，物体读取自身模型），
+所有蒙皮权重与模型顶点在一次遍历中批量读取，计算主成分（PCA）朝向的包围盒，
+再将控制器的 CV 缩放并旋转到包围盒，全部 CV 写入在同一个修改器中执行（可撤销）。
+
+作者: CK Tool
+"""
+
+import math
+
+import maya.cmds as cmds
+import maya.api.OpenMaya as om2
+import maya.api.OpenMayaAnim as oma2
+
+import api_modifier
+from common_utils import get_dag_paths
+
+WEIGHT_THRESHOLD = 0.2
+MARGIN = 1.1
+# 包围盒最薄方向不小于最长方向的比例，避免平面顶点生成零厚度的控制器
+MIN_THICKNESS = 0.05
+
+
+def _symmetric_eigen(matrix, sweeps=50):
+    """
+    Jacobi 迭代求 3x3 对称矩阵的特征值与特征向量
+
+    返回:
+        list: 按特征值从大到小排列的 (特征值, (x, y, z) 单位特征向量)
+    """
+    a = [list(row) for row in matrix]
+    v = [[1.0, 0.0, 0.0], [0.0, 1.0, 0.0], [0.0, 0.0, 1.0]]
+    for _ in range(sweeps):
+        if abs(a[0][1]) + abs(a[0][2]) + abs(a[1][2]) < 1e-12:
+            break
+        for p, q in ((0, 1), (0, 2), (1, 2)):
+            if abs(a[p][q]) < 1e-15:
+                continue
+            theta = (a[q][q] - a[p][p]) / (2.0 * a[p][q])
+            t = (1.0 if theta >= 0 else -1.0) / (abs(theta) + math.sqrt(theta * theta + 1.0))
+            c = 1.0 / math.sqrt(t * t + 1.0)
+            s = t * c
+            # A' = J^T A J，V' = V J
+            for k in range(3):
+                akp, akq = a[k][p], a[k][q]
+                a[k][p], a[k][q] = c * akp - s * akq, s * akp + c * akq
+            for k in range(3):
+                apk, aqk = a[p][k], a[q][k]
+                a[p][k], a[q][k] = c * apk - s * aqk, s * apk + c * aqk
+            for k in range(3):
+                vkp, vkq = v[k][p], v[k][q]
+                v[k][p], v[k][q] = c * vkp - s * vkq, s * vkp + c * vkq
+    pairs = [(a[i][i], (v[0][i], v[1][i], v[2][i])) for i in range(3)]
+    pairs.sort(key=lambda pair: -pair[0])
+    return pairs
+
+
+def compute_fit(points):
+    """
+    计算点集的 PCA 朝向包围盒
+
+    参数:
+        points (list): 世界坐标 (x, y, z) 列表
+
+    返回:
+        tuple: (中心 (x, y, z), 三个单位轴向量, 三个半长)，点集无效时返回 None
+    """
+    count = len(points)
+    if count < 2:
+        return None
+    mean = [sum(p[i] for p in points) / count for i in range(3)]
+    covariance = [[0.0] * 3 for _ in range(3)]
+    for p in points:
+        d = (p[0] - mean[0], p[1] - mean[1], p[2] - mean[2])
+        for i in range(3):
+            for j in range(i, 3):
+                covariance[i][j] += d[i] * d[j]
+    for i in range(3):
+        for j in range(i):
+            covariance[i][j] = covariance[j][i]
+
+    axes = [vector for _, vector in _symmetric_eigen(covariance)]
+    center = list(mean)
+    half_extents = []
+    for axis in axes:
+        projections = [(p[0] - mean[0]) * axis[0] + (p[1] - mean[1]) * axis[1] + (p[2] - mean[2]) * axis[2]
+                       for p in points]
+        low, high = min(projections), max(projections)
+        middle = (low + high) * 0.5
+        for i in range(3):
+            center[i] += axis[i] * middle
+        half_extents.append((high - low) * 0.5)
+
+    largest = max(half_extents)
+    if largest < 1e-6:
+        return None
+    half_extents = [max(half, largest * MIN_THICKNESS) for half in half_extents]
+    return tuple(center), axes, half_extents
+
+
+def _mesh_points(path, cache):
+    """读取模型世界空间顶点，按完整路径缓存"""
+    key = path.fullPathName()
+    if key not in cache:
+        cache[key] = [(p.x, p.y, p.z) for p in om2.MFnMesh(path).getPoints(om2.MSpace.kWorld)]
+    return cache[key]
+
+
+def collect_target_points(targets, weight_threshold=WEIGHT_THRESHOLD):
+    """
+    批量收集目标的相关顶点
+
+    骨骼：场景中所有蒙皮里该骨骼权重不小于 weight_threshold 的顶点（每个蒙皮只读取一次权重）；
+    其他物体：自身及子级的模型顶点，没有模型时使用世界包围盒的 8 个角点。
+
+    返回:
+        list: 与 targets 顺序一致的顶点列表
+    """
+    full_paths = [path.fullPathName() for path in get_dag_paths(targets)]
+    points = {full: [] for full in full_paths}
+    joints = set(full for full in full_paths if cmds.nodeType(full) == "joint")
+    mesh_cache = {}
+
+    skin_list = om2.MSelectionList()
+    for skin in cmds.ls(type="skinCluster") or []:
+        skin_list.add(skin)
+    if joints:
+        for index in range(skin_list.length()):
+            skin_fn = oma2.MFnSkinCluster(skin_list.getDependNode(index))
+            needed = [(i, path.fullPathName()) for i, path in enumerate(skin_fn.influenceObjects())
+                      if path.fullPathName() in joints]
+            if not needed:
+                continue
+            influence_indices = om2.MIntArray([i for i, _ in needed])
+            for connection in range(skin_fn.numOutputConnections()):
+                geometry = skin_fn.getPathAtIndex(skin_fn.indexForOutputConnection(connection))
+                if not geometry.hasFn(om2.MFn.kMesh):
+                    continue
+                mesh_points = _mesh_points(geometry, mesh_cache)
+                component_fn = om2.MFnSingleIndexedComponent()
+                component = component_fn.create(om2.MFn.kMeshVertComponent)
+                component_fn.setCompleteData(len(mesh_points))
+                weights = list(skin_fn.getWeights(geometry, component, influence_indices))
+                stride = len(needed)
+                for column, (_, joint) in enumerate(needed):
+                    points[joint].extend(point for point, weight in zip(mesh_points, weights[column::stride])
+                                         if weight >= weight_threshold)
+
+    for full in full_paths:
+        if full in joints or points[full]:
+            continue
+        meshes = cmds.listRelatives(full, allDescendents=True, type="mesh", fullPath=True) or []
+        if cmds.nodeType(full) == "mesh":
+            meshes.append(full)
+        meshes = cmds.ls(meshes, noIntermediate=True, long=True) if meshes else []
+        for path in get_dag_paths(meshes):
+            points[full].extend(_mesh_points(path, mesh_cache))
+        if not points[full]:
+            bbox = cmds.exactWorldBoundingBox(full)
+            points[full] = [(x, y, z) for x in (bbox[0], bbox[3]) for y in (bbox[1], bbox[4]) for z in (bbox[2], bbox[5])]
+    return [points[full] for full in full_paths]
+
+
+def _fit_shapes(modifier, ctrl_path, fit, scale):
+    """将控制器全部曲线形状的 CV 映射到包围盒，写入修改器，返回是否写入"""
+    shapes = []
+    for i in range(ctrl_path.numberOfShapesDirectlyBelow()):
+        shape = om2.MDagPath(ctrl_path)
+        shape.extendToShapeDirectlyBelow(i)
+        shape_fn = om2.MFnDagNode(shape)
+        if shape.apiType() != om2.MFn.kNurbsCurve or shape_fn.isIntermediateObject:
+            continue
+        if shape_fn.isInstanced(False):
+            cmds.warning(f"'{shape.fullPathName()}' 为共享形状，自动适配已跳过（请先取消共享）")
+            continue
+        shapes.append((shape, om2.MFnNurbsCurve(shape).cvPositions(om2.MSpace.kObject)))
+    if not shapes:
+        return False
+
+    # 控制器当前形状的物体空间包围盒
+    all_cvs = [cv for _, cvs in shapes for cv in cvs]
+    low = [min(cv[i] for cv in all_cvs) for i in range(3)]
+    high = [max(cv[i] for cv in all_cvs) for i in range(3)]
+    shape_center = [(low[i] + high[i]) * 0.5 for i in range(3)]
+    shape_half = [(high[i] - low[i]) * 0.5 for i in range(3)]
+
+    # 将 PCA 轴分配给朝向最接近的控制器局部轴（并统一方向），保留控制器原有朝向
+    center, axes, half_extents = fit
+    world = ctrl_path.inclusiveMatrix()
+    local_axes = [om2.MVector(world[i * 4], world[i * 4 + 1], world[i * 4 + 2]).normal() for i in range(3)]
+    candidates = sorted(((abs(local_axes[k] * om2.MVector(*axes[j])), k, j) for k in range(3) for j in range(3)),
+                        reverse=True)
+    assigned = {}
+    used = set()
+    for _, k, j in candidates:
+        if k in assigned or j in used:
+            continue
+        axis = om2.MVector(*axes[j])
+        if local_axes[k] * axis < 0:
+            axis = -axis
+        assigned[k] = axis * (half_extents[j] * scale)
+        used.add(j)
+
+    inverse = ctrl_path.inclusiveMatrixInverse()
+    origin = om2.MVector(*center)
+    for shape, cvs in shapes:
+        points_plug = om2.MFnDependencyNode(shape.node()).findPlug("controlPoints", False)
+        for index, cv in enumerate(cvs):
+            position = om2.MVector(origin)
+            for k in range(3):
+                if shape_half[k] > 1e-6:
+                    position += assigned[k] * ((cv[k] - shape_center[k]) / shape_half[k])
+            local = om2.MPoint(position) * inverse
+            element = points_plug.elementByLogicalIndex(index)
+            for child, value in enumerate((local.x, local.y, local.z)):
+                modifier.newPlugValueDouble(element.child(child), value)
+    return True
+
+
+def fit_controllers(pairs, scales=None, weight_threshold=WEIGHT_THRESHOLD, margin=MARGIN):
+    """
+    按目标的模型顶点批量适配控制器形状
+
+    参数:
+        pairs (list): (控制器, 目标骨骼或物体) 列表，控制器应已匹配到目标
+        scales (list): 与 pairs 对应的额外缩放（例如子控制器的 0.9），默认全部为 1
+        weight_threshold (float): 骨骼目标读取顶点的最小蒙皮权重
+        margin (float): 包围盒外扩比例
+
+    返回:
+        int: 成功适配的控制器数量
+    """
+    if not pairs:
+        return 0
+    scales = scales or [1.0] * len(pairs)
+    target_points = collect_target_points([target for _, target in pairs], weight_threshold)
+    ctrl_paths = get_dag_paths([ctrl for ctrl, _ in pairs])
+
+    modifier = om2.MDGModifier()
+    fitted = 0
+    for (ctrl, target), ctrl_path, points, scale in zip(pairs, ctrl_paths, target_points, scales):
+        fit = compute_fit(points)
+        if fit is None:
+            print(f"自动适配: '{target}' 没有可用的模型顶点，保留 '{ctrl}' 原有大小")
+            continue
+        if _fit_shapes(modifier, ctrl_path, fit, scale * margin):
+            fitted += 1
+
+    if fitted:
+        api_modifier.execute(modifier)
+    return fitted
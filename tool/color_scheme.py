@@ -0,0 +1,307 @@
+# -*- coding: utf-8 -*-
+"""
+规则配色引擎
+按顺序匹配的规则（侧面标记、名称正则、Tag、控制器层级深度、主/子控制器）为控制器指定颜色索引或 RGB，
+第一条全部条件都满足的规则生效。
+一次收集场景中全部曲线控制器并分类（正则预先编译，每个 Tag 通过 Tag 索引只解析一次），
+从内存中读取当前的覆盖颜色，只把不同的值写入同一个修改器一次执行（可撤销），重新配色整个绑定无需逐个 setAttr。
+
+规则示例（JSON 文件可以是规则列表，也可以是 {"rules": [...]}）:
+    [
+        {"tag": "face", "color": [1.0, 0.5, 0.0]},
+        {"pattern": "^ctrl_m_(root|cog)", "color": 22},
+        {"side": "l", "sub": true, "color": 18},
+        {"depth": [0, 0], "color": 17},
+        {"side": "l", "color": 6}
+    ]
+
+作者: CK Tool
+"""
+
+import re
+
+import maya.cmds as cmds
+import maya.api.OpenMaya as om2
+
+import api_modifier
+from common_utils import get_dag_paths
+
+# 名称中的侧面标记（如 ctrl_l_arm、l_arm、arm_R），c 视为中线
+SIDE_PATTERN = re.compile(r"(?:^|_)([lrmc])(?:_|$)", re.IGNORECASE)
+SIDE_ALIASES = {"l": "l", "r": "r", "m": "m", "c": "m", "left": "l", "right": "r", "center": "m"}
+# 子控制器命名：创建组件为 ctrlSub，FK 层级为 ctrl_sub
+SUB_PATTERN = re.compile(r"(?:Sub|_sub)(?:_\d+)?$")
+# 按侧面的颜色索引（左 6 蓝 / 右 13 红 / 中 17 黄）
+SIDE_COLOR_INDEX = {"l": 6, "r": 13, "m": 17}
+RULE_KEYS = ("side", "pattern", "tag", "depth", "sub", "color")
+
+DEFAULT_RULES = [
+    {"side": "l", "sub": True, "color": 18},
+    {"side": "r", "sub": True, "color": 20},
+    {"side": "m", "sub": True, "color": 22},
+    {"side": "l", "color": 6},
+    {"side": "r", "color": 13},
+    {"side": "m", "color": 17},
+]
+
+
+def side_from_name(name):
+    """从节点短名称中的侧面标记得到 "l" / "r" / "m"，没有标记时返回 None"""
+    match = SIDE_PATTERN.search(name.split("|")[-1])
+    return SIDE_ALIASES[match.group(1).lower()] if match else None
+
+
+def is_sub_controller(name):
+    """是否为子控制器（按命名判定）"""
+    return bool(SUB_PATTERN.search(name.split("|")[-1]))
+
+
+def load_rules(path):
+    """读取 JSON / YAML 规则文件（与控制器规格使用相同的读取方式）"""
+    import rig_spec
+
+    data = rig_spec.load_spec(path)
+    rules = data.get("rules") if isinstance(data, dict) else data
+    errors = validate_rules(rules)
+    if errors:
+        raise ValueError("；".join(errors))
+    return rules
+
+
+def validate_rules(rules):
+    """
+    校验规则列表
+
+    返回:
+        list: 错误信息，为空表示通过
+    """
+    if not isinstance(rules, list):
+        return ["规则必须是列表"]
+    errors = []
+    for number, rule in enumerate(rules, 1):
+        label = f"第 {number} 条规则"
+        if not isinstance(rule, dict):
+            errors.append(f"{label}: 必须是对象")
+            continue
+        unknown = [key for key in rule if key not in RULE_KEYS]
+        if unknown:
+            errors.append(f"{label}: 未知字段 {', '.join(unknown)}")
+        color = rule.get("color")
+        if not (isinstance(color, int) and 0 <= color <= 31
+                or isinstance(color, (list, tuple)) and len(color) == 3):
+            errors.append(f"{label}: color 必须是 0-31 的颜色索引或 [r, g, b]")
+        if "side" in rule and str(rule["side"]).lower() not in SIDE_ALIASES:
+            errors.append(f"{label}: 无效的侧面 '{rule['side']}'")
+        if "pattern" in rule:
+            try:
+                re.compile(rule["pattern"])
+            except re.error as e:
+                errors.append(f"{label}: 无效的正则表达式 ({e})")
+        depth = rule.get("depth")
+        if depth is not None and not (isinstance(depth, int)
+                                      or isinstance(depth, (list, tuple)) and len(depth) == 2):
+            errors.append(f"{label}: depth 必须是整数或 [最小, 最大]")
+    return errors
+
+
+def compile_rules(rules):
+    """预编译规则：正则编译一次，每个 Tag 通过 Tag 索引解析为节点集合一次"""
+    import tag_index
+
+    index = tag_index.get_index()
+    tag_sets = {}
+    compiled = []
+    for rule in rules:
+        entry = {"color": rule["color"] if isinstance(rule["color"], int) else tuple(rule["color"])}
+        if "side" in rule:
+            entry["side"] = SIDE_ALIASES[str(rule["side"]).lower()]
+        if "pattern" in rule:
+            entry["pattern"] = re.compile(rule["pattern"])
+        if "tag" in rule:
+            if rule["tag"] not in tag_sets:
+                tag_sets[rule["tag"]] = set(index.nodes(rule["tag"]))
+            entry["tag"] = tag_sets[rule["tag"]]
+        if "depth" in rule:
+            depth = rule["depth"]
+            entry["depth"] = (depth, depth) if isinstance(depth, int) else tuple(depth)
+        if "sub" in rule:
+            entry["sub"] = bool(rule["sub"])
+        compiled.append(entry)
+    return compiled
+
+
+def scene_controllers():
+    """场景中全部曲线控制器（带非中间曲线形状的变换节点）的完整路径"""
+    curves = cmds.ls(type="nurbsCurve", long=True, noIntermediate=True) or []
+    if not curves:
+        return []
+    return list(dict.fromkeys(cmds.listRelatives(curves, parent=True, fullPath=True) or []))
+
+
+def classify(controllers, symmetry_lookup=None, controller_set=None):
+    """
+    一次分类全部控制器
+
+    参数:
+        controllers (list): 控制器完整路径
+        symmetry_lookup (dict): 对称映射（名称中没有侧面标记时用于确定侧面）
+        controller_set (set): 计算层级深度时使用的全部控制器，默认为 controllers
+
+    返回:
+        list: [{"node", "name", "side", "depth", "sub"}]，depth 为祖先中控制器的数量
+    """
+    controller_set = controller_set if controller_set is not None else set(controllers)
+    infos = []
+    for node in controllers:
+        parts = node.split("|")
+        name = parts[-1]
+        side = side_from_name(name)
+        if side is None and symmetry_lookup and node in symmetry_lookup:
+            side = SIDE_ALIASES[symmetry_lookup[node][0]]
+        depth = sum(1 for i in range(2, len(parts)) if "|".join(parts[:i]) in controller_set)
+        infos.append({"node": node, "name": name, "side": side, "depth": depth, "sub": is_sub_controller(name)})
+    return infos
+
+
+def _matches(rule, info):
+    if "side" in rule and rule["side"] != info["side"]:
+        return False
+    if "sub" in rule and rule["sub"] != info["sub"]:
+        return False
+    if "depth" in rule and not rule["depth"][0] <= info["depth"] <= rule["depth"][1]:
+        return False
+    if "tag" in rule and info["node"] not in rule["tag"]:
+        return False
+    if "pattern" in rule and not rule["pattern"].search(info["name"]):
+        return False
+    return True
+
+
+def resolve_colors(rules, controllers, symmetry_lookup=None, controller_set=None):
+    """
+    按规则为控制器确定颜色（参数同 classify）
+
+    返回:
+        tuple: ([(控制器, 颜色)], [未匹配任何规则的控制器])
+    """
+    compiled = compile_rules(rules)
+    assignments = []
+    unmatched = []
+    for info in classify(controllers, symmetry_lookup, controller_set):
+        for rule in compiled:
+            if _matches(rule, info):
+                assignments.append((info["node"], rule["color"]))
+                break
+        else:
+            unmatched.append(info["node"])
+    return assignments, unmatched
+
+
+def _override_targets(path, use_shapes):
+    """返回需要写入覆盖颜色的节点：变换节点下的全部非中间形状，或变换节点本身"""
+    if not use_shapes:
+        return [path.node()]
+    targets = []
+    for index in range(path.numberOfShapesDirectlyBelow()):
+        shape = om2.MDagPath(path)
+        shape.extendToShapeDirectlyBelow(index)
+        if not om2.MFnDagNode(shape).isIntermediateObject:
+            targets.append(shape.node())
+    return targets
+
+
+def set_override_colors(assignments, use_shapes=True):
+    """
+    批量设置覆盖颜色：只写入与当前值不同的属性，全部写入放在一个修改器中一次执行（可撤销）
+
+    参数:
+        assignments (list): [(节点, 颜色)]，颜色为索引 (int) 或 (r, g, b)
+        use_shapes (bool): True 时写入节点下的全部形状，否则写入节点本身
+
+    返回:
+        int: 颜色发生变化的节点（形状）数量
+    """
+    if not assignments:
+        return 0
+    modifier = om2.MDGModifier()
+    changed = 0
+    nodes = [node for node, _ in assignments]
+    for path, (_, color) in zip(get_dag_paths(nodes), assignments):
+        for obj in _override_targets(path, use_shapes):
+            node_fn = om2.MFnDependencyNode(obj)
+            writes = 0
+            use_rgb = not isinstance(color, int)
+            for attr, value in (("overrideEnabled", True), ("overrideRGBColors", use_rgb)):
+                plug = node_fn.findPlug(attr, False)
+                if plug.asBool() != value:
+                    modifier.newPlugValueBool(plug, value)
+                    writes += 1
+            if use_rgb:
+                rgb_plug = node_fn.findPlug("overrideColorRGB", False)
+                for channel in range(3):
+                    plug = rgb_plug.child(channel)
+                    if abs(plug.asFloat() - color[channel]) > 1e-4:
+                        modifier.newPlugValueFloat(plug, color[channel])
+                        writes += 1
+            else:
+                plug = node_fn.findPlug("overrideColor", False)
+                if plug.asInt() != color:
+                    modifier.newPlugValueInt(plug, color)
+                    writes += 1
+            changed += bool(writes)
+    if changed:
+        api_modifier.execute(modifier)
+    return changed
+
+
+def clear_override_colors(nodes, use_shapes=True):
+    """
+    批量关闭覆盖颜色：只写入当前已启用的 overrideEnabled，全部写入放在一个修改器中一次执行（可撤销）
+
+    参数:
+        nodes (list): 节点列表
+        use_shapes (bool): True 时写入节点下的全部形状，否则写入节点本身
+
+    返回:
+        int: 关闭了覆盖颜色的节点（形状）数量
+    """
+    if not nodes:
+        return 0
+    modifier = om2.MDGModifier()
+    changed = 0
+    for path in get_dag_paths(nodes):
+        for obj in _override_targets(path, use_shapes):
+            plug = om2.MFnDependencyNode(obj).findPlug("overrideEnabled", False)
+            if plug.asBool():
+                modifier.newPlugValueBool(plug, False)
+                changed += 1
+    if changed:
+        api_modifier.execute(modifier)
+    return changed
+
+
+def apply_color_scheme(rules=None, nodes=None):
+    """
+    按规则为控制器重新配色
+
+    参数:
+        rules (list): 规则列表，默认为 DEFAULT_RULES
+        nodes (list): 只处理这些节点及其子级中的控制器，默认为整个场景（层级深度始终按场景中全部控制器计算）
+
+    返回:
+        dict: {"colored": 匹配规则的控制器数, "changed": 实际改变颜色的形状数, "unmatched": [未匹配的控制器]}
+    """
+    import symmetry_map
+
+    controllers = scene_controllers()
+    targets = controllers
+    if nodes:
+        scope = set(cmds.ls(nodes, long=True) or [])
+        if scope:
+            scope.update(cmds.listRelatives(list(scope), allDescendents=True, type="transform",
+                                            fullPath=True) or [])
+        targets = [node for node in controllers if node in scope]
+
+    assignments, unmatched = resolve_colors(rules or DEFAULT_RULES, targets, symmetry_map.mirror_lookup(),
+                                            set(controllers))
+    return {"colored": len(assignments), "changed": set_override_colors(assignments), "unmatched": unmatched}
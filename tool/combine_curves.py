@@ -1,4 +1,8 @@
 import maya.cmds as cmds
+import maya.api.OpenMaya as om2
+import reparent_planner
+import api_modifier
+from common_utils import get_dag_paths
 import logging
 import sys
 
@@ -27,10 +31,58 @@ def freeze_channels(obj_list):
         logger.warning(f"Failed to freeze transforms. Issue: {str(e)}")
 
 
+def bake_world_transforms(shapes):
+    """
+    Writes each curve shape's world-space CVs straight into its curve data, so the shape keeps its
+    position once it is moved under an identity transform. Replaces freezing every source transform.
+    Construction history feeding a shape is disconnected (its current result is kept).
+    All edits are recorded in one modifier and executed once (undoable).
+
+    Args:
+        shapes (list): Full paths of the nurbsCurve / bezierCurve shapes to bake.
+    """
+    if not shapes:
+        return
+    modifier = om2.MDGModifier()
+    for path in get_dag_paths(shapes):
+        curve_fn = om2.MFnNurbsCurve(path)
+        data = om2.MFnNurbsCurveData().create()
+        om2.MFnNurbsCurve().create(curve_fn.cvPositions(om2.MSpace.kWorld), curve_fn.knots(), curve_fn.degree,
+                                   curve_fn.form, False, True, data)
+        shape_fn = om2.MFnDependencyNode(path.node())
+        create_plug = shape_fn.findPlug("create", False)
+        if create_plug.isDestination:
+            modifier.disconnect(create_plug.source(), create_plug)
+        modifier.newPlugValue(shape_fn.findPlug("cached", False), data)
+    api_modifier.execute(modifier)
+
+
+def delete_empty_transforms(transforms):
+    """
+    Deletes the transforms that no longer have children, using one children query and one delete call.
+
+    Args:
+        transforms (list): Full paths of the transforms to check.
+    Returns:
+        list: The deleted transforms.
+    """
+    transforms = [transform for transform in transforms if cmds.objExists(transform)]
+    if not transforms:
+        return []
+    children = cmds.listRelatives(transforms, children=True, fullPath=True) or []
+    occupied = set(child.rsplit("|", 1)[0] for child in children)
+    empty = [transform for transform in transforms if transform not in occupied]
+    if empty:
+        cmds.delete(empty)
+    return empty
+
+
 def combine_curves_list(curve_list, convert_bezier_to_nurbs=True):
     """
     Moves the shape objects of all elements in the provided input (curve_list) to a single group
-    (essentially combining them under one transform)
+    (essentially combining them under one transform).
+    World transforms are baked into the CVs in one modifier instead of freezing each source, then all shapes are
+    moved in one reparent pass and the emptied transforms are deleted in one call.
 
     Args:
         curve_list (list): A list of strings with the name of the curves to be combined.
@@ -41,48 +93,38 @@ def combine_curves_list(curve_list, convert_bezier_to_nurbs=True):
     function_name = "Combine Curves List"
     try:
         cmds.undoInfo(openChunk=True, chunkName=function_name)
-        nurbs_shapes = []
-        bezier_shapes = []
-        valid_curve_transforms = set()
-
-        for crv in curve_list:
-            shapes = cmds.listRelatives(crv, shapes=True, fullPath=True) or []
-            for shape in shapes:
-                if cmds.objectType(shape) == CURVE_TYPE_BEZIER:
-                    bezier_shapes.append(shape)
-                    valid_curve_transforms.add(crv)
-                if cmds.objectType(shape) == CURVE_TYPE_NURBS:
-                    nurbs_shapes.append(shape)
-                    valid_curve_transforms.add(crv)
-
-        if not nurbs_shapes and not bezier_shapes:  # No valid shapes
+        name = curve_list[0].split("|")[-1] if curve_list else None
+        transforms = cmds.ls(curve_list, long=True, type="transform") if curve_list else []
+        # One query for all curve shapes directly under the provided transforms
+        shapes = (cmds.listRelatives(transforms, shapes=True, fullPath=True, noIntermediate=True,
+                                     type=CURVE_TYPES) or []) if transforms else []
+        bezier_shapes = cmds.ls(shapes, type=CURVE_TYPE_BEZIER, long=True) if shapes else []
+        valid_curve_transforms = list(dict.fromkeys(shape.rsplit("|", 1)[0] for shape in shapes))
+
+        if not shapes:  # No valid shapes
             logger.warning(f"Unable to combine curves. No valid shapes were found under the provided objects.")
             return
 
         if len(curve_list) == 1:  # Only one curve in provided list
             return curve_list[0]
 
-        if len(bezier_shapes) > 0 and convert_bezier_to_nurbs:
-            for bezier in bezier_shapes:
-                logger.debug(str(bezier))
-                cmds.select(bezier)
-                cmds.bezierCurveToNurbs()
-
-        freeze_channels(list(valid_curve_transforms))
-        # Re-parent Shapes
-        shapes = nurbs_shapes + bezier_shapes
-        group = cmds.group(empty=True, world=True, name=curve_list[0])
-        cmds.refresh()  # Without a refresh, Maya ignores the freeze operation
-        for shape in shapes:
+        if bezier_shapes and convert_bezier_to_nurbs:
+            # Convert all bezier curves in a single call, then query the resulting shapes again
+            cmds.select(bezier_shapes, replace=True)
+            cmds.bezierCurveToNurbs()
             cmds.select(clear=True)
-            cmds.parent(shape, group, relative=True, shape=True)
+            shapes = cmds.listRelatives(valid_curve_transforms, shapes=True, fullPath=True, noIntermediate=True,
+                                        type=CURVE_TYPES) or []
+
+        # Bake world transforms into the CVs (no per-transform freeze, no viewport refresh)
+        bake_world_transforms(shapes)
+        # Re-parent all shapes in one pass
+        group = cmds.group(empty=True, world=True, name=name)
+        reparent_planner.reparent_nodes([(shape, group, False) for shape in shapes])
         # Delete empty transforms
-        for transform in valid_curve_transforms:
-            children = cmds.listRelatives(transform, children=True) or []
-            if not children and cmds.objExists(transform):
-                cmds.delete(transform)
+        delete_empty_transforms(valid_curve_transforms)
         # Clean-up
-        combined_curve = cmds.rename(group, curve_list[0])
+        combined_curve = cmds.rename(group, name)
         if cmds.objExists(combined_curve):
             cmds.select(combined_curve)
         return combined_curve
@@ -146,10 +188,7 @@ def selected_curves_combine(convert_bezier_to_nurbs=False, show_bezier_conversio
             )
             convert_bezier_to_nurbs = True if user_input == "Yes" else False
 
-        # Freeze Curves
-        freeze_channels(list(valid_curve_transforms))
-
-        # Combine
+        # Combine (world transforms are baked into the CVs, no freeze needed)
         combined_crv = combine_curves_list(selection, convert_bezier_to_nurbs=convert_bezier_to_nurbs)
         sys.stdout.write(f'\nSelected curves were combined into: "{combined_crv}".')
         cmds.select(combined_crv)
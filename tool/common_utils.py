@@ -1,6 +1,7 @@
 # -*- coding: utf-8 -*-
 import os
 import sys
+import math
 import importlib
 import importlib.util
 from maya import cmds
@@ -43,4 +44,234 @@ def reload_module(module_name, module_path=None):
     except Exception as e:
         cmds.warning(f"加载模块 {module_name} 失败: {str(e)}")
         print(f"错误详情: {str(e)}")
-        raise
\ No newline at end of file
+        raise
+
+def get_dag_paths(nodes):
+    """
+    一次性将节点名称列表解析为 MDagPath 列表
+
+    参数:
+        nodes (list): 节点名称列表
+
+    返回:
+        list: 与输入顺序一致的 maya.api.OpenMaya.MDagPath 列表
+    """
+    import maya.api.OpenMaya as om2
+
+    # MSelectionList 会合并重复项，因此逐个解析并缓存，保证与输入顺序一一对应
+    cache = {}
+    paths = []
+    for node in nodes:
+        if node not in cache:
+            sel = om2.MSelectionList()
+            sel.add(node)
+            cache[node] = sel.getDagPath(0)
+        paths.append(cache[node])
+    return paths
+
+
+def get_world_matrices(nodes):
+    """
+    批量读取节点的世界矩阵（一次解析，无逐个 xform 查询）
+
+    参数:
+        nodes (list): 节点名称列表
+
+    返回:
+        list: 与输入顺序一致的 maya.api.OpenMaya.MMatrix 列表
+    """
+    return [path.inclusiveMatrix() for path in get_dag_paths(nodes)]
+
+
+def matrix_to_list(matrix):
+    """将 MMatrix 转换为 setAttr(type="matrix") 可用的 16 个浮点数"""
+    return [matrix[i] for i in range(16)]
+
+
+def get_joint_hierarchy(root_joints):
+    """
+    一次查询预取根骨骼及其全部子骨骼，构建内存中的骨骼树
+
+    参数:
+        root_joints (list): 根骨骼名称列表
+
+    返回:
+        tuple: (joints, parent_indices)
+            joints 为按深度优先顺序排列的骨骼完整路径（父级总在子级之前），
+            parent_indices 为每个骨骼的父骨骼在 joints 中的索引，根骨骼为 -1；
+            骨骼与父骨骼之间隔着非骨骼变换节点（如组）时，父骨骼为最近的骨骼祖先
+    """
+    roots = cmds.ls(root_joints, type="joint", long=True) or []
+    if not roots:
+        return [], []
+
+    # 单次 listRelatives 获取所有后代骨骼
+    descendants = cmds.listRelatives(roots, allDescendents=True, type="joint", fullPath=True) or []
+
+    # 按最近的骨骼祖先建立子级表（后代列表为逆序，翻转后恢复大纲中的兄弟顺序）
+    joint_paths = set(descendants).union(roots)
+    children = {}
+    for path in reversed(descendants):
+        parent = path.rsplit("|", 1)[0]
+        while parent and parent not in joint_paths:
+            parent = parent.rsplit("|", 1)[0]
+        children.setdefault(parent, []).append(path)
+
+    joints = []
+    parent_indices = []
+    visited = set()
+    # 若选中的根骨骼之间存在父子关系，只以最上层的根开始遍历
+    stack = [(root, -1) for root in reversed(roots)
+             if not any(root.startswith(other + "|") for other in roots)]
+    while stack:
+        path, parent_index = stack.pop()
+        if path in visited:
+            continue
+        visited.add(path)
+        joints.append(path)
+        parent_indices.append(parent_index)
+        index = len(joints) - 1
+        for child in reversed(children.get(path, [])):
+            stack.append((child, index))
+
+    return joints, parent_indices
+
+
+def match_world_transforms(pairs, position=True, rotation=True, scale=False):
+    """
+    批量将节点匹配到目标的世界变换：一次读取所有目标矩阵，再在一个修改器中一次写入
+
+    参数:
+        pairs (list): (node, target) 元组列表
+        position (bool): 是否匹配平移
+        rotation (bool): 是否匹配旋转
+        scale (bool): 是否匹配缩放
+    """
+    if not pairs:
+        return
+    set_world_transforms([node for node, _ in pairs], get_world_matrices([target for _, target in pairs]),
+                         position, rotation, scale)
+
+
+def set_world_transforms(nodes, matrices, position=True, rotation=True, scale=False):
+    """
+    批量将节点的世界平移/旋转/缩放设置为目标矩阵中的对应分量
+    局部通道值在内存中计算（考虑 offsetParentMatrix、枢轴、旋转轴与关节方向），
+    全部写入放在一个修改器中一次执行（可撤销）；嵌套的节点按祖先的新世界矩阵计算
+
+    参数:
+        nodes (list): 节点名称列表
+        matrices (list): 与 nodes 一一对应的目标世界矩阵 (MMatrix)
+        position (bool): 是否设置平移
+        rotation (bool): 是否设置旋转
+        scale (bool): 是否设置缩放
+    """
+    import maya.api.OpenMaya as om2
+    import api_modifier
+
+    if not nodes or not (position or rotation or scale):
+        return
+    paths = get_dag_paths(nodes)
+    full_names = [path.fullPathName() for path in paths]
+    old_worlds = {}
+    new_worlds = {}
+    modifier = om2.MDGModifier()
+
+    # 外层节点先计算，嵌套的子级基于祖先的新世界矩阵
+    for i in sorted(range(len(paths)), key=lambda i: full_names[i].count("|")):
+        path = paths[i]
+        parent_world = path.exclusiveMatrix()
+        ancestor = full_names[i].rsplit("|", 1)[0]
+        while ancestor and ancestor not in new_worlds:
+            ancestor = ancestor.rsplit("|", 1)[0]
+        if ancestor:
+            parent_world = parent_world * old_worlds[ancestor].inverse() * new_worlds[ancestor]
+
+        # 祖先移动后的当前世界矩阵，只替换请求的分量
+        old_world = path.inclusiveMatrix()
+        desired = om2.MTransformationMatrix(old_world * path.exclusiveMatrixInverse() * parent_world)
+        target = om2.MTransformationMatrix(matrices[i])
+        if position:
+            desired.setTranslation(target.translation(om2.MSpace.kWorld), om2.MSpace.kWorld)
+        if rotation:
+            desired.setRotation(target.rotation(asQuaternion=True))
+        if scale:
+            desired.setScale(target.scale(om2.MSpace.kWorld), om2.MSpace.kWorld)
+        old_worlds[full_names[i]] = old_world
+        new_worlds[full_names[i]] = desired.asMatrix()
+
+        # 世界矩阵 = 局部矩阵 * offsetParentMatrix * 父级世界矩阵
+        node_fn = om2.MFnDependencyNode(path.node())
+        local = desired.asMatrix() * parent_world.inverse()
+        if node_fn.hasAttribute("offsetParentMatrix"):
+            offset_parent = om2.MFnMatrixData(node_fn.findPlug("offsetParentMatrix", False).asMObject()).matrix()
+            local = local * offset_parent.inverse()
+        local_xform = om2.MTransformationMatrix(local)
+        channels = om2.MFnTransform(path).transformation()
+
+        if scale:
+            channels.setScale(local_xform.scale(om2.MSpace.kTransform), om2.MSpace.kTransform)
+            for axis, value in zip("XYZ", channels.scale(om2.MSpace.kTransform)):
+                modifier.newPlugValueDouble(node_fn.findPlug(f"scale{axis}", False), value)
+        if rotation:
+            # 总旋转 = 旋转轴 * 旋转 * 关节方向
+            joint_orient = om2.MQuaternion()
+            if path.hasFn(om2.MFn.kJoint):
+                orient_plug = node_fn.findPlug("jointOrient", False)
+                joint_orient = om2.MEulerRotation(*[orient_plug.child(axis).asMAngle().asRadians()
+                                                    for axis in range(3)]).asQuaternion()
+            channels.setRotation(channels.rotationOrientation().inverse()
+                                 * local_xform.rotation(asQuaternion=True) * joint_orient.inverse())
+            euler = channels.rotation()
+            for axis, value in zip("XYZ", (euler.x, euler.y, euler.z)):
+                modifier.newPlugValueMAngle(node_fn.findPlug(f"rotate{axis}", False), om2.MAngle(value))
+        if position:
+            # 平移是局部矩阵的最后一项：按与目标位置的差值修正平移通道（枢轴的影响保持不变）
+            current = om2.MTransformationMatrix(channels.asMatrix()).translation(om2.MSpace.kTransform)
+            channels.translateBy(local_xform.translation(om2.MSpace.kTransform) - current, om2.MSpace.kTransform)
+            for axis, value in zip("XYZ", channels.translation(om2.MSpace.kTransform)):
+                modifier.newPlugValueDouble(node_fn.findPlug(f"translate{axis}", False), value)
+
+    api_modifier.execute(modifier)
+
+
+def circle_points(radius=1.0, sections=8, normal=(0, 1, 0)):
+    """
+    计算三次周期曲线圆的 CV 位置（与 cmds.circle 相同：曲线在节点处经过半径处）
+
+    参数:
+        radius (float): 圆半径
+        sections (int): 段数（CV 数量）
+        normal (tuple): 圆所在平面的法线
+
+    返回:
+        list: sections 个 (x, y, z) 坐标
+    """
+    length = math.sqrt(sum(c * c for c in normal)) or 1.0
+    n = [c / length for c in normal]
+    helper = (0.0, 0.0, 1.0) if abs(n[2]) < 0.9 else (1.0, 0.0, 0.0)
+    u = [helper[1] * n[2] - helper[2] * n[1], helper[2] * n[0] - helper[0] * n[2], helper[0] * n[1] - helper[1] * n[0]]
+    u_length = math.sqrt(sum(c * c for c in u))
+    u = [c / u_length for c in u]
+    v = [n[1] * u[2] - n[2] * u[1], n[2] * u[0] - n[0] * u[2], n[0] * u[1] - n[1] * u[0]]
+
+    # 均匀三次 B 样条在节点处的位置为 (P[i-1] + 4P[i] + P[i+1]) / 6，据此放大 CV 半径
+    cv_radius = radius * 6.0 / (4.0 + 2.0 * math.cos(2.0 * math.pi / sections))
+    points = []
+    for i in range(sections):
+        angle = 2.0 * math.pi * i / sections
+        a, b = math.cos(angle) * cv_radius, math.sin(angle) * cv_radius
+        points.append(tuple(u[k] * a + v[k] * b for k in range(3)))
+    return points
+
+
+def create_circle_curve(name, radius=1.0, sections=8, normal=(0, 1, 0)):
+    """
+    直接由 CV 数据创建闭合圆形曲线（无 makeNurbCircle 构建历史）
+
+    返回:
+        str: 曲线变换节点名称
+    """
+    points = circle_points(radius, sections, normal)
+    return cmds.curve(name=name, periodic=True, degree=3,
+                      point=points + points[:3], knot=list(range(-2, sections + 3)))
@@ -1,6 +1,8 @@
 import maya.cmds as cmds
 import re
 
+from common_utils import create_circle_curve
+
 
 def get_unique_name(base_name):
     """生成一个唯一的名称，如果名称已存在，则递增后缀"""
@@ -14,21 +16,24 @@ def get_unique_name(base_name):
     return new_name
 
 
-def create_controller(name, parent, radius=70, sections=8):
-    """创建控制器并返回控制器和零控制器的名称"""
+def create_controller(name, parent, radius=70, sections=8, construction_history=False):
+    """创建控制器并返回控制器和零控制器的名称（默认不保留 makeNurbCircle 构建历史）"""
     zero_ctrl = cmds.group(em=True, name=f"zero_{name}", parent=parent)
-    ctrl = cmds.circle(
-        name=name,
-        c=(0, 0, 0),
-        nr=(0, 1, 0),
-        sw=360,
-        r=radius,
-        d=3,
-        ut=0,
-        tol=0.01,
-        s=sections,
-        ch=1
-    )[0]
+    if not construction_history:
+        ctrl = create_circle_curve(name, radius=radius, sections=sections, normal=(0, 1, 0))
+    else:
+        ctrl = cmds.circle(
+            name=name,
+            c=(0, 0, 0),
+            nr=(0, 1, 0),
+            sw=360,
+            r=radius,
+            d=3,
+            ut=0,
+            tol=0.01,
+            s=sections,
+            ch=1
+        )[0]
     cmds.parent(ctrl, zero_ctrl)
     return zero_ctrl, ctrl
 
@@ -103,7 +108,6 @@ def create_hierarchy(master_name="master", num_count=1):
             ctrl_name = f"ctrl_m_world_{str(i + 1).zfill(3)}"
             zero_m_world, ctrl_m_world = create_controller(ctrl_name, controls)
             controllers.append(ctrl_m_world)
-            cmds.delete(ctrl_m_world, ch=True)  # 清理控制器历史
         
         # 创建General control控制器，放到第一个控制器下面
         if controllers:
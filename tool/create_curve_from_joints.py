@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+"""
+骨骼生成曲线工具
+一次查询读取所有选中骨骼链（如头发、尾巴等上百条链）的世界位置，
+直接由位置数组创建 1 次或 3 次曲线，可选批量重建为固定段数，用于 FK/IK（样条 IK）搭建。
+
+作者: CK Tool
+"""
+
+import maya.cmds as cmds
+
+from common_utils import get_joint_hierarchy, get_world_matrices
+
+WINDOW_NAME = "createCurveFromJointsUI"
+
+
+def collect_chains(joints):
+    """
+    从选中骨骼收集骨骼链：选中骨骼的祖先未被选中时作为链的起点，沿第一个子骨骼走到末端
+
+    返回:
+        list: 每条链的骨骼完整路径列表
+    """
+    # 一次预取全部层级（已去除嵌套的选中骨骼），在内存中沿第一个子骨骼构建链
+    hierarchy, parent_indices = get_joint_hierarchy(joints)
+    first_child = {}
+    for index, parent in enumerate(parent_indices):
+        if parent >= 0 and parent not in first_child:
+            first_child[parent] = index
+
+    chains = []
+    for index, parent in enumerate(parent_indices):
+        if parent >= 0:
+            continue
+        chain = [index]
+        while chain[-1] in first_child:
+            chain.append(first_child[chain[-1]])
+        chains.append([hierarchy[i] for i in chain])
+    return chains
+
+
+def create_curves_from_chains(chains, degree=3, spans=0, group_name=None):
+    """
+    为多条骨骼链批量创建曲线
+
+    参数:
+        chains (list): 每条链的骨骼路径列表
+        degree (int): 曲线次数（1 或 3），3 次曲线经过每个骨骼位置
+        spans (int): 大于 0 时将全部曲线一次性重建为该段数
+        group_name (str): 不为空时将曲线放入该组
+
+    返回:
+        list: 创建的曲线名称
+    """
+    chains = [chain for chain in chains if len(chain) >= 2]
+    if not chains:
+        return []
+
+    # 一次性读取全部骨骼的世界位置
+    all_joints = [joint for chain in chains for joint in chain]
+    matrices = get_world_matrices(all_joints)
+    positions = [(m[12], m[13], m[14]) for m in matrices]
+
+    curves = []
+    start = 0
+    for chain in chains:
+        points = positions[start:start + len(chain)]
+        start += len(chain)
+        name = "crv_" + chain[0].split("|")[-1]
+        if degree == 1:
+            curve = cmds.curve(name=name, degree=1, point=points)
+        else:
+            curve = cmds.curve(name=name, degree=3, editPoint=points)
+        curves.append(curve)
+
+    if spans > 0:
+        cmds.rebuildCurve(curves, constructionHistory=False, replaceOriginal=True, rebuildType=0,
+                          endKnots=1, keepRange=0, keepControlPoints=False, keepEndPoints=True,
+                          keepTangents=False, spans=spans, degree=degree)
+
+    if group_name:
+        group = group_name if cmds.objExists(group_name) else cmds.group(empty=True, name=group_name)
+        curves = cmds.parent(curves, group)
+    return curves
+
+
+def create_curves_from_selection(degree=3, spans=0, group_name=None):
+    """为选中的骨骼链创建曲线"""
+    chains = collect_chains(cmds.ls(selection=True, type="joint", long=True))
+    if not chains:
+        cmds.warning("请选择至少一条骨骼链的起始骨骼！")
+        return []
+
+    cmds.undoInfo(openChunk=True, chunkName="骨骼生成曲线")
+    try:
+        curves = create_curves_from_chains(chains, degree, spans, group_name)
+    finally:
+        cmds.undoInfo(closeChunk=True)
+
+    if curves:
+        cmds.select(curves, replace=True)
+        print(f"已为 {len(curves)} 条骨骼链创建曲线")
+    return curves
+
+
+def create_curve_ui():
+    """显示骨骼生成曲线工具窗口"""
+    if cmds.window(WINDOW_NAME, exists=True):
+        cmds.deleteUI(WINDOW_NAME)
+
+    cmds.window(WINDOW_NAME, title="骨骼生成曲线", width=320)
+    cmds.columnLayout(adjustableColumn=True, columnAlign="left", rowSpacing=4)
+
+    cmds.text(label="曲线次数:", align="left", font="boldLabelFont")
+    degree_radio = cmds.radioButtonGrp(labelArray2=["1 次（折线）", "3 次（平滑）"], numberOfRadioButtons=2, select=2)
+
+    rebuild_cb = cmds.checkBox(label="重建为固定段数", value=False)
+    spans_field = cmds.intFieldGrp(label="段数:", value1=8, columnWidth2=(60, 60))
+
+    group_cb = cmds.checkBox(label="放入组", value=True)
+    group_field = cmds.textField(text="grp_jointCurves")
+
+    def run(*_):
+        degree = 1 if cmds.radioButtonGrp(degree_radio, query=True, select=True) == 1 else 3
+        spans = cmds.intFieldGrp(spans_field, query=True, value1=True) if cmds.checkBox(rebuild_cb, query=True, value=True) else 0
+        group_name = cmds.textField(group_field, query=True, text=True).strip() if cmds.checkBox(group_cb, query=True, value=True) else None
+        create_curves_from_selection(degree, spans, group_name or None)
+
+    cmds.separator(height=10, style="in")
+    cmds.button(label="为选中骨骼链创建曲线", height=35, command=run)
+
+    cmds.frameLayout(label="使用说明", collapsable=True, collapse=True, marginWidth=5)
+    cmds.columnLayout(adjustableColumn=True)
+    cmds.text(label="1. 选择一条或多条骨骼链的起始骨骼（可一次选择上百条）", align="left")
+    cmds.text(label="2. 每条链沿第一个子骨骼延伸到末端", align="left")
+    cmds.text(label="3. 3 次曲线经过每个骨骼位置，可重建为统一段数用于样条 IK", align="left")
+    cmds.setParent('..')
+    cmds.setParent('..')
+
+    cmds.showWindow(WINDOW_NAME)
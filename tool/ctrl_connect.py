@@ -1,5 +1,7 @@
 import maya.cmds as cmds
 
+import sub_controller_builder
+
 CTRL_COLORS = {'m': 17,
                'l': 6,
                'r': 13}
@@ -33,34 +35,20 @@ for ctrl in ctrls:
 
     # freeze transformation for controller
     cmds.makeIdentity(ctrl, apply=True, scale=True)
-    # delete history
-    cmds.select(ctrl)
-    cmds.DeleteHistory()
-
-    # duplicate ctrl as sub control
-    sub = cmds.duplicate(ctrl, name=ctrl.replace(name_parts[2], name_parts[2] + 'Sub'))[0]
-    cmds.parent(sub, ctrl)
-    cmds.setAttr(sub + '.scale', 0.9, 0.9, 0.9)
-    cmds.makeIdentity(sub, apply=True, scale=True)
-
-    # create output group
-    output = cmds.createNode('transform', name=ctrl.replace('ctrl_', 'output_'), parent=ctrl)
 
-    # connect attrs
-    cmds.connectAttr(sub + '.translate', output + '.translate')
-    cmds.connectAttr(sub + '.rotate', output + '.rotate')
-    cmds.connectAttr(sub + '.rotateOrder', output + '.rotateOrder')
+# delete history
+if ctrls:
+    cmds.delete(ctrls, constructionHistory=True)
 
-    # show rotate order
-    cmds.setAttr(ctrl + '.rotateOrder', channelBox=True)
-    cmds.setAttr(sub + '.rotateOrder', channelBox=True)
+# build sub controls and output groups in one pass (sub shapes are scaled copies of the ctrl cvs)
+subs = sub_controller_builder.build_sub_controllers(
+    ctrls,
+    [ctrl.replace(ctrl.split('_')[2], ctrl.split('_')[2] + 'Sub') for ctrl in ctrls],
+    [ctrl.replace('ctrl_', 'output_') for ctrl in ctrls])
 
-    # add sub vis attr
-    cmds.addAttr(ctrl, longName='subCtrlVis', attributeType='bool')
-    cmds.setAttr(ctrl + '.subCtrlVis', channelBox=True)
-
-    # connect sub vis
-    cmds.connectAttr(ctrl + '.subCtrlVis', sub + '.visibility')
+for ctrl, (sub, output) in zip(ctrls, subs):
+    # get name parts
+    name_parts = ctrl.split('_')
 
     # lock hide unused attrs
     for attr in ['scaleX', 'scaleY', 'scaleZ', 'visibility']:
@@ -1,5 +1,11 @@
 # -*- coding: utf-8 -*-
+from collections import Counter
+
 import maya.cmds as cmds
+import maya.api.OpenMaya as om2
+import matrix_constraint
+import sub_controller_builder
+from common_utils import get_dag_paths, matrix_to_list
 
 # -------------------------
 # 基础工具函数
@@ -25,56 +31,24 @@ def create_constraint(source, target, constraint_types):
     
     return constraints
 
+def create_matrix_constraints_bulk(pairs, constraint_types):
+    """根据选择的约束类型，为所有 (source, target) 批量创建矩阵约束网络（保持偏移）"""
+    translate = bool(constraint_types.get("parent") or constraint_types.get("point"))
+    rotate = bool(constraint_types.get("parent") or constraint_types.get("orient"))
+    scale = bool(constraint_types.get("scale"))
+    return matrix_constraint.create_matrix_constraints(pairs, maintain_offset=True,
+                                                       translate=translate, rotate=rotate, scale=scale)
+
 # -------------------------
 # 次级控制器功能
 # -------------------------
 
-def create_sub_controller(ctrl):
-    """为控制器创建次级控制器，并建立输出与可见性控制"""
-    # 复制控制器
-    sub = cmds.duplicate(ctrl, rr=True)[0]
-    # 命名为原控制器名 + 'Sur'
-    sub = cmds.rename(sub, unique_name(ctrl + 'Sur'))
-    # 放入层级：父到主控制器
-    cmds.parent(sub, ctrl)
-    # 缩放并冻结缩放
-    cmds.setAttr(sub + '.scale', 0.9, 0.9, 0.9)
-    cmds.makeIdentity(sub, apply=True, scale=True)
-
-    # 创建 output 组，命名基于控制器名
-    out_base = ctrl.replace('ctrl_', 'output_')
-    if out_base == ctrl:
-        if ctrl.endswith('_Ctrl'):
-            out_base = ctrl.replace('_Ctrl', '_Output')
-        else:
-            out_base = 'output_' + ctrl
-    output = cmds.createNode('transform', name=unique_name(out_base), parent=ctrl)
-
-    # 连接属性
-    cmds.connectAttr(sub + '.translate', output + '.translate', force=True)
-    cmds.connectAttr(sub + '.rotate', output + '.rotate', force=True)
-    cmds.connectAttr(sub + '.rotateOrder', output + '.rotateOrder', force=True)
-    cmds.connectAttr(sub + '.scale', output + '.scale', force=True)
-
-    # 在通道盒显示旋转顺序
-    cmds.setAttr(ctrl + '.rotateOrder', channelBox=True)
-    cmds.setAttr(sub + '.rotateOrder', channelBox=True)
-
-    # 添加次级控制器可见性开关
-    if not cmds.attributeQuery('subCtrlVis', node=ctrl, exists=True):
-        cmds.addAttr(ctrl, longName='subCtrlVis', attributeType='bool')
-    cmds.setAttr(ctrl + '.subCtrlVis', channelBox=True)
-    cmds.connectAttr(ctrl + '.subCtrlVis', sub + '.visibility', force=True)
-
-    # 锁定隐藏无用属性（不处理缩放）
-    for attr in ['visibility']:
-        for node in [ctrl, sub]:
-            try:
-                cmds.setAttr('{}.{}'.format(node, attr), keyable=False, channelBox=False, lock=True)
-            except Exception:
-                pass
-
-    return sub, output
+def create_sub_controller(ctrl, sub_name=None, output_name=None):
+    """为控制器创建次级控制器，并建立输出与可见性控制（可传入预先规划的名称）"""
+    # 命名为原控制器名 + 'Sur'，output 组命名基于控制器名
+    return sub_controller_builder.build_sub_controller(
+        ctrl, sub_name or unique_name(ctrl + 'Sur'), output_name or unique_name(_output_base_name(ctrl)),
+        lock_visibility=True)
 
 def strip_prefix(name, exclude_prefixes=None):
     """去掉名称开头的指定前缀"""
@@ -93,140 +67,238 @@ def unique_name(base_name):
         return "{}_{}".format(base_name, i)
     return base_name
 
-def create_ctrl_hierarchy_recursive(obj, parent_ctrl=None, mode="full", all_ctrl_info=None, exclude_prefixes=None, create_sub=False, recurse_children=True):
+# 已由本工具创建、遍历子物体时需要跳过的节点前缀
+SKIP_CHILD_PREFIXES = ("ctrl_", "zero_", "offset_", "connect_", "driven_")
+
+# 立方体控制器的点
+CUBE_POINTS = [(-1,-1,-1), (-1,-1,1), (-1,1,1), (-1,1,-1),
+               (-1,-1,-1), (1,-1,-1), (1,-1,1), (-1,-1,1),
+               (1,-1,1), (1,1,1), (-1,1,1), (-1,1,-1),
+               (-1,1,-1), (1,1,-1), (1,-1,-1),
+               (1,1,-1), (1,1,1), (1,-1,1), (1,-1,-1)]
+
+
+class NameReserver(object):
+    """一次性读取场景中已有的名称，在内存中规划唯一命名（等价于逐个调用 unique_name）"""
+
+    def __init__(self):
+        self.counts = Counter(node.split("|")[-1] for node in (cmds.ls() or []))
+
+    def unique(self, base_name):
+        if self.counts.get(base_name):
+            i = 1
+            while self.counts.get("{}_{}".format(base_name, i)):
+                i += 1
+            return "{}_{}".format(base_name, i)
+        return base_name
+
+    def reserve(self, name):
+        self.counts[name] += 1
+
+    def release(self, name):
+        if self.counts.get(name):
+            self.counts[name] -= 1
+
+
+def collect_hierarchy(roots, recurse_children=True):
     """
-    为单个物体及其子物体递归生成控制器层级
-    如果选择的物体是曲线，则直接使用该控制器
+    批量读取根物体及其子物体的层级、形状类型与世界矩阵（迭代遍历，不受递归深度限制）
+
+    返回:
+        list: 按先序排列的条目字典，包含 name、parent（父条目索引或 None）、handle、
+              is_curve、is_joint、matrix
     """
-    base = obj
-    short_name = strip_prefix(base, exclude_prefixes)
-
-    # 创建组层级
-    if mode == "full":
-        zero_name    = unique_name("zero_{}".format(short_name))
-        driven_name  = unique_name("driven_{}".format(short_name))
-        connect_name = unique_name("connect_{}".format(short_name))
-        offset_name  = unique_name("offset_{}".format(short_name))
-        ctrl_name    = unique_name("ctrl_{}".format(short_name))
-
-        zero_grp    = cmds.group(empty=True, name=zero_name)
-        driven_grp  = cmds.group(empty=True, name=driven_name)
-        connect_grp = cmds.group(empty=True, name=connect_name)
-        offset_grp  = cmds.group(empty=True, name=offset_name)
-
-        for g in [zero_grp, driven_grp, connect_grp, offset_grp]:
-            match_transform(g, base)
-
-        cmds.parent(driven_grp, zero_grp)
-        cmds.parent(connect_grp, driven_grp)
-        cmds.parent(offset_grp, connect_grp)
-        parent_grp = offset_grp
-
-    elif mode == "simple":
-        zero_name    = unique_name("zero_{}".format(short_name))
-        offset_name  = unique_name("grpOffset_{}".format(short_name))
-        ctrl_name    = unique_name("ctrl_{}".format(short_name))
-
-        zero_grp   = cmds.group(empty=True, name=zero_name)
-        offset_grp = cmds.group(empty=True, name=offset_name)
-
-        for g in [zero_grp, offset_grp]:
-            match_transform(g, base)
-
-        cmds.parent(offset_grp, zero_grp)
-        parent_grp = offset_grp
-
-    elif mode == "group":
-        gp_name   = unique_name("{}_Gp".format(short_name))
-        gro_name  = unique_name("{}_Gro".format(short_name))
-        g_name    = unique_name("{}_G".format(short_name))
-        ctrl_name = unique_name("{}_Ctrl".format(short_name))
-
-        gp_grp  = cmds.group(empty=True, name=gp_name)
-        gro_grp = cmds.group(empty=True, name=gro_name)
-        g_grp   = cmds.group(empty=True, name=g_name)
-
-        for g in [gp_grp, gro_grp, g_grp]:
-            match_transform(g, base)
-
-        cmds.parent(gro_grp, gp_grp)
-        cmds.parent(g_grp, gro_grp)
-        parent_grp = g_grp
-
-    # 检测是否为曲线控制器
-    shapes = cmds.listRelatives(base, s=True, ni=True) or []
-    is_curve_ctrl = any([cmds.nodeType(s) == "nurbsCurve" for s in shapes])
-
-    if is_curve_ctrl:
-        ctrl = base
-    else:
-        # 创建正方体控制器
-        cube_points = [(-1,-1,-1), (-1,-1,1), (-1,1,1), (-1,1,-1),
-                       (-1,-1,-1), (1,-1,-1), (1,-1,1), (-1,-1,1),
-                       (1,-1,1), (1,1,1), (-1,1,1), (-1,1,-1),
-                       (-1,1,-1), (1,1,-1), (1,-1,-1),
-                       (1,1,-1), (1,1,1), (1,-1,1), (1,-1,-1)]
-        ctrl = cmds.curve(name=ctrl_name, d=1, p=cube_points)
-        match_transform(ctrl, base)
-
-
-    # 父子关系
-    cmds.parent(ctrl, parent_grp)
-
-    # 已有曲线控制器命名规则：full/simple 用 'ctrl_' 前缀，group 用 '_Ctrl' 后缀
-    if is_curve_ctrl:
-        if mode == "group":
-            if not ctrl.endswith('_Ctrl'):
-                new_name = unique_name(ctrl + '_Ctrl')
-                ctrl = cmds.rename(ctrl, new_name)
+    roots = [r for r in roots if cmds.objExists(r)]
+    if not roots:
+        return []
+    root_paths = [cmds.ls(r, long=True)[0] for r in roots]
+
+    # 一次查询获取所有后代 transform，并按父路径建立子级表
+    children = {}
+    if recurse_children:
+        descendants = cmds.listRelatives(root_paths, allDescendents=True, type="transform", fullPath=True) or []
+        for path in reversed(descendants):
+            children.setdefault(path.rsplit("|", 1)[0], []).append(path)
+
+    # 迭代先序遍历，过滤已创建的控制器相关节点及其子层级
+    entries = []
+    for root in root_paths:
+        stack = [(root, None)]
+        while stack:
+            path, parent_index = stack.pop()
+            entries.append({"path": path, "name": path.split("|")[-1], "parent": parent_index})
+            index = len(entries) - 1
+            kids = [c for c in children.get(path, []) if not c.split("|")[-1].startswith(SKIP_CHILD_PREFIXES)]
+            for child in reversed(kids):
+                stack.append((child, index))
+
+    # 批量读取形状类型、节点类型与世界矩阵
+    paths = [entry["path"] for entry in entries]
+    shapes = cmds.listRelatives(paths, shapes=True, noIntermediate=True, fullPath=True) or []
+    curve_parents = set(shape.rsplit("|", 1)[0] for shape in (cmds.ls(shapes, type="nurbsCurve", long=True) or []))
+    joints = set(cmds.ls(paths, type="joint", long=True) or [])
+    dag_paths = get_dag_paths(paths)
+    for entry, dag_path in zip(entries, dag_paths):
+        entry["handle"] = om2.MObjectHandle(dag_path.node())
+        entry["is_curve"] = entry["path"] in curve_parents
+        entry["is_joint"] = entry["path"] in joints
+        entry["matrix"] = matrix_to_list(dag_path.inclusiveMatrix())
+    return entries
+
+
+def _current_path(entry):
+    """根据缓存的 MObject 获取节点当前路径（父子关系变化后仍然有效）"""
+    return om2.MDagPath.getAPathTo(entry["handle"].object()).fullPathName()
+
+
+def _output_base_name(ctrl):
+    """根据控制器名称推导 output 组名称"""
+    out_base = ctrl.replace('ctrl_', 'output_')
+    if out_base == ctrl:
+        if ctrl.endswith('_Ctrl'):
+            out_base = ctrl.replace('_Ctrl', '_Output')
         else:
-            if not ctrl.startswith('ctrl_'):
-                new_name = unique_name("ctrl_{}".format(strip_prefix(ctrl, exclude_prefixes)))
-                ctrl = cmds.rename(ctrl, new_name)
-        base = ctrl
-
-    # 非骨骼且不是已有曲线才 parent
-    if cmds.nodeType(base) != "joint" and not is_curve_ctrl:
-        cmds.parent(base, ctrl)
-
-    # 如果有父控制器
-    if parent_ctrl:
-        if mode == "group":
-            cmds.parent(gp_grp, parent_ctrl)
+            out_base = 'output_' + ctrl
+    return out_base
+
+
+def plan_hierarchy_names(entries, mode="full", exclude_prefixes=None, create_sub=False):
+    """为所有条目一次性规划组、控制器、次级控制器与 output 的唯一名称"""
+    names = NameReserver()
+    group_prefixes = {
+        "full": ("zero_{}", "driven_{}", "connect_{}", "offset_{}"),
+        "simple": ("zero_{}", "grpOffset_{}"),
+        "group": ("{}_Gp", "{}_Gro", "{}_G"),
+    }[mode]
+    ctrl_pattern = "{}_Ctrl" if mode == "group" else "ctrl_{}"
+
+    for entry in entries:
+        short_name = strip_prefix(entry["name"], exclude_prefixes)
+        entry["group_names"] = [names.unique(p.format(short_name)) for p in group_prefixes]
+        ctrl_name = names.unique(ctrl_pattern.format(short_name))
+        for name in entry["group_names"]:
+            names.reserve(name)
+
+        if entry["is_curve"]:
+            # 已有曲线控制器命名规则：full/simple 用 'ctrl_' 前缀，group 用 '_Ctrl' 后缀
+            ctrl_name = entry["name"]
+            entry["rename"] = None
+            if mode == "group":
+                if not ctrl_name.endswith('_Ctrl'):
+                    entry["rename"] = names.unique(ctrl_name + '_Ctrl')
+            elif not ctrl_name.startswith('ctrl_'):
+                entry["rename"] = names.unique("ctrl_{}".format(strip_prefix(ctrl_name, exclude_prefixes)))
+            if entry["rename"]:
+                names.release(ctrl_name)
+                names.reserve(entry["rename"])
+                ctrl_name = entry["rename"]
         else:
-            cmds.parent(zero_grp, parent_ctrl)
+            names.reserve(ctrl_name)
+        entry["ctrl_name"] = ctrl_name
+
+        if create_sub:
+            entry["sub_name"] = names.unique(ctrl_name + 'Sur')
+            names.reserve(entry["sub_name"])
+            entry["output_name"] = names.unique(_output_base_name(ctrl_name))
+            names.reserve(entry["output_name"])
+    return entries
 
-    # 次级控制器（可选）
-    sub_node = None
-    output = None
-    if create_sub:
+
+def create_ctrl_hierarchy(objs, mode="full", exclude_prefixes=None, create_sub=False, recurse_children=True, fk_chain=False, parent_ctrl=None):
+    """
+    为选中物体及其子物体批量生成控制器层级（迭代实现，先批量读取与规划命名，再统一创建）
+    如果物体是曲线，则直接使用该曲线作为控制器
+
+    参数:
+        objs (list): 要生成控制器的根物体
+        fk_chain (bool): 是否将每个根层级放到上一个根的 output/控制器下（FK 链式父级）
+        parent_ctrl (str): 第一个根层级的父控制器
+
+    返回:
+        list: 先序排列的控制器信息字典（base、ctrl、parent_grp，可选 sub、output）
+    """
+    # 一次性读取全部层级并规划所有名称，然后统一创建
+    entries = plan_hierarchy_names(collect_hierarchy(objs, recurse_children), mode, exclude_prefixes, create_sub)
+
+    built = []
+    for entry in entries:
+        # 创建组层级：仅首个组设置世界矩阵，其余组以单位局部矩阵创建在其下
+        groups = []
+        for name in entry["group_names"]:
+            if groups:
+                groups.append(cmds.group(empty=True, name=name, parent=groups[-1]))
+            else:
+                groups.append(cmds.group(empty=True, name=name))
+                cmds.xform(groups[0], ws=True, matrix=entry["matrix"])
+        root_grp, parent_grp = groups[0], groups[-1]
+
+        base = _current_path(entry)
+        if entry["is_curve"]:
+            ctrl = cmds.parent(base, parent_grp)[0]
+            if entry["rename"]:
+                ctrl = cmds.rename(ctrl, entry["rename"])
+            base = ctrl
+        else:
+            # 创建正方体控制器
+            ctrl = cmds.curve(name=entry["ctrl_name"], d=1, p=CUBE_POINTS)
+            cmds.parent(ctrl, parent_grp, relative=True)
+
+        # 非骨骼且不是已有曲线才 parent
+        if not entry["is_joint"] and not entry["is_curve"]:
+            base = cmds.parent(base, ctrl)[0]
+        base = cmds.ls(base)[0]
+        built.append((root_grp, parent_grp, ctrl, base))
+
+    # 次级控制器（可选）：所有控制器创建完成后一次性批量生成
+    subs = [(None, None)] * len(built)
+    if create_sub and built:
         try:
-            sub_node, output = create_sub_controller(ctrl)
+            subs = sub_controller_builder.build_sub_controllers(
+                [ctrl for _, _, ctrl, _ in built],
+                [entry["sub_name"] for entry in entries],
+                [entry["output_name"] for entry in entries],
+                lock_visibility=True)
         except Exception as e:
-            cmds.warning("Failed to create sub controller for {}: {}".format(ctrl, e))
+            cmds.warning("Failed to create sub controllers: {}".format(e))
 
-    ctrl_info = {"base": base, "ctrl": ctrl, "parent_grp": parent_grp}
-    if sub_node:
-        ctrl_info["sub"] = sub_node
-    if output:
-        ctrl_info["output"] = output
-    if all_ctrl_info is not None:
+    all_ctrl_info = []
+    next_parents = []
+    chain_parent = parent_ctrl
+    for entry, (root_grp, parent_grp, ctrl, base), (sub_node, output) in zip(entries, built, subs):
+        # 父控制器：子物体放到父物体的 output/控制器下，根层级使用链式父级
+        if entry["parent"] is not None:
+            entry_parent = next_parents[entry["parent"]]
+        else:
+            entry_parent = chain_parent
+        if entry_parent:
+            cmds.parent(root_grp, entry_parent)
+
+        ctrl_info = {"base": base, "ctrl": ctrl, "parent_grp": parent_grp}
+        if sub_node:
+            ctrl_info["sub"] = sub_node
+        if output:
+            ctrl_info["output"] = output
         all_ctrl_info.append(ctrl_info)
+        next_parents.append(output if (create_sub and output) else ctrl)
 
-    # 递归子物体（可关闭）
-    if recurse_children:
-        children = cmds.listRelatives(base, children=True, type='transform') or []
-        # 过滤掉已创建的控制器相关节点（包括 Sur 和 output）
-        skip_set = set([n for n in [sub_node, output] if n])
-        children = [c for c in children if not (c in skip_set or c.startswith(("ctrl_", "zero_", "offset_", "connect_", "driven_")))]
-        # 下一级层级根放到当前 output 下（若启用次级控制器）
-        next_parent = output if (create_sub and output) else ctrl
-        for child in children:
-            create_ctrl_hierarchy_recursive(child, next_parent, mode, all_ctrl_info, exclude_prefixes, create_sub, recurse_children)
-
-    return ctrl_info
-
-def run_with_constraints(parent_cb, point_cb, orient_cb, scale_cb, mode_radio, exclude_txt, sub_cb, fk_cb):
+        # FK 链式父级：下一个根层级放到当前根的 output/控制器下
+        if entry["parent"] is None:
+            chain_parent = next_parents[-1] if fk_chain else parent_ctrl
+    return all_ctrl_info
+
+
+def create_ctrl_hierarchy_recursive(obj, parent_ctrl=None, mode="full", all_ctrl_info=None, exclude_prefixes=None, create_sub=False, recurse_children=True):
+    """
+    为单个物体及其子物体生成控制器层级（保留原接口，内部使用迭代批量实现）
+    如果选择的物体是曲线，则直接使用该控制器
+    """
+    infos = create_ctrl_hierarchy([obj], mode, exclude_prefixes, create_sub, recurse_children, parent_ctrl=parent_ctrl)
+    if all_ctrl_info is not None:
+        all_ctrl_info.extend(infos)
+    return infos[0] if infos else None
+
+
+def run_with_constraints(parent_cb, point_cb, orient_cb, scale_cb, mode_radio, exclude_txt, sub_cb, fk_cb, matrix_cb=None):
     # 获取约束类型
     constraint_types = {
         "parent": cmds.checkBox(parent_cb, q=True, value=True),
@@ -251,28 +323,26 @@ def run_with_constraints(parent_cb, point_cb, orient_cb, scale_cb, mode_radio, e
     # 勾选次级控制器与 FK 层级模式
     created_sub = cmds.checkBox(sub_cb, q=True, value=True)
     fk_mode = cmds.checkBox(fk_cb, q=True, value=True)
-    all_ctrl_info = []
-    chain_parent = None
-
-    for obj in sel:
-        if fk_mode:
-            # 将本次生成的层级根（zero）放到上一个的 output 下（启用 FK 链式父级）
-            root_info = create_ctrl_hierarchy_recursive(obj, parent_ctrl=chain_parent, mode=mode, all_ctrl_info=all_ctrl_info, exclude_prefixes=exclude_prefixes, create_sub=created_sub, recurse_children=True)
-            if created_sub and root_info.get("output"):
-                chain_parent = root_info["output"]
-            else:
-                chain_parent = root_info["ctrl"]
-        else:
-            # 关闭 FK 链式父级：每个选择对象独立生成层级
-            root_info = create_ctrl_hierarchy_recursive(obj, parent_ctrl=None, mode=mode, all_ctrl_info=all_ctrl_info, exclude_prefixes=exclude_prefixes, create_sub=created_sub, recurse_children=False)
-            chain_parent = None
+    # FK 层级模式：递归子物体，并将每个层级根（zero）放到上一个的 output 下；
+    # 关闭时每个选择对象独立生成层级
+    all_ctrl_info = create_ctrl_hierarchy(sel, mode=mode, exclude_prefixes=exclude_prefixes, create_sub=created_sub,
+                                          recurse_children=fk_mode, fk_chain=fk_mode)
 
     # 应用约束（优先使用 output 作为驱动）
+    use_matrix = bool(matrix_cb) and cmds.checkBox(matrix_cb, q=True, value=True)
     if any(constraint_types.values()):
+        pairs = []
         for info in all_ctrl_info:
             source = info.get("output") or (info.get("sub") if created_sub else info["ctrl"])  # 优先 output
             target = info["base"]
             if source != target:
+                pairs.append((source, target))
+        if use_matrix:
+            # 矩阵约束模式：所有驱动关系一次性批量创建
+            nodes = create_matrix_constraints_bulk(pairs, constraint_types)
+            print("Applied matrix constraints to {} objects ({} nodes)".format(len(pairs), len(nodes)))
+        else:
+            for source, target in pairs:
                 create_constraint(source, target, constraint_types)
                 print("Applied constraints from {} to {}".format(source, target))
 
@@ -303,6 +373,8 @@ def create_constraint_ui():
     sub_cb = cmds.checkBox(label="次级控制器 (Sub Controller)", value=False)
     # FK 层级模式开关（启用链式父级，默认关闭）
     fk_cb = cmds.checkBox(label="FK层级模式 (启用/关闭链式父级)", value=False)
+    # 矩阵约束开关（使用 multMatrix 网络替代约束节点）
+    matrix_cb = cmds.checkBox(label="矩阵约束 (Matrix Constraint)", value=False)
 
     cmds.separator(height=10, style="in")
 
@@ -312,7 +384,7 @@ def create_constraint_ui():
     cmds.separator(height=10, style="in")
 
     cmds.button(label="创建控制器并约束", height=35,
-                command=lambda x: run_with_constraints(parent_cb, point_cb, orient_cb, scale_cb, mode_radio, exclude_txt, sub_cb, fk_cb))
+                command=lambda x: run_with_constraints(parent_cb, point_cb, orient_cb, scale_cb, mode_radio, exclude_txt, sub_cb, fk_cb, matrix_cb))
 
     cmds.separator(height=15, style="in")
 
@@ -4,6 +4,104 @@ import maya.mel as mel
 import pymel.core as pm
 from functools import partial
 
+import color_scheme
+
+# remapValue 渐变插值方式：0 无 / 1 线性 / 2 平滑 / 3 样条
+INTERP_NONE, INTERP_LINEAR, INTERP_SMOOTH, INTERP_SPLINE = range(4)
+
+
+def read_ramp_entries(ramp_node, attr='color'):
+    """
+    一次读取 remapValue 颜色渐变的全部关键点
+
+    返回:
+        list: 按位置排序的 (位置, (r, g, b), 插值方式) 列表
+    """
+    entries = []
+    for index in cmds.getAttr(f'{ramp_node}.{attr}', multiIndices=True) or []:
+        entry = f'{ramp_node}.{attr}[{index}]'
+        entries.append((cmds.getAttr(f'{entry}.{attr}_Position'),
+                        tuple(cmds.getAttr(f'{entry}.{attr}_Color')[0]),
+                        cmds.getAttr(f'{entry}.{attr}_Interp')))
+    entries.sort(key=lambda entry: entry[0])
+    return entries
+
+
+def _catmull_rom(p0, p1, p2, p3, t):
+    """单通道 Catmull-Rom 样条插值"""
+    t2 = t * t
+    t3 = t2 * t
+    return 0.5 * (2.0 * p1 + (p2 - p0) * t
+                  + (2.0 * p0 - 5.0 * p1 + 4.0 * p2 - p3) * t2
+                  + (3.0 * p1 - p0 - 3.0 * p2 + p3) * t3)
+
+
+def read_input_range(ramp_node):
+    """读取 remapValue 的输入范围 (inputMin, inputMax)"""
+    return cmds.getAttr(f'{ramp_node}.inputMin'), cmds.getAttr(f'{ramp_node}.inputMax')
+
+
+def evaluate_ramp(entries, value, input_min=0.0, input_max=1.0):
+    """
+    在 Python 中计算渐变颜色，与 remapValue 的插值方式一致：
+    输入值先按 inputMin / inputMax 归一化，区间使用左侧关键点的插值方式，超出首尾关键点时取首尾颜色
+
+    参数:
+        entries (list): read_ramp_entries 的结果
+        value (float): 输入值
+        input_min (float): remapValue 的 inputMin
+        input_max (float): remapValue 的 inputMax
+
+    返回:
+        tuple: (r, g, b)
+    """
+    if not entries:
+        return (0.0, 0.0, 0.0)
+    input_span = input_max - input_min
+    value = (value - input_min) / input_span if input_span else 0.0
+    if value <= entries[0][0]:
+        return entries[0][1]
+    if value >= entries[-1][0]:
+        return entries[-1][1]
+
+    # 找到 value 所在区间 [i, i + 1]
+    i = 0
+    while entries[i + 1][0] <= value:
+        i += 1
+    start, start_color, interp = entries[i]
+    end, end_color = entries[i + 1][:2]
+    span = end - start
+    t = (value - start) / span if span > 0 else 0.0
+
+    if interp == INTERP_NONE:
+        return start_color
+    if interp == INTERP_SMOOTH:
+        t = t * t * (3.0 - 2.0 * t)
+    elif interp == INTERP_SPLINE:
+        # 首尾区间用端点自身作为外侧控制点
+        before = entries[i - 1][1] if i > 0 else start_color
+        after = entries[i + 2][1] if i + 2 < len(entries) else end_color
+        return tuple(_catmull_rom(before[c], start_color[c], end_color[c], after[c], t) for c in range(3))
+    return tuple(start_color[c] + (end_color[c] - start_color[c]) * t for c in range(3))
+
+
+def apply_override_colors(nodes, colors, use_shapes=True):
+    """
+    批量设置覆盖颜色，交给配色引擎只写入不同的值并在一个修改器中一次执行（可撤销）
+
+    参数:
+        nodes (list): 变换节点列表
+        colors (list): 与 nodes 一一对应的 (r, g, b)
+        use_shapes (bool): True 时写入节点下的全部形状，否则写入变换节点本身
+
+    返回:
+        int: 颜色发生变化的节点数量
+    """
+    # 样条插值可能略微超出范围，覆盖颜色限制在 0-1
+    clamped = [tuple(max(0.0, min(1.0, c)) for c in color) for color in colors]
+    return color_scheme.set_override_colors(list(zip(nodes, clamped)), use_shapes)
+
+
 class GradientColorTool:
     def __init__(self):
         self.window_name = 'gradientColorWindow'
@@ -20,7 +118,8 @@ class GradientColorTool:
                            title='🎨 渐变颜色工具', 
                            widthHeight=(320, 260),
                            resizeToFitChildren=True,
-                           backgroundColor=(0.25, 0.25, 0.25))
+                           backgroundColor=(0.25, 0.25, 0.25),
+                           closeCommand=self.delete_ramp_node)
         
         # 主布局
         main_layout = cmds.columnLayout(adjustableColumn=True, 
@@ -145,10 +244,15 @@ class GradientColorTool:
             cmds.createNode('remapValue', n=self.ramp_name)
             # 设置默认渐变（从红到蓝）
             cmds.setAttr(f'{self.ramp_name}.color[0].color_Position', 0.0)
-            cmds.setAttr(f'{self.ramp_name}.color[0].color_FloatValue', 1.0, 0.0, 0.0, type='double3')
+            cmds.setAttr(f'{self.ramp_name}.color[0].color_Color', 1.0, 0.0, 0.0, type='double3')
             cmds.setAttr(f'{self.ramp_name}.color[1].color_Position', 1.0)
-            cmds.setAttr(f'{self.ramp_name}.color[1].color_FloatValue', 0.0, 0.0, 1.0, type='double3')
+            cmds.setAttr(f'{self.ramp_name}.color[1].color_Color', 0.0, 0.0, 1.0, type='double3')
         return self.ramp_name
+
+    def delete_ramp_node(self, *args):
+        """删除临时渐变节点（关闭窗口时调用）"""
+        if cmds.objExists(self.ramp_name):
+            cmds.delete(self.ramp_name)
         
     def open_ramp_editor(self, *args):
         """打开渐变编辑器"""
@@ -163,7 +267,7 @@ class GradientColorTool:
         """应用渐变颜色到选中的物体"""
         try:
             # 获取选中的物体
-            sel = cmds.ls(sl=True)
+            sel = cmds.ls(sl=True, long=True, type='transform')
             if not sel:
                 self.update_status('请先选择物体再进行操作', 'warning')
                 return
@@ -173,85 +277,34 @@ class GradientColorTool:
                 self.update_status('请选择至少2个物体以获得渐变效果', 'warning')
                 return
                 
-            # 确保渐变节点存在
+            # 确保渐变节点存在，并一次读取全部关键点
             self.create_ramp_node()
+            entries = read_ramp_entries(self.ramp_name)
+            input_min, input_max = read_input_range(self.ramp_name)
             
-            # 为每个物体应用渐变颜色
-            for i, obj in enumerate(sel):
-                # 计算参数值（0到1之间）
-                if sel_size == 1:
-                    par_value = 0.5
-                else:
-                    par_value = i / (sel_size - 1.0)
-                
-                # 设置输入值并获取输出颜色
-                cmds.setAttr(f'{self.ramp_name}.inputValue', par_value)
-                rgb_value = cmds.getAttr(f'{self.ramp_name}.outColor')[0]
-                
-                # 应用颜色到物体
-                self.set_object_color(obj, rgb_value)
+            # 在 Python 中计算每个物体的颜色（参数值 0 到 1），不再逐个 setAttr/getAttr 触发 DG 计算
+            colors = [evaluate_ramp(entries, i / (sel_size - 1.0), input_min, input_max) for i in range(sel_size)]
+            
+            # 一次批量写入全部颜色
+            target_type = cmds.optionMenu(self.color_target_menu, query=True, value=True)
+            apply_override_colors(sel, colors, use_shapes='Shape' in target_type)
                 
             self.update_status(f'太棒了！成功为 {sel_size} 个物体应用了渐变颜色', 'success')
             
         except Exception as e:
             self.update_status(f'应用颜色失败: {str(e)}', 'error')
             
-    def set_object_color(self, obj, rgb_color):
-        """设置物体颜色"""
-        try:
-            # 获取颜色目标类型
-            target_type = cmds.optionMenu(self.color_target_menu, query=True, value=True)
-            
-            if 'Shape' in target_type:
-                # 对Shape节点设置颜色
-                shapes = cmds.listRelatives(obj, shapes=True, fullPath=True)
-                if not shapes:
-                    return
-                    
-                for shape in shapes:
-                    # 启用颜色覆盖
-                    cmds.setAttr(f'{shape}.overrideEnabled', True)
-                    cmds.setAttr(f'{shape}.overrideRGBColors', True)
-                    
-                    # 设置RGB颜色
-                    cmds.setAttr(f'{shape}.overrideColorRGB', 
-                               rgb_color[0], rgb_color[1], rgb_color[2], 
-                               type='double3')
-            else:
-                # 对Transform节点设置颜色
-                # 启用颜色覆盖
-                cmds.setAttr(f'{obj}.overrideEnabled', True)
-                cmds.setAttr(f'{obj}.overrideRGBColors', True)
-                
-                # 设置RGB颜色
-                cmds.setAttr(f'{obj}.overrideColorRGB', 
-                           rgb_color[0], rgb_color[1], rgb_color[2], 
-                           type='double3')
-                           
-        except Exception as e:
-            print(f'设置物体 {obj} 颜色失败: {str(e)}')
-            
     def reset_colors(self, *args):
         """重置选中物体的颜色"""
         try:
-            sel = cmds.ls(sl=True)
+            sel = cmds.ls(sl=True, long=True, type='dagNode')
             if not sel:
                 self.update_status('请先选择要重置的物体', 'warning')
                 return
             
-            # 获取颜色目标类型
+            # 获取颜色目标类型，一次关闭全部 Shape 或 Transform 节点的颜色覆盖
             target_type = cmds.optionMenu(self.color_target_menu, query=True, value=True)
-                
-            for obj in sel:
-                if 'Shape' in target_type:
-                    # 重置Shape节点颜色
-                    shapes = cmds.listRelatives(obj, shapes=True, fullPath=True)
-                    if shapes:
-                        for shape in shapes:
-                            cmds.setAttr(f'{shape}.overrideEnabled', False)
-                else:
-                    # 重置Transform节点颜色
-                    cmds.setAttr(f'{obj}.overrideEnabled', False)
+            color_scheme.clear_override_colors(sel, use_shapes='Shape' in target_type)
                         
             self.update_status(f'已成功重置 {len(sel)} 个物体的颜色', 'success')
             
@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+"""
+曲线构建历史清理工具
+查找由 makeNurbCircle 等创建节点直接驱动的控制器曲线，一次性删除这些无用的构建历史，
+减少场景中的 DG 节点数量、加载时间与内存占用。
+
+作者: CK Tool
+"""
+
+import maya.cmds as cmds
+
+# 仅生成曲线形状、删除后不影响曲线的创建节点类型
+CREATION_NODE_TYPES = [
+    "makeNurbCircle",
+    "makeNurbsSquare",
+    "makeTextCurves",
+    "makeTwoPointCircularArc",
+    "makeThreePointCircularArc",
+]
+
+
+def find_curves_with_creation_history(nodes=None):
+    """
+    查找形状直接由创建节点驱动的曲线
+
+    参数:
+        nodes (list): 限定查找范围的节点（包含其所有子级），为 None 时查找整个场景
+
+    返回:
+        tuple: (曲线变换节点完整路径列表, 创建节点列表)
+    """
+    creation_nodes = cmds.ls(type=CREATION_NODE_TYPES) or []
+    if not creation_nodes:
+        return [], []
+
+    # 一次查询全部创建节点的下游曲线形状
+    shapes = cmds.listConnections(creation_nodes, source=False, destination=True,
+                                  shapes=True, type="nurbsCurve") or []
+    # 注意 cmds.ls 传入空列表会返回全部节点
+    shapes = cmds.ls(shapes, long=True) if shapes else []
+    if nodes:
+        scope = set(cmds.ls(nodes, dag=True, type="transform", long=True) or [])
+        shapes = [shape for shape in shapes if shape.rsplit("|", 1)[0] in scope]
+    if not shapes:
+        return [], []
+
+    curves = {shape.rsplit("|", 1)[0] for shape in shapes}
+    used = cmds.listConnections([f"{shape}.create" for shape in shapes], source=True, destination=False) or []
+    # 只保留创建节点（create 也可能由变形器等其他节点驱动）
+    creation_set = set(creation_nodes)
+    return sorted(curves), sorted(node for node in set(used) if node in creation_set)
+
+
+def purge_curve_history(nodes=None):
+    """
+    批量删除曲线上无用的构建历史
+
+    参数:
+        nodes (list): 限定清理范围的节点，为 None 时清理整个场景
+
+    返回:
+        tuple: (已清理的曲线列表, 删除的创建节点数量)
+    """
+    curves, creation_nodes = find_curves_with_creation_history(nodes)
+    # 只删除匹配到的创建节点（曲线保留当前形状），不对变换节点整体删除历史，
+    # 以免删掉多形状控制器中其他形状上的变形器与蒙皮
+    if creation_nodes:
+        cmds.delete(creation_nodes)
+    return curves, len(creation_nodes)
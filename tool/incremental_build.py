@@ -0,0 +1,251 @@
+# -*- coding: utf-8 -*-
+"""
+增量重建工具函数
+重复运行FK层级或关节控制器创建时，复用已存在的 zero/ctrl/sub/output 节点，
+只创建缺失的部分，并仅修正错误的父子关系、变换与约束。
+
+作者: CK Tool
+"""
+
+import maya.cmds as cmds
+import maya.api.OpenMaya as om2
+
+import matrix_constraint
+import reparent_planner
+from common_utils import get_world_matrices
+
+# 增量重建时会被核对的约束类型
+CONSTRAINT_TYPES = ("parentConstraint", "pointConstraint", "orientConstraint", "scaleConstraint")
+
+
+def _same_node(a, b):
+    """判断两个名称是否指向同一个节点"""
+    if not a or not b:
+        return False
+    return cmds.ls(a, long=True) == cmds.ls(b, long=True)
+
+
+def ensure_parent(node, parent):
+    """
+    确保节点位于指定父级下，父级已正确时不做任何操作
+
+    返回:
+        bool: 是否修改了父级
+    """
+    current = cmds.listRelatives(node, parent=True, fullPath=True)
+    if parent is None:
+        if current:
+            cmds.parent(node, world=True)
+            return True
+        return False
+    if current and _same_node(current[0], parent):
+        return False
+    cmds.parent(node, parent)
+    return True
+
+
+def ensure_group(name, parent=None):
+    """
+    复用同名组（有父级时修正父级），不存在时创建
+
+    参数:
+        name (str): 组名称
+        parent (str): 父级，为 None 时不检查已存在组的父级
+
+    返回:
+        tuple: (组名称, 是否新建)
+    """
+    if cmds.objExists(name):
+        if parent:
+            ensure_parent(name, parent)
+        return name, False
+    if parent:
+        return cmds.group(name=name, empty=True, parent=parent), True
+    return cmds.group(name=name, empty=True), True
+
+
+def ensure_connection(source, destination):
+    """属性未连接时才建立连接，返回是否新建了连接"""
+    if cmds.isConnected(source, destination):
+        return False
+    cmds.connectAttr(source, destination, force=True)
+    return True
+
+
+def match_transform_if_needed(node, target, position=True, rotation=True, scale=False, tolerance=1e-4):
+    """
+    仅当节点与目标的世界位置/旋转/缩放不一致时才执行 matchTransform
+
+    返回:
+        bool: 是否执行了匹配
+    """
+    node_matrix, target_matrix = get_world_matrices([node, target])
+    node_xform = om2.MTransformationMatrix(node_matrix)
+    target_xform = om2.MTransformationMatrix(target_matrix)
+
+    differs = False
+    if position:
+        differs |= not node_xform.translation(om2.MSpace.kWorld).isEquivalent(
+            target_xform.translation(om2.MSpace.kWorld), tolerance)
+    if rotation:
+        node_quat = node_xform.rotation(asQuaternion=True)
+        target_quat = target_xform.rotation(asQuaternion=True)
+        # q 与 -q 表示同一旋转
+        differs |= not (node_quat.isEquivalent(target_quat, tolerance)
+                        or node_quat.isEquivalent(target_quat.negateIt(), tolerance))
+    if scale:
+        node_scale = node_xform.scale(om2.MSpace.kWorld)
+        target_scale = target_xform.scale(om2.MSpace.kWorld)
+        differs |= any(abs(a - b) > tolerance for a, b in zip(node_scale, target_scale))
+
+    if differs:
+        cmds.matchTransform(node, target, pos=position, rot=rotation, scl=scale)
+    return differs
+
+
+def ensure_constraint(constraint_type, driver, driven, maintain_offset=True):
+    """
+    确保被驱动者上存在以 driver 为唯一目标的指定类型约束
+    目标不一致的同类型约束会被删除后重建
+
+    返回:
+        tuple: (约束节点, 是否新建)
+    """
+    command = getattr(cmds, constraint_type)
+    for constraint in cmds.listRelatives(driven, type=constraint_type, fullPath=True) or []:
+        targets = command(constraint, query=True, targetList=True) or []
+        if len(targets) == 1 and _same_node(targets[0], driver):
+            return constraint, False
+        cmds.delete(constraint)
+    return command(driver, driven, maintainOffset=maintain_offset)[0], True
+
+
+def remove_unrequested_drivers(driven, constraint_types=(), matrix_channels=()):
+    """
+    删除被驱动者上不在本次请求中的约束类型与矩阵网络，
+    切换约束模式（如父子约束 -> 点/方向约束、约束 -> 矩阵约束）时避免旧驱动与新驱动同时存在
+
+    参数:
+        driven (str): 被驱动者
+        constraint_types (tuple): 本次请求的约束类型
+        matrix_channels (set): 本次请求的矩阵约束通道，为空表示不使用矩阵约束
+
+    返回:
+        int: 删除的约束与矩阵节点数量
+    """
+    stale = [constraint for constraint_type in CONSTRAINT_TYPES if constraint_type not in constraint_types
+             for constraint in cmds.listRelatives(driven, type=constraint_type, fullPath=True) or []]
+    if not matrix_channels:
+        stale += matrix_constraint.get_matrix_constraint_nodes(driven)
+    if stale:
+        cmds.delete(stale)
+    return len(stale)
+
+
+def filter_matrix_constraint_pairs(pairs, channels=("translate", "rotate", "scale")):
+    """
+    过滤已由正确驱动者按相同通道矩阵约束的 (driver, driven)，驱动者或通道不一致的旧矩阵网络会被删除
+
+    参数:
+        pairs (list): (driver, driven) 列表
+        channels (tuple): 本次请求的矩阵约束通道
+
+    返回:
+        list: 仍需创建矩阵约束的 (driver, driven) 列表
+    """
+    missing = []
+    for driver, driven in pairs:
+        nodes = matrix_constraint.get_matrix_constraint_nodes(driven)
+        if (nodes and _same_node(matrix_constraint.get_matrix_constraint_driver(driven), driver)
+                and matrix_constraint.get_matrix_constraint_channels(driven) == set(channels)):
+            continue
+        if nodes:
+            cmds.delete(nodes)
+        missing.append((driver, driven))
+    return missing
+
+
+class IncrementalBuilder(object):
+    """
+    统一封装创建操作：启用增量模式时复用已有节点并只修正差异，
+    关闭时保持原有的直接创建行为，同时统计新建、复用与修正的数量
+    """
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.stats = {"created": 0, "reused": 0, "fixed": 0}
+
+    def exists(self, name):
+        """增量模式下节点已存在时记为复用并返回 True"""
+        if self.enabled and cmds.objExists(name):
+            self.stats["reused"] += 1
+            return True
+        return False
+
+    def created(self):
+        self.stats["created"] += 1
+
+    def fixed(self, count=1):
+        self.stats["fixed"] += count
+
+    def group(self, name, parent=None):
+        if self.enabled:
+            group, created = ensure_group(name, parent)
+            self.stats["created" if created else "reused"] += 1
+            return group
+        self.created()
+        if parent:
+            return cmds.group(name=name, empty=True, parent=parent)
+        return cmds.group(name=name, empty=True)
+
+    def parent(self, node, parent):
+        if self.enabled:
+            if ensure_parent(node, parent):
+                self.fixed()
+        else:
+            cmds.parent(node, parent)
+
+    def parent_many(self, pairs):
+        """批量设置 (node, parent) 父级，已在目标父级下的节点会被跳过"""
+        planner = reparent_planner.ReparentPlanner()
+        for node, parent in pairs:
+            planner.add(node, parent)
+        paths = planner.execute()
+        if self.enabled:
+            self.fixed(planner.moved)
+        return paths
+
+    def connect(self, source, destination):
+        if self.enabled:
+            if ensure_connection(source, destination):
+                self.fixed()
+        else:
+            cmds.connectAttr(source, destination)
+
+    def match_transform(self, node, target, position=True, rotation=True, scale=False):
+        if self.enabled:
+            if match_transform_if_needed(node, target, position, rotation, scale):
+                self.fixed()
+        else:
+            cmds.matchTransform(node, target, pos=position, rot=rotation, scl=scale)
+
+    def constraint(self, constraint_type, driver, driven, maintain_offset=True):
+        if self.enabled:
+            constraint, created = ensure_constraint(constraint_type, driver, driven, maintain_offset)
+            if created:
+                self.fixed()
+            return constraint
+        return getattr(cmds, constraint_type)(driver, driven, maintainOffset=maintain_offset)
+
+    def prune_drivers(self, driven, constraint_types=(), matrix_channels=()):
+        """增量模式下删除不在本次请求中的约束类型与矩阵网络（参数同 remove_unrequested_drivers）"""
+        if self.enabled:
+            removed = remove_unrequested_drivers(driven, constraint_types, matrix_channels)
+            if removed:
+                self.fixed(removed)
+
+    def report(self):
+        """输出增量重建统计"""
+        if self.enabled:
+            print(f"增量重建：新建 {self.stats['created']} 个节点，复用 {self.stats['reused']} 个节点，"
+                  f"修正 {self.stats['fixed']} 处父级/变换/约束")
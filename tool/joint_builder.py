@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+"""
+批量骨骼创建工具
+根据位置数组与父级索引一次性计算整条（或多条）骨骼链的朝向，
+通过单个 MDagModifier 创建全部骨骼并写入 translate / jointOrient / preferredAngle，
+最后用一次 sets 调用加入蒙皮骨骼集，替代逐个 select/joint/joint -e/xform/setAttr/sets。
+
+朝向规则与 joint -e -oj <orient> -sao <sec_axis_orient> -ch -zso 一致：
+主轴指向第一个子骨骼，次轴尽量朝向 sec_axis_orient 指定的世界方向，末端骨骼与父骨骼朝向一致。
+
+作者: CK Tool
+"""
+
+import maya.cmds as cmds
+import maya.api.OpenMaya as om2
+
+import api_modifier
+
+AXES = {"x": 0, "y": 1, "z": 2}
+SEC_AXIS_VECTORS = {
+    "xup": (1, 0, 0), "xdown": (-1, 0, 0),
+    "yup": (0, 1, 0), "ydown": (0, -1, 0),
+    "zup": (0, 0, 1), "zdown": (0, 0, -1),
+}
+
+
+def _frame(aim, up, orient):
+    """由主轴方向与参考上方向构建世界旋转矩阵（行向量为骨骼局部 X/Y/Z 轴）"""
+    primary = aim.normal()
+    secondary = up - primary * (up * primary)
+    if secondary.length() < 1e-6:
+        # 主轴与参考方向平行时改用任意垂直方向
+        fallback = om2.MVector(0, 0, 1) if abs(primary.z) < 0.9 else om2.MVector(1, 0, 0)
+        secondary = fallback - primary * (fallback * primary)
+    secondary.normalize()
+
+    # xyz/yzx/zxy 为右手循环顺序，其余顺序需交换叉乘方向
+    if orient in ("xyz", "yzx", "zxy"):
+        tertiary = primary ^ secondary
+    else:
+        tertiary = secondary ^ primary
+
+    rows = [None, None, None]
+    rows[AXES[orient[0]]] = primary
+    rows[AXES[orient[1]]] = secondary
+    rows[AXES[orient[2]]] = tertiary
+    return om2.MMatrix([rows[0].x, rows[0].y, rows[0].z, 0,
+                        rows[1].x, rows[1].y, rows[1].z, 0,
+                        rows[2].x, rows[2].y, rows[2].z, 0,
+                        0, 0, 0, 1])
+
+
+def solve_orientations(positions, parent_indices, orient="xyz", sec_axis_orient="yup"):
+    """
+    计算全部骨骼的世界旋转矩阵
+
+    参数:
+        positions (list): 世界坐标 (x, y, z) 列表
+        parent_indices (list): 每个骨骼的父骨骼索引，根骨骼为 -1（父级必须在子级之前）
+        orient (str): 朝向顺序，如 "xyz"，"none" 表示不设置朝向
+        sec_axis_orient (str): 次轴世界方向，如 "yup"
+
+    返回:
+        list: 与输入顺序一致的 MMatrix 世界旋转矩阵
+    """
+    count = len(positions)
+    if orient == "none":
+        return [om2.MMatrix() for _ in range(count)]
+
+    first_child = [-1] * count
+    for index, parent in enumerate(parent_indices):
+        if parent >= 0 and first_child[parent] < 0:
+            first_child[parent] = index
+
+    up = om2.MVector(*SEC_AXIS_VECTORS.get(sec_axis_orient, (0, 1, 0)))
+    points = [om2.MVector(*position) for position in positions]
+    rotations = []
+    for index in range(count):
+        child = first_child[index]
+        aim = points[child] - points[index] if child >= 0 else None
+        if aim is not None and aim.length() > 1e-6:
+            rotations.append(_frame(aim, up, orient))
+        elif parent_indices[index] >= 0:
+            # 末端骨骼（或与子骨骼重合）保持父骨骼朝向
+            rotations.append(rotations[parent_indices[index]])
+        else:
+            rotations.append(om2.MMatrix())
+    return rotations
+
+
+def create_joints(names, positions, parent_indices, orient="xyz", sec_axis_orient="yup",
+                  preferred_angles=(0, 0, 0), joint_set=None):
+    """
+    批量创建骨骼
+
+    参数:
+        names (list): 骨骼名称
+        positions (list): 世界坐标
+        parent_indices (list): 父骨骼索引，根骨骼为 -1（父级必须在子级之前）
+        orient (str): 朝向顺序
+        sec_axis_orient (str): 次轴世界方向
+        preferred_angles (tuple): 首选角度（度）
+        joint_set (str): 需要加入的集合名称，不存在时自动创建
+
+    返回:
+        list: 创建的骨骼名称（与输入顺序一致）
+    """
+    if not names:
+        return []
+    rotations = solve_orientations(positions, parent_indices, orient, sec_axis_orient)
+    preferred = [om2.MAngle(angle, om2.MAngle.kDegrees) for angle in preferred_angles]
+
+    modifier = om2.MDagModifier()
+    joints = []
+    for index, (name, position) in enumerate(zip(names, positions)):
+        parent = parent_indices[index]
+        joint = modifier.createNode("joint", joints[parent] if parent >= 0 else om2.MObject.kNullObj)
+        modifier.renameNode(joint, name)
+        joints.append(joint)
+
+        # 局部平移 = 世界偏移转换到父骨骼坐标系；jointOrient = 世界旋转 * 父骨骼世界旋转的逆
+        if parent >= 0:
+            offset = om2.MPoint(om2.MVector(*position) - om2.MVector(*positions[parent])) * rotations[parent].transpose()
+            local_rotation = rotations[index] * rotations[parent].transpose()
+        else:
+            offset = om2.MPoint(*position)
+            local_rotation = rotations[index]
+        euler = om2.MTransformationMatrix(local_rotation).rotation()
+
+        joint_fn = om2.MFnDependencyNode(joint)
+        for axis, value in zip("XYZ", (offset.x, offset.y, offset.z)):
+            modifier.newPlugValueDouble(joint_fn.findPlug(f"translate{axis}", False), value)
+        for axis, value in zip("XYZ", (euler.x, euler.y, euler.z)):
+            modifier.newPlugValueMAngle(joint_fn.findPlug(f"jointOrient{axis}", False), om2.MAngle(value))
+        for axis, angle in zip("XYZ", preferred):
+            modifier.newPlugValueMAngle(joint_fn.findPlug(f"preferredAngle{axis}", False), angle)
+
+    api_modifier.execute(modifier)
+    created = [om2.MFnDependencyNode(joint).name() for joint in joints]
+
+    if joint_set:
+        if not cmds.objExists(joint_set) or cmds.nodeType(joint_set) != "objectSet":
+            joint_set = cmds.sets(name=joint_set, empty=True)
+        cmds.sets([om2.MDagPath.getAPathTo(joint).fullPathName() for joint in joints],
+                  edit=True, forceElement=joint_set)
+    return created
@@ -0,0 +1,501 @@
+# -*- coding: utf-8 -*-
+"""
+矩阵约束工具
+使用 multMatrix / decomposeMatrix 网络替代 parentConstraint、pointConstraint、
+orientConstraint 与 scaleConstraint，减少求值时的节点开销。
+
+- 同时约束平移、旋转、缩放时，使用 multMatrix -> offsetParentMatrix（每个物体仅一个节点）
+- 仅约束部分通道时，使用 multMatrix -> decomposeMatrix -> translate/rotate/scale
+- 保持偏移在创建时计算并烘焙到 multMatrix 的常量矩阵中
+- 所有驱动者与被驱动者的世界矩阵在一次批量读取中获取
+- convert_constraints_to_matrix 可将场景中已有的单目标约束批量转换为矩阵网络
+
+作者: CK Tool
+"""
+
+import time
+import maya.cmds as cmds
+import maya.api.OpenMaya as om2
+
+from common_utils import get_dag_paths, matrix_to_list
+
+# 矩阵约束节点名称后缀，用于识别由本工具创建的节点
+MATRIX_CONSTRAINT_SUFFIX = "_mtxCon"
+
+
+def _plug_matrix(path, attr):
+    """读取节点矩阵属性（如 matrix、offsetParentMatrix）为 MMatrix"""
+    plug = om2.MFnDependencyNode(path.node()).findPlug(attr, False)
+    return om2.MFnMatrixData(plug.asMObject()).matrix()
+
+
+def _has_offset_parent_matrix(path):
+    """检查节点是否支持 offsetParentMatrix（Maya 2020+）"""
+    return om2.MFnDependencyNode(path.node()).hasAttribute("offsetParentMatrix")
+
+
+def _joint_orient_matrix(node):
+    """获取关节 jointOrient 对应的旋转矩阵，非关节或方向为零时返回 None"""
+    if cmds.nodeType(node) != "joint":
+        return None
+    orient = cmds.getAttr(f"{node}.jointOrient")[0]
+    if all(abs(v) < 1e-8 for v in orient):
+        return None
+    radians = [om2.MAngle(v, om2.MAngle.kDegrees).asRadians() for v in orient]
+    return om2.MEulerRotation(*radians).asMatrix()
+
+
+def _set_matrix(plug, matrix):
+    """为矩阵属性设置常量值"""
+    cmds.setAttr(plug, *matrix_to_list(matrix), type="matrix")
+
+
+def create_matrix_constraints(pairs, maintain_offset=True, translate=True, rotate=True, scale=True):
+    """
+    为一组 (驱动者, 被驱动者) 批量创建矩阵约束网络
+
+    参数:
+        pairs (list): (driver, driven) 元组列表
+        maintain_offset (bool): 是否保持偏移（偏移在创建时烘焙）
+        translate (bool): 是否约束平移
+        rotate (bool): 是否约束旋转
+        scale (bool): 是否约束缩放
+
+    返回:
+        list: 创建的矩阵节点名称列表
+    """
+    pairs = [(driver, driven) for driver, driven in pairs if driver != driven]
+    if not pairs or not (translate or rotate or scale):
+        return []
+
+    # 一次性解析所有节点并读取世界矩阵
+    drivers = [driver for driver, _ in pairs]
+    drivens = [driven for _, driven in pairs]
+    driver_paths = get_dag_paths(drivers)
+    driven_paths = get_dag_paths(drivens)
+
+    use_offset_parent = translate and rotate and scale
+    created_nodes = []
+
+    for driver, driven, driver_path, driven_path in zip(drivers, drivens, driver_paths, driven_paths):
+        driver_world = driver_path.inclusiveMatrix()
+        driven_world = driven_path.inclusiveMatrix()
+        base_name = driven.split("|")[-1]
+
+        # 保持偏移：被驱动者世界矩阵 = offset * 驱动者世界矩阵
+        offset = driven_world * driver_world.inverse() if maintain_offset else om2.MMatrix()
+
+        if use_offset_parent and _has_offset_parent_matrix(driven_path):
+            # 保留被驱动者现有的局部通道值，将其逆矩阵烘焙进常量偏移
+            local = _plug_matrix(driven_path, "matrix")
+            mult = cmds.createNode("multMatrix", name=f"{base_name}{MATRIX_CONSTRAINT_SUFFIX}_mm")
+            _set_matrix(f"{mult}.matrixIn[0]", local.inverse() * offset)
+            cmds.connectAttr(f"{driver}.worldMatrix[0]", f"{mult}.matrixIn[1]")
+            cmds.connectAttr(f"{driven}.parentInverseMatrix[0]", f"{mult}.matrixIn[2]")
+            cmds.connectAttr(f"{mult}.matrixSum", f"{driven}.offsetParentMatrix", force=True)
+            created_nodes.append(mult)
+            continue
+
+        # 分解模式：局部矩阵 = offset * 驱动者世界矩阵 * 父级逆矩阵 * offsetParentMatrix 逆矩阵
+        parent_offset_inverse = None
+        if _has_offset_parent_matrix(driven_path):
+            offset_parent = _plug_matrix(driven_path, "offsetParentMatrix")
+            if not offset_parent.isEquivalent(om2.MMatrix()):
+                parent_offset_inverse = offset_parent.inverse()
+
+        def build_network(suffix, extra_matrix=None):
+            mult = cmds.createNode("multMatrix", name=f"{base_name}{MATRIX_CONSTRAINT_SUFFIX}{suffix}_mm")
+            decompose = cmds.createNode("decomposeMatrix", name=f"{base_name}{MATRIX_CONSTRAINT_SUFFIX}{suffix}_dm")
+            _set_matrix(f"{mult}.matrixIn[0]", offset)
+            cmds.connectAttr(f"{driver}.worldMatrix[0]", f"{mult}.matrixIn[1]")
+            cmds.connectAttr(f"{driven}.parentInverseMatrix[0]", f"{mult}.matrixIn[2]")
+            index = 3
+            for constant in (parent_offset_inverse, extra_matrix):
+                if constant is not None:
+                    _set_matrix(f"{mult}.matrixIn[{index}]", constant)
+                    index += 1
+            cmds.connectAttr(f"{mult}.matrixSum", f"{decompose}.inputMatrix")
+            cmds.connectAttr(f"{driven}.rotateOrder", f"{decompose}.inputRotateOrder")
+            created_nodes.extend([mult, decompose])
+            return decompose
+
+        decompose = build_network("")
+        if translate:
+            cmds.connectAttr(f"{decompose}.outputTranslate", f"{driven}.translate", force=True)
+        if scale:
+            cmds.connectAttr(f"{decompose}.outputScale", f"{driven}.scale", force=True)
+        if rotate:
+            # 关节的 jointOrient 不为零时，旋转需要额外乘以 jointOrient 的逆矩阵
+            orient_matrix = _joint_orient_matrix(driven)
+            rotate_decompose = decompose if orient_matrix is None else build_network("Rot", orient_matrix.inverse())
+            cmds.connectAttr(f"{rotate_decompose}.outputRotate", f"{driven}.rotate", force=True)
+
+    return created_nodes
+
+
+def create_matrix_constraint(driver, driven, maintain_offset=True, translate=True, rotate=True, scale=True):
+    """为单个驱动者与被驱动者创建矩阵约束，参数同 create_matrix_constraints"""
+    return create_matrix_constraints([(driver, driven)], maintain_offset, translate, rotate, scale)
+
+
+def get_matrix_constraint_nodes(driven):
+    """获取直接驱动该物体的、由本工具创建的矩阵约束节点（multMatrix 与 decomposeMatrix）"""
+    sources = cmds.listConnections(driven, source=True, destination=False) or []
+    nodes = []
+    for node in sources:
+        if MATRIX_CONSTRAINT_SUFFIX not in node or node in nodes:
+            continue
+        nodes.append(node)
+        if cmds.nodeType(node) == "decomposeMatrix":
+            for mult in cmds.listConnections(f"{node}.inputMatrix", source=True, destination=False) or []:
+                if mult not in nodes:
+                    nodes.append(mult)
+    return nodes
+
+
+def get_matrix_constraint_driver(driven):
+    """获取矩阵约束的驱动者（连接到 multMatrix 的 worldMatrix 来源），未找到时返回 None"""
+    for node in get_matrix_constraint_nodes(driven):
+        if cmds.nodeType(node) != "multMatrix":
+            continue
+        plugs = cmds.listConnections(f"{node}.matrixIn", source=True, destination=False, plugs=True) or []
+        for plug in plugs:
+            if ".worldMatrix" in plug:
+                return plug.split(".")[0]
+    return None
+
+
+def get_matrix_constraint_channels(driven):
+    """
+    获取由本工具的矩阵网络驱动的通道
+
+    返回:
+        set: "translate" / "rotate" / "scale" 的集合，offsetParentMatrix 模式视为三个通道全部驱动
+    """
+    channels = set()
+    if cmds.attributeQuery("offsetParentMatrix", node=driven, exists=True):
+        sources = cmds.listConnections(f"{driven}.offsetParentMatrix", source=True, destination=False) or []
+        if any(MATRIX_CONSTRAINT_SUFFIX in node for node in sources):
+            channels.update(("translate", "rotate", "scale"))
+    for channel in ("translate", "rotate", "scale"):
+        sources = cmds.listConnections(f"{driven}.{channel}", source=True, destination=False) or []
+        if any(MATRIX_CONSTRAINT_SUFFIX in node for node in sources):
+            channels.add(channel)
+    return channels
+
+
+# 可转换的约束类型及其输出属性与对应的被驱动通道
+CONSTRAINT_OUTPUT_CHANNELS = {
+    "parentConstraint": (("constraintTranslate", "translate"), ("constraintRotate", "rotate")),
+    "pointConstraint": (("constraintTranslate", "translate"),),
+    "orientConstraint": (("constraintRotate", "rotate"),),
+    "scaleConstraint": (("constraintScale", "scale"),),
+}
+
+# 参与统计的求值类事件分类
+_PROFILER_EVALUATION_CATEGORIES = ("Evaluation", "Dirty Propagation")
+
+
+def _inspect_constraint(constraint):
+    """
+    分析约束节点是否可以被矩阵网络等价替换
+
+    返回:
+        tuple: (driver, driven, channels, reason)，无法转换时 driver 为 None，reason 为原因说明
+    """
+    constraint_type = cmds.nodeType(constraint)
+    query = getattr(cmds, constraint_type)
+    targets = query(constraint, query=True, targetList=True) or []
+    if len(targets) != 1:
+        return None, None, (), f"包含 {len(targets)} 个目标"
+
+    # 权重必须为 1 且没有被驱动
+    weight_aliases = query(constraint, query=True, weightAliasList=True) or []
+    for alias in weight_aliases:
+        plug = f"{constraint}.{alias}"
+        if cmds.listConnections(plug, source=True, destination=False):
+            return None, None, (), "权重被连接驱动"
+        if abs(cmds.getAttr(plug) - 1.0) > 1e-6:
+            return None, None, (), "权重不为 1"
+
+    driven = cmds.listConnections(f"{constraint}.constraintParentInverseMatrix",
+                                  source=True, destination=False)
+    if not driven:
+        return None, None, (), "未找到被约束物体"
+    driven = driven[0]
+
+    # 每个通道必须三个轴都直接连接到被约束物体，跳过部分轴的约束保持原样
+    driven_long = cmds.ls(driven, long=True)[0]
+    channels = []
+    for output_attr, channel in CONSTRAINT_OUTPUT_CHANNELS[constraint_type]:
+        connected_axes = 0
+        for axis in "XYZ":
+            plugs = cmds.listConnections(f"{constraint}.{output_attr}{axis}", source=False,
+                                         destination=True, plugs=True, fullNodeName=True) or []
+            if f"{driven_long}.{channel}{axis}" in plugs:
+                connected_axes += 1
+        if connected_axes == 3:
+            channels.append(channel)
+        elif connected_axes:
+            return None, None, (), f"{channel} 仅约束了部分轴"
+    if not channels:
+        return None, None, (), "没有直接连接的输出通道"
+
+    # 点约束跟随驱动者的旋转枢轴，矩阵网络跟随驱动者的 worldMatrix 平移；枢轴不为零时驱动者旋转后两者不一致
+    if constraint_type == "pointConstraint":
+        for attr in ("rotatePivot", "rotatePivotTranslate"):
+            if any(abs(value) > 1e-6 for value in cmds.getAttr(f"{targets[0]}.{attr}")[0]):
+                return None, None, (), f"驱动者的 {attr} 不为零"
+
+    return targets[0], driven, tuple(channels), None
+
+
+def _create_point_matrix_constraints(pairs):
+    """
+    为点约束创建等价的矩阵网络：平移 = 驱动者位置（父空间）+ 父空间常量偏移
+
+    偏移在父空间中叠加而不随驱动者旋转，与 pointConstraint 的保持偏移行为一致
+    """
+    pairs = [(driver, driven) for driver, driven in pairs if driver != driven]
+    if not pairs:
+        return []
+
+    drivers = [driver for driver, _ in pairs]
+    drivens = [driven for _, driven in pairs]
+    driver_paths = get_dag_paths(drivers)
+    driven_paths = get_dag_paths(drivens)
+    created_nodes = []
+
+    for driver, driven, driver_path, driven_path in zip(drivers, drivens, driver_paths, driven_paths):
+        base_name = driven.split("|")[-1]
+        source = driver_path.inclusiveMatrix() * driven_path.exclusiveMatrixInverse()
+        offset_parent = None
+        if _has_offset_parent_matrix(driven_path):
+            offset_parent = _plug_matrix(driven_path, "offsetParentMatrix")
+            if offset_parent.isEquivalent(om2.MMatrix()):
+                offset_parent = None
+            else:
+                source = source * offset_parent.inverse()
+
+        current = cmds.getAttr(f"{driven}.translate")[0]
+        offset = om2.MMatrix()
+        for axis in range(3):
+            offset.setElement(3, axis, current[axis] - source.getElement(3, axis))
+
+        mult = cmds.createNode("multMatrix", name=f"{base_name}{MATRIX_CONSTRAINT_SUFFIX}Point_mm")
+        decompose = cmds.createNode("decomposeMatrix", name=f"{base_name}{MATRIX_CONSTRAINT_SUFFIX}Point_dm")
+        cmds.connectAttr(f"{driver}.worldMatrix[0]", f"{mult}.matrixIn[0]")
+        cmds.connectAttr(f"{driven}.parentInverseMatrix[0]", f"{mult}.matrixIn[1]")
+        index = 2
+        if offset_parent is not None:
+            _set_matrix(f"{mult}.matrixIn[{index}]", offset_parent.inverse())
+            index += 1
+        _set_matrix(f"{mult}.matrixIn[{index}]", offset)
+        cmds.connectAttr(f"{mult}.matrixSum", f"{decompose}.inputMatrix")
+        cmds.connectAttr(f"{decompose}.outputTranslate", f"{driven}.translate", force=True)
+        created_nodes.extend([mult, decompose])
+
+    return created_nodes
+
+
+def _profile_evaluation(frame_count):
+    """
+    使用 Maya 性能分析器记录逐帧播放，返回平均每帧的求值耗时（毫秒）
+
+    同一时间段内多线程的事件会合并计算，避免并行求值时重复累计
+    """
+    start_frame = int(cmds.playbackOptions(query=True, minTime=True))
+    original_time = cmds.currentTime(query=True)
+    cmds.profiler(reset=True)
+    cmds.profiler(sampling=True)
+    try:
+        for frame in range(start_frame, start_frame + frame_count):
+            cmds.currentTime(frame, update=True)
+    finally:
+        cmds.profiler(sampling=False)
+        cmds.currentTime(original_time, update=True)
+
+    intervals = []
+    for index in range(cmds.profiler(eventCount=True)):
+        category = cmds.profiler(eventCategory=True, eventIndex=index)
+        if category not in _PROFILER_EVALUATION_CATEGORIES:
+            continue
+        start = float(cmds.profiler(eventStartTime=True, eventIndex=index))
+        duration = float(cmds.profiler(eventDuration=True, eventIndex=index))
+        intervals.append((start, start + duration))
+
+    # 合并重叠区间，得到求值实际占用的时间（微秒）
+    total = 0.0
+    current_start = current_end = None
+    for start, end in sorted(intervals):
+        if current_end is None or start > current_end:
+            if current_end is not None:
+                total += current_end - current_start
+            current_start, current_end = start, end
+        else:
+            current_end = max(current_end, end)
+    if current_end is not None:
+        total += current_end - current_start
+
+    return total / 1000.0 / frame_count if frame_count else 0.0
+
+
+def convert_constraints_to_matrix(constraints=None, profile_frames=60):
+    """
+    将场景中简单的单目标约束批量转换为矩阵约束网络
+
+    仅转换目标数量为 1、权重为 1 且三个轴都直接连接的约束；多目标、带权重或
+    只约束部分轴的约束会保留原样。保持偏移根据当前姿态重新计算并烘焙。
+
+    参数:
+        constraints (list): 要检查的约束节点，默认为场景中所有约束
+        profile_frames (int): 转换前后性能分析播放的帧数，为 0 时跳过分析
+
+    返回:
+        dict: {"converted": [...], "skipped": {constraint: reason}, "nodes": [...],
+               "before_ms": float, "after_ms": float}
+    """
+    if constraints is None:
+        constraints = cmds.ls(type=list(CONSTRAINT_OUTPUT_CHANNELS)) or []
+
+    # 按被约束物体与驱动者归并，同一驱动者的父子约束与缩放约束合并为一个网络
+    plans = {}
+    skipped = {}
+    for constraint in constraints:
+        if not cmds.objExists(constraint) or cmds.nodeType(constraint) not in CONSTRAINT_OUTPUT_CHANNELS:
+            continue
+        driver, driven, channels, reason = _inspect_constraint(constraint)
+        if driver is None:
+            skipped[constraint] = reason
+            continue
+        plan = plans.setdefault((driver, driven), {"constraints": [], "channels": set(), "point": False})
+        if plan["channels"].intersection(channels):
+            skipped[constraint] = "与其他约束驱动了相同通道"
+            continue
+        plan["constraints"].append(constraint)
+        plan["channels"].update(channels)
+        if cmds.nodeType(constraint) == "pointConstraint":
+            plan["point"] = True
+
+    result = {"converted": [], "skipped": skipped, "nodes": [], "before_ms": None, "after_ms": None}
+    if not plans:
+        cmds.warning("没有找到可以转换为矩阵约束的单目标约束")
+        return result
+
+    if profile_frames:
+        result["before_ms"] = _profile_evaluation(profile_frames)
+
+    # 删除约束后通道保留当前值，矩阵网络据此重新计算偏移
+    channel_batches = {}
+    point_pairs = []
+    for (driver, driven), plan in plans.items():
+        cmds.delete(plan["constraints"])
+        result["converted"].extend(plan["constraints"])
+        channels = set(plan["channels"])
+        if plan["point"]:
+            point_pairs.append((driver, driven))
+            channels.discard("translate")
+        if channels:
+            channel_batches.setdefault(frozenset(channels), []).append((driver, driven))
+
+    for channels, pairs in channel_batches.items():
+        result["nodes"].extend(create_matrix_constraints(
+            pairs,
+            maintain_offset=True,
+            translate="translate" in channels,
+            rotate="rotate" in channels,
+            scale="scale" in channels
+        ))
+    result["nodes"].extend(_create_point_matrix_constraints(point_pairs))
+
+    print(f"已将 {len(result['converted'])} 个约束转换为 {len(result['nodes'])} 个矩阵节点，"
+          f"跳过 {len(skipped)} 个约束")
+    for constraint, reason in skipped.items():
+        print(f"  保留约束 '{constraint}'：{reason}")
+
+    if profile_frames:
+        result["after_ms"] = _profile_evaluation(profile_frames)
+        before, after = result["before_ms"], result["after_ms"]
+        speedup = before / after if after else 0.0
+        print(f"性能分析（{profile_frames} 帧）：转换前每帧求值 {before:.3f} ms，"
+              f"转换后 {after:.3f} ms（提升 {speedup:.2f} 倍）")
+
+    return result
+
+
+def _measure_playback_fps(probe_node, start_frame, end_frame):
+    """逐帧切换时间并强制求值，返回平均帧率"""
+    frame_count = end_frame - start_frame + 1
+    start_time = time.perf_counter()
+    for frame in range(start_frame, end_frame + 1):
+        cmds.currentTime(frame, update=True)
+        cmds.getAttr(f"{probe_node}.worldMatrix[0]")
+    elapsed = time.perf_counter() - start_time
+    return frame_count / elapsed if elapsed > 0 else 0.0
+
+
+def _build_benchmark_chain(joint_count, mode, frames):
+    """创建用于性能测试的 FK 控制链与骨骼链，返回 (需清理的节点列表, 最后一个关节)"""
+    root = cmds.group(empty=True, name=f"benchmark_{mode}_grp")
+    joints = []
+    ctrls = []
+    cmds.select(clear=True)
+    for i in range(joint_count):
+        joint = cmds.joint(name=f"benchmark_{mode}_jnt_{i + 1:03d}", position=(i, 0, 0))
+        joints.append(joint)
+    cmds.parent(joints[0], root)
+
+    parent = root
+    for i in range(joint_count):
+        ctrl = cmds.group(empty=True, name=f"benchmark_{mode}_ctrl_{i + 1:03d}", parent=parent)
+        cmds.setAttr(f"{ctrl}.translateX", 0 if i == 0 else 1)
+        ctrls.append(ctrl)
+        parent = ctrl
+
+    # 为每个控制器设置旋转动画，确保每帧整条链都需要重新求值
+    for ctrl in ctrls:
+        cmds.setKeyframe(ctrl, attribute="rotateY", time=1, value=0)
+        cmds.setKeyframe(ctrl, attribute="rotateY", time=frames, value=2)
+
+    pairs = list(zip(ctrls, joints))
+    cleanup_nodes = [root]
+    if mode == "constraint":
+        for ctrl, joint in pairs:
+            cmds.parentConstraint(ctrl, joint, maintainOffset=True)
+            cmds.scaleConstraint(ctrl, joint, maintainOffset=True)
+    else:
+        cleanup_nodes.extend(create_matrix_constraints(pairs, maintain_offset=True))
+    return cleanup_nodes, joints[-1]
+
+
+def benchmark_constraint_modes(joint_count=500, frames=120):
+    """
+    比较约束节点与矩阵约束网络在指定长度骨骼链上的播放帧率
+
+    参数:
+        joint_count (int): 骨骼链长度，默认 500
+        frames (int): 测试帧数
+
+    返回:
+        dict: {"constraint": fps, "matrix": fps}
+    """
+    results = {}
+    original_time = cmds.currentTime(query=True)
+    for mode in ("constraint", "matrix"):
+        cleanup_nodes, probe = _build_benchmark_chain(joint_count, mode, frames)
+        try:
+            # 预热一次，避免首次求值的开销影响结果
+            _measure_playback_fps(probe, 1, min(frames, 5))
+            results[mode] = _measure_playback_fps(probe, 1, frames)
+        finally:
+            cmds.delete([node for node in cleanup_nodes if cmds.objExists(node)])
+    cmds.currentTime(original_time, update=True)
+
+    speedup = results["matrix"] / results["constraint"] if results["constraint"] else 0.0
+    print(f"{joint_count} 个关节的骨骼链播放性能：约束节点 {results['constraint']:.1f} fps，"
+          f"矩阵约束 {results['matrix']:.1f} fps（提升 {speedup:.2f} 倍）")
+    return results
+
+
+if __name__ == "__main__":
+    benchmark_constraint_modes()
@@ -0,0 +1,188 @@
+# -*- coding: utf-8 -*-
+"""
+最近目标吸附工具
+在候选目标（骨骼、定位器或模型顶点）上建立 KD 树，为每个选中的控制器层级查找容差范围内最近的目标，
+一次性批量写入变换，并报告未匹配（超出容差）与有歧义（两个目标距离相近或多个控制器争用同一目标）的控制器。
+
+作者: CK Tool
+"""
+
+import maya.cmds as cmds
+import maya.api.OpenMaya as om2
+
+from common_utils import get_dag_paths, get_world_matrices, match_world_transforms, set_world_transforms
+
+TARGET_TYPES = ("joint", "locator", "vertex")
+# 次近目标距离小于最近距离的该倍数时视为有歧义
+AMBIGUITY_RATIO = 1.1
+
+
+class KDTree(object):
+    """三维 KD 树，nearest() 返回距离最近的若干个点"""
+
+    def __init__(self, points):
+        self.points = points
+        self.root = self._build(list(range(len(points))), 0)
+
+    def _build(self, indices, depth):
+        if not indices:
+            return None
+        axis = depth % 3
+        indices.sort(key=lambda i: self.points[i][axis])
+        middle = len(indices) // 2
+        return (indices[middle], axis,
+                self._build(indices[:middle], depth + 1),
+                self._build(indices[middle + 1:], depth + 1))
+
+    def nearest(self, point, count=2):
+        """
+        查找最近的 count 个点
+
+        返回:
+            list: 按距离从小到大排列的 (距离, 点索引)
+        """
+        best = []
+
+        def visit(node):
+            if node is None:
+                return
+            index, axis, left, right = node
+            target = self.points[index]
+            distance = sum((point[i] - target[i]) ** 2 for i in range(3)) ** 0.5
+            if len(best) < count or distance < best[-1][0]:
+                best.append((distance, index))
+                best.sort()
+                del best[count:]
+            delta = point[axis] - target[axis]
+            near, far = (left, right) if delta < 0 else (right, left)
+            visit(near)
+            if len(best) < count or abs(delta) < best[-1][0]:
+                visit(far)
+
+        visit(self.root)
+        return best
+
+
+def find_stack_root(node):
+    """返回控制器上方最近的 zero 组（嵌套的 FK 层级中只移动控制器自身的层级；不存在时返回节点本身）"""
+    full = node if node.startswith("|") else cmds.ls(node, long=True)[0]
+    parts = full.split("|")
+    for depth in range(len(parts) - 1, 0, -1):
+        if parts[depth].startswith("zero"):
+            return "|".join(parts[:depth + 1])
+    return full
+
+
+def collect_targets(target_type, meshes=None, exclude_roots=()):
+    """
+    收集候选目标
+
+    参数:
+        target_type (str): "joint"、"locator" 或 "vertex"
+        meshes (list): 顶点模式下的模型
+        exclude_roots (list): 排除位于这些层级下的目标（避免匹配到控制器层级内的骨骼）
+
+    返回:
+        tuple: (目标名称列表, 世界坐标列表)
+    """
+    if target_type == "vertex":
+        names, positions = [], []
+        for path in get_dag_paths(meshes or []):
+            if path.apiType() != om2.MFn.kMesh:
+                path.extendToShape()
+            name = path.fullPathName()
+            for index, p in enumerate(om2.MFnMesh(path).getPoints(om2.MSpace.kWorld)):
+                names.append(f"{name}.vtx[{index}]")
+                positions.append((p.x, p.y, p.z))
+        return names, positions
+
+    if target_type == "locator":
+        shapes = cmds.ls(type="locator", long=True, noIntermediate=True) or []
+        names = list(dict.fromkeys(shape.rsplit("|", 1)[0] for shape in shapes))
+    else:
+        names = cmds.ls(type="joint", long=True) or []
+    names = [name for name in names if not any(name == root or name.startswith(root + "|") for root in exclude_roots)]
+    positions = [(m[12], m[13], m[14]) for m in get_world_matrices(names)]
+    return names, positions
+
+
+def pair_nearest(source_positions, target_positions, tolerance, ambiguity_ratio=AMBIGUITY_RATIO):
+    """
+    为每个源位置配对最近的目标
+
+    返回:
+        tuple: (matches {源索引: 目标索引}, unmatched [源索引], ambiguous [(源索引, 原因)])
+    """
+    matches, unmatched, ambiguous = {}, [], []
+    if not target_positions:
+        return matches, list(range(len(source_positions))), ambiguous
+
+    tree = KDTree(target_positions)
+    claims = {}
+    for source, position in enumerate(source_positions):
+        found = tree.nearest(position, 2)
+        distance, target = found[0]
+        if distance > tolerance:
+            unmatched.append(source)
+        elif len(found) > 1 and found[1][0] <= tolerance and found[1][0] <= distance * ambiguity_ratio + 1e-6:
+            ambiguous.append((source, "两个目标距离相近"))
+        else:
+            claims.setdefault(target, []).append((distance, source))
+
+    # 多个控制器争用同一目标时只保留最近的一个
+    for target, claimants in claims.items():
+        claimants.sort()
+        matches[claimants[0][1]] = target
+        for _, source in claimants[1:]:
+            ambiguous.append((source, "与其他控制器争用同一目标"))
+    return matches, unmatched, ambiguous
+
+
+def snap_to_nearest(nodes, target_type="joint", tolerance=1.0, meshes=None,
+                    position=True, rotation=True, scale=False):
+    """
+    将控制器层级吸附到最近的目标：以控制器的世界位置查找目标，写入其上方最近的 zero 组
+
+    参数:
+        nodes (list): 控制器列表
+        target_type (str): "joint"、"locator" 或 "vertex"（顶点只匹配平移）
+        tolerance (float): 最大吸附距离
+        meshes (list): 顶点模式下的模型
+
+    返回:
+        dict: {"snapped": [(层级根, 目标)], "unmatched": [控制器], "ambiguous": [(控制器, 原因)]}
+    """
+    nodes = (cmds.ls(nodes, long=True) or []) if nodes else []
+    if not nodes:
+        return {"snapped": [], "unmatched": [], "ambiguous": []}
+    roots = [find_stack_root(node) for node in nodes]
+    source_positions = [(m[12], m[13], m[14]) for m in get_world_matrices(nodes)]
+    names, target_positions = collect_targets(target_type, meshes, exclude_roots=roots)
+    matches, unmatched, ambiguous = pair_nearest(source_positions, target_positions, tolerance)
+
+    # 多个控制器解析到同一层级根时只吸附第一个，避免后写入的覆盖前者
+    claimed = set()
+    for source in sorted(matches):
+        if roots[source] in claimed:
+            del matches[source]
+            ambiguous.append((source, "与其他控制器共用同一层级根"))
+        else:
+            claimed.add(roots[source])
+
+    # 全部层级根在一个修改器中一次写入（嵌套层级的子级基于已吸附的父级计算）
+    ordered = sorted(matches.items(), key=lambda item: roots[item[0]].count("|"))
+    snapped = [(roots[source], names[target]) for source, target in ordered]
+    if target_type == "vertex":
+        if position:
+            matrices = []
+            for _, target in ordered:
+                xform = om2.MTransformationMatrix()
+                xform.setTranslation(om2.MVector(*target_positions[target]), om2.MSpace.kWorld)
+                matrices.append(xform.asMatrix())
+            set_world_transforms([root for root, _ in snapped], matrices, position=True, rotation=False)
+    else:
+        match_world_transforms(snapped, position, rotation, scale)
+
+    return {"snapped": snapped,
+            "unmatched": [nodes[i] for i in unmatched],
+            "ambiguous": [(nodes[i], reason) for i, reason in ambiguous]}
@@ -2,13 +2,20 @@ import maya.cmds as cmds
 import random
 import colorsys
 
+import color_scheme
+
+GOLDEN_RATIO = 0.61803398875
+# 调色板模式：固定数量的颜色，每种颜色只对应一个材质，重复着色时复用场景中已有的材质
+PALETTE_SIZE = 32
+PALETTE_PREFIX = "ckPalette"
+SURFACE_TYPES = ('mesh', 'nurbsSurface')
+
 def generate_golden_ratio_color():
     """
     使用黄金比例生成均匀随机颜色。
     每次在色相环上偏移黄金比例 (≈0.618)，颜色分布更均匀。
     """
-    golden_ratio = 0.61803398875
-    h = (random.random() + golden_ratio) % 1.0
+    h = (random.random() + GOLDEN_RATIO) % 1.0
     s = random.uniform(0.4, 0.9)
     v = random.uniform(0.5, 1.0)
     r, g, b = colorsys.hsv_to_rgb(h, s, v)
@@ -24,11 +31,71 @@ def get_object_type(obj):
         return shape_type
     return 'other'
 
-def assign_random_colors():
+def generate_palette(size=PALETTE_SIZE):
+    """
+    生成固定数量、色相按黄金比例均匀分布的调色板。
+    相邻颜色的色相相差约 0.618 圈，饱和度与明度交替变化，颜色数量较多时也容易区分。
+    """
+    palette = []
+    for i in range(size):
+        h = (i * GOLDEN_RATIO) % 1.0
+        s = (0.8, 0.55)[i % 2]
+        v = (0.95, 0.75)[(i // 2) % 2]
+        r, g, b = colorsys.hsv_to_rgb(h, s, v)
+        palette.append((round(r, 3), round(g, 3), round(b, 3)))
+    return palette
+
+def get_palette_shading_group(index, rgb):
+    """
+    返回调色板颜色对应的着色组：场景中已存在时直接复用，否则创建一个 lambert 与着色组。
+    """
+    shader_name = "{}_{:02d}_mat".format(PALETTE_PREFIX, index)
+    shading_group = shader_name + "SG"
+    if cmds.objExists(shading_group) and cmds.objExists(shader_name):
+        return shading_group
+
+    if not cmds.objExists(shader_name):
+        shader_name = cmds.shadingNode('lambert', asShader=True, name=shader_name)
+    cmds.setAttr(shader_name + ".color", *rgb, type="double3")
+    shading_group = cmds.sets(renderable=True, noSurfaceShader=True, empty=True, name=shading_group)
+    cmds.connectAttr(shader_name + ".outColor", shading_group + ".surfaceShader", f=True)
+    return shading_group
+
+def create_random_shading_group(rgb):
+    """为单个颜色创建新的 lambert 与着色组（非调色板模式）"""
+    shader_name = cmds.shadingNode('lambert', asShader=True, name="goldenColor_mat#")
+    cmds.setAttr(shader_name + ".color", *rgb, type="double3")
+    shading_group = cmds.sets(renderable=True, noSurfaceShader=True,
+                              empty=True, name=shader_name + "SG")
+    cmds.connectAttr(shader_name + ".outColor", shading_group + ".surfaceShader", f=True)
+    return shading_group
+
+def collect_shapes(objects):
+    """
+    一次查询全部物体的非中间形状，按所属物体分组（保持选择顺序），并一次查询其中的表面形状
+
+    返回:
+        tuple: ({物体: [形状]}, 表面形状集合)
+    """
+    shapes_by_object = dict((obj, []) for obj in objects)
+    shapes = cmds.ls(objects, dag=True, shapes=True, long=True, noIntermediate=True) or []
+    for shape in shapes:
+        parent = shape.rsplit('|', 1)[0]
+        if parent in shapes_by_object:
+            shapes_by_object[parent].append(shape)
+    surfaces = set(cmds.ls(shapes, type=list(SURFACE_TYPES), long=True) or []) if shapes else set()
+    return shapes_by_object, surfaces
+
+def assign_random_colors(palette=True, palette_size=PALETTE_SIZE):
     """
     为选中的物体分配基于黄金比例的随机颜色。
     支持：mesh、nurbsSurface、curve、locator。
     保留原函数名以兼容调用。
+
+    参数:
+        palette (bool): 调色板模式，从固定数量的颜色中选取，材质数量不超过 palette_size 并在重复着色时复用；
+                        关闭时每个物体生成独立的随机颜色与材质
+        palette_size (int): 调色板颜色数量
     """
     selected_objects = cmds.ls(selection=True, long=True)
     if not selected_objects:
@@ -37,51 +104,55 @@ def assign_random_colors():
 
     cmds.undoInfo(openChunk=True)
     processed_count = 0
-    shader_cache = {}
+    # 着色组 -> 形状列表，最后每个着色组只执行一次 sets -forceElement
+    surfaces_by_group = {}
+    override_colors = []
 
     try:
-        for obj in selected_objects:
-            obj_type = get_object_type(obj)
-            shapes = cmds.listRelatives(obj, shapes=True, fullPath=True) or []
+        colors = generate_palette(palette_size) if palette else None
+        palette_groups = {}
+        shader_cache = {}
+        # 调色板模式从随机起点依次取色，相邻物体的颜色相差较大
+        start = random.randrange(palette_size) if palette else 0
+
+        shapes_by_object, surface_shapes = collect_shapes(selected_objects)
+        for i, (obj, shapes) in enumerate(shapes_by_object.items()):
             if not shapes:
                 continue
 
-            # 生成颜色（黄金比例）
-            rgb = generate_golden_ratio_color()
+            if palette:
+                index = (start + i) % palette_size
+                rgb = colors[index]
+            else:
+                # 生成颜色（黄金比例）
+                rgb = generate_golden_ratio_color()
 
-            if obj_type in ['mesh', 'nurbsSurface']:
-                # 缓存相同颜色的材质，避免重复创建
-                if rgb in shader_cache:
-                    shading_group = shader_cache[rgb]
+            if shapes[0] in surface_shapes:
+                surfaces = [shape for shape in shapes if shape in surface_shapes]
+                if palette:
+                    if index not in palette_groups:
+                        palette_groups[index] = get_palette_shading_group(index, rgb)
+                    shading_group = palette_groups[index]
                 else:
-                    shader_name = cmds.shadingNode('lambert', asShader=True, name="goldenColor_mat#")
-                    cmds.setAttr(shader_name + ".color", *rgb, type="double3")
-
-                    shading_group = cmds.sets(renderable=True, noSurfaceShader=True,
-                                              empty=True, name=shader_name + "SG")
-                    cmds.connectAttr(shader_name + ".outColor", shading_group + ".surfaceShader", f=True)
-                    shader_cache[rgb] = shading_group
-
-                for shape in shapes:
-                    if cmds.nodeType(shape) in ['mesh', 'nurbsSurface']:
-                        cmds.sets(shape, e=True, forceElement=shading_group)
-                        processed_count += 1
-
+                    # 缓存相同颜色的材质，避免重复创建
+                    if rgb not in shader_cache:
+                        shader_cache[rgb] = create_random_shading_group(rgb)
+                    shading_group = shader_cache[rgb]
+                surfaces_by_group.setdefault(shading_group, []).extend(surfaces)
+                processed_count += len(surfaces)
             else:
-                # 对曲线和定位器使用 override RGB 颜色
-                for shape in shapes:
-                    try:
-                        cmds.setAttr(shape + ".overrideEnabled", 1)
-                        cmds.setAttr(shape + ".overrideRGBColors", 1)
-                        cmds.setAttr(shape + ".overrideColorRGB", *rgb, type='double3')
-                        processed_count += 1
-                    except Exception:
-                        cmds.warning("无法设置颜色: {}".format(shape))
+                # 对曲线和定位器使用 override RGB 颜色（最后一次批量写入）
+                override_colors.append((obj, rgb))
+
+        for shading_group, surfaces in surfaces_by_group.items():
+            cmds.sets(surfaces, e=True, forceElement=shading_group)
+        processed_count += color_scheme.set_override_colors(override_colors)
     finally:
         cmds.undoInfo(closeChunk=True)
 
     cmds.select(clear=True)
-    print("已为 {} 个 shape 赋予 Golden Ratio 随机颜色".format(processed_count))
+    mode = "调色板 ({} 色，{} 个材质)".format(palette_size, len(surfaces_by_group)) if palette else "Golden Ratio 随机颜色"
+    print("已为 {} 个 shape 赋予 {}".format(processed_count, mode))
 
 # 兼容：保留增强版函数名（如其他脚本引用）
 def assign_random_colors_golden():
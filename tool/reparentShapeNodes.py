@@ -1,6 +1,9 @@
 import maya.cmds as cmds
 
-def reparent_shape_nodes():
+import shared_shapes
+
+def reparent_shape_nodes(shared=False):
+    """将源物体的形状节点添加到最后选择的目标物体下，shared 为 True 时以实例方式共享而不复制"""
     # 获取当前选择
     selection = cmds.ls(selection=True, type="transform")
     if len(selection) < 2:
@@ -19,7 +22,13 @@ def reparent_shape_nodes():
     # 遍历源物体，复制它们的形状节点并添加到目标物体
     for obj in source_objects:
         shapes = cmds.listRelatives(obj, shapes=True, fullPath=True)
-        if shapes:
+        if shapes and shared:
+            # 与控制器创建、FK层级相同的共享形状方式：以实例方式追加源形状，不复制（共享键随形状节点保留）
+            shared_shapes.instance_shapes(obj, [target_parent], replace=False)
+            total_shapes_count += len(shapes)
+            success_count += 1
+            print(f"已将 {obj} 的 {len(shapes)} 个形状节点共享到 {target_parent}")
+        elif shapes:
             try:
                 # 复制整个物体（包含形状节点）
                 duplicated_obj = cmds.duplicate(obj, returnRootsOnly=True)[0]
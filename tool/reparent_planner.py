@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+"""
+批量父级规划工具
+收集 (子节点, 新父级, 是否保持世界变换) 操作，按目标父级分组，一次读取世界矩阵，
+再通过单个 MDagModifier.reparentNode 批量执行，避免逐个 cmds.parent 反复计算补偿并发送 DAG 变更通知。
+
+作者: CK Tool
+"""
+
+import maya.cmds as cmds
+import maya.api.OpenMaya as om2
+
+import api_modifier
+from common_utils import get_dag_paths, matrix_to_list
+
+
+def _full_path(obj):
+    return om2.MDagPath.getAPathTo(obj).fullPathName()
+
+
+class ReparentPlanner(object):
+    """
+    父级操作规划器：add() 记录操作，execute() 一次性执行
+
+    已位于目标父级下的节点会被跳过，moved 记录实际改变父级的节点数量。
+    保持世界变换的骨骼使用按目标父级分组的 cmds.parent，以保留 Maya 写入 jointOrient 的补偿方式。
+    """
+
+    def __init__(self):
+        self.operations = []
+        self.moved = 0
+
+    def add(self, child, parent, preserve_world=True):
+        """记录一次父级操作，parent 为 None 时放到世界下"""
+        self.operations.append((child, parent, preserve_world))
+
+    def _plan(self):
+        """解析全部节点并按目标父级分组，返回 {父级完整路径: (父级 MObject, [(子节点 MObject, 是否保持世界变换, 世界矩阵)])}"""
+        children = get_dag_paths([child for child, _, _ in self.operations])
+        parent_names = [parent for _, parent, _ in self.operations if parent]
+        parent_paths = dict(zip(parent_names, get_dag_paths(parent_names)))
+
+        groups = {}
+        for (child, parent, preserve_world), child_path in zip(self.operations, children):
+            child_full = child_path.fullPathName()
+            parent_full = parent_paths[parent].fullPathName() if parent else ""
+            if parent_full == child_full or parent_full.startswith(child_full + "|"):
+                cmds.warning(f"无法将 '{child}' 父级到其自身或其子级 '{parent}'，已跳过")
+                continue
+            if child_full.rsplit("|", 1)[0] == parent_full:
+                continue
+            entry = (child_path.node(), preserve_world, child_path.inclusiveMatrix())
+            groups.setdefault(parent_full, (parent_paths[parent].node() if parent else om2.MObject.kNullObj, []))
+            groups[parent_full][1].append(entry)
+        return groups
+
+    def execute(self):
+        """
+        执行全部父级操作
+
+        返回:
+            list: 与记录顺序一致的子节点完整路径（跳过的无效操作保持原路径）
+        """
+        handles = [om2.MObjectHandle(path.node()) for path in get_dag_paths([op[0] for op in self.operations])]
+        groups = self._plan()
+
+        modifier = om2.MDagModifier()
+        compensate = []
+        joint_groups = {}
+        for parent_full, (parent_obj, entries) in groups.items():
+            for child_obj, preserve_world, world_matrix in entries:
+                if preserve_world and child_obj.hasFn(om2.MFn.kJoint):
+                    joint_groups.setdefault(parent_full, []).append(om2.MObjectHandle(child_obj))
+                    continue
+                modifier.reparentNode(child_obj, parent_obj)
+                if preserve_world:
+                    compensate.append((om2.MObjectHandle(child_obj), world_matrix))
+                self.moved += 1
+
+        if self.moved:
+            api_modifier.execute(modifier)
+
+        # 父级越浅越先恢复世界变换，保证子级补偿基于已恢复的父级
+        compensate.sort(key=lambda item: _full_path(item[0].object()).count("|"))
+        for handle, world_matrix in compensate:
+            cmds.xform(_full_path(handle.object()), worldSpace=True, matrix=matrix_to_list(world_matrix))
+
+        for parent_full, joint_handles in joint_groups.items():
+            joints = [_full_path(handle.object()) for handle in joint_handles]
+            if parent_full:
+                cmds.parent(joints, parent_full)
+            else:
+                cmds.parent(joints, world=True)
+            self.moved += len(joints)
+
+        return [_full_path(handle.object()) for handle in handles]
+
+
+def reparent_nodes(operations):
+    """
+    批量执行父级操作
+
+    参数:
+        operations (list): (子节点, 新父级或 None, 是否保持世界变换) 元组列表
+
+    返回:
+        list: 与输入顺序一致的子节点新完整路径
+    """
+    planner = ReparentPlanner()
+    for child, parent, preserve_world in operations:
+        planner.add(child, parent, preserve_world)
+    return planner.execute()
@@ -0,0 +1,296 @@
+# -*- coding: utf-8 -*-
+"""
+声明式控制器规格（JSON / YAML）与批量构建
+规格文件列出所有控制器（名称、侧面、形状、大小、颜色、父级、目标物体、约束方式、标签），
+加载并校验后按现有的命名与层级规范（zero/driven/connect/offset/ctrl/output）一次性批量构建。
+
+规格示例:
+    {
+        "version": 1,
+        "root": "grp_controls",
+        "compact_tags": false,
+        "defaults": {"shape": "circle", "size": 1.0, "sub": false, "constraint": "parent"},
+        "controllers": [
+            {"name": "spine", "side": "m", "target": "jnt_m_spine_001"},
+            {"name": "arm", "side": "l", "index": 1, "shape": "cube", "size": 2,
+             "color": [0.0, 0.3, 1.0], "parent": "ctrl_m_spine_001",
+             "target": "jnt_l_arm_001", "constraint": "matrix", "tags": ["arm", "fk"]}
+        ]
+    }
+
+作者: CK Tool
+"""
+
+import json
+import os
+
+import maya.cmds as cmds
+
+try:
+    import yaml
+except ImportError:
+    yaml = None
+
+from controllers import controller_shapes
+import matrix_constraint
+import reparent_planner
+import sub_controller_builder
+import tag_storage
+import tag_index
+import tag_query
+import color_scheme
+from common_utils import match_world_transforms
+
+SPEC_VERSION = 1
+VALID_SIDES = ("l", "r", "m", "none")
+VALID_SHAPES = ("sphere", "cube", "circle", "arrow", "gear", "cone", "cross", "diamond", "rectangle", "square")
+VALID_CONSTRAINTS = ("none", "parent", "point", "orient", "scale", "parent+scale", "matrix")
+DEFAULTS = {"side": "m", "index": 1, "shape": "circle", "size": 1.0, "color": None,
+            "parent": None, "target": None, "constraint": "none", "sub": False, "tags": []}
+
+
+def load_spec(path):
+    """
+    读取 JSON / YAML 规格文件（YAML 需要安装 PyYAML）
+
+    返回:
+        dict: 规格内容
+    """
+    extension = os.path.splitext(path)[1].lower()
+    with open(path, "r", encoding="utf-8") as f:
+        if extension in (".yaml", ".yml"):
+            if yaml is None:
+                raise ImportError("读取 YAML 规格需要安装 PyYAML，请改用 JSON 格式")
+            return yaml.safe_load(f)
+        return json.load(f)
+
+
+def _names(entry):
+    """根据命名规范生成组件各节点名称"""
+    side = f"_{entry['side']}" if entry["side"] != "none" else ""
+    body = f"{side}_{entry['name']}_{int(entry['index']):03d}"
+    ctrl = f"ctrl{body}"
+    return {
+        "zero": f"zero{body}",
+        "groups": [f"driven{body}", f"connect{body}", f"offset{body}"],
+        "ctrl": ctrl,
+        "sub": f"{ctrl}Sub",
+        "output": f"output{body}",
+    }
+
+
+def normalize_spec(spec):
+    """合并默认值，返回完整的控制器条目列表（含规划好的节点名称）"""
+    defaults = dict(DEFAULTS)
+    defaults.update(spec.get("defaults") or {})
+    entries = []
+    for item in spec.get("controllers") or []:
+        entry = dict(defaults)
+        entry.update(item)
+        entry["side"] = str(entry["side"]).lower()
+        entry["shape"] = str(entry["shape"]).lower()
+        entry["constraint"] = str(entry["constraint"]).lower()
+        entry["names"] = _names(entry)
+        entries.append(entry)
+    return entries
+
+
+def validate_spec(spec):
+    """
+    校验规格内容
+
+    返回:
+        list: 错误信息列表，为空表示校验通过
+    """
+    if not isinstance(spec, dict) or not isinstance(spec.get("controllers"), list):
+        return ["规格必须是包含 controllers 列表的字典"]
+    if spec.get("version", SPEC_VERSION) != SPEC_VERSION:
+        return [f"不支持的规格版本: {spec.get('version')}（当前支持 {SPEC_VERSION}）"]
+
+    defaults = spec.get("defaults") or {}
+    if not isinstance(defaults, dict):
+        return ["defaults 必须是字典"]
+
+    errors = []
+    for i, item in enumerate(spec["controllers"]):
+        label = f"第 {i + 1} 个控制器"
+        if not isinstance(item, dict) or not item.get("name"):
+            errors.append(f"{label}缺少 name")
+            continue
+        # 在 normalize_spec 之前检查类型（合并默认值后），避免规划名称时抛出异常
+        merged = dict(DEFAULTS, **defaults)
+        merged.update(item)
+        index = merged["index"]
+        if isinstance(index, bool) or not isinstance(index, int) or index < 0:
+            errors.append(f"{label} ({item['name']}): index 应为非负整数")
+        size = merged["size"]
+        if isinstance(size, bool) or not isinstance(size, (int, float)) or size <= 0:
+            errors.append(f"{label} ({item['name']}): size 应为正数")
+        tags = merged["tags"]
+        if not isinstance(tags, list) or not all(isinstance(tag, str) and tag_query.is_tag_name(tag)
+                                                 for tag in tags):
+            errors.append(f"{label} ({item['name']}): tags 应为合法 Tag 名称的列表")
+    if errors:
+        return errors
+
+    entries = normalize_spec(spec)
+    ctrl_names = [entry["names"]["ctrl"] for entry in entries]
+    seen = set()
+    for entry in entries:
+        label = entry["names"]["ctrl"]
+        if label in seen:
+            errors.append(f"控制器名称重复: {label}")
+        seen.add(label)
+        if entry["side"] not in VALID_SIDES:
+            errors.append(f"{label}: 无效的侧面 '{entry['side']}'，应为 {', '.join(VALID_SIDES)}")
+        if entry["shape"] not in VALID_SHAPES:
+            errors.append(f"{label}: 无效的形状 '{entry['shape']}'")
+        if entry["constraint"] not in VALID_CONSTRAINTS:
+            errors.append(f"{label}: 无效的约束方式 '{entry['constraint']}'")
+        if entry["constraint"] != "none" and not entry["target"]:
+            errors.append(f"{label}: 指定了约束方式但缺少 target")
+        color = entry["color"]
+        if color is not None and not isinstance(color, int) and not (
+                isinstance(color, (list, tuple)) and len(color) == 3):
+            errors.append(f"{label}: color 应为颜色索引或 [r, g, b]")
+        parent = entry["parent"]
+        if parent and parent not in ctrl_names and not cmds.objExists(parent):
+            errors.append(f"{label}: 父级 '{parent}' 既不在规格中也不在场景中")
+        if entry["target"] and not cmds.objExists(entry["target"]):
+            errors.append(f"{label}: 目标物体 '{entry['target']}' 不存在")
+        planned = [entry["names"]["zero"]] + entry["names"]["groups"] + [label]
+        if entry["sub"]:
+            planned += [entry["names"]["sub"], entry["names"]["output"]]
+        existing = [name for name in planned if cmds.objExists(name)]
+        if existing:
+            errors.append(f"{label}: 场景中已存在同名节点 {', '.join(existing)}")
+
+    # 规格内部的父级链不能成环，否则全部节点创建后批量设置父级才会失败
+    parents = {entry["names"]["ctrl"]: entry["parent"] for entry in entries if entry["parent"] in seen}
+    reported = set()
+    for start in parents:
+        chain = []
+        node = start
+        while node in parents and node not in chain:
+            chain.append(node)
+            node = parents[node]
+        if node in chain:
+            cycle = chain[chain.index(node):]
+            if not reported.intersection(cycle):
+                reported.update(cycle)
+                errors.append(f"父级关系成环: {' -> '.join(cycle + [node])}")
+    return errors
+
+
+def _entry_color(entry):
+    """规格中的颜色：索引、RGB，或按侧面的默认索引（与按名称着色规则一致）"""
+    color = entry["color"]
+    if color is None:
+        return color_scheme.SIDE_COLOR_INDEX.get(entry["side"], 17)
+    return color if isinstance(color, int) else tuple(color)
+
+
+def _apply_constraints(pairs_by_mode):
+    """按约束方式批量创建约束"""
+    matrix_pairs = pairs_by_mode.pop("matrix", [])
+    if matrix_pairs:
+        matrix_constraint.create_matrix_constraints(matrix_pairs, maintain_offset=True)
+    commands = {"parent": ["parentConstraint"], "point": ["pointConstraint"], "orient": ["orientConstraint"],
+                "scale": ["scaleConstraint"], "parent+scale": ["parentConstraint", "scaleConstraint"]}
+    for mode, pairs in pairs_by_mode.items():
+        for command in commands.get(mode, []):
+            for driver, driven in pairs:
+                getattr(cmds, command)(driver, driven, maintainOffset=True)
+
+
+def _apply_tags(entries, compact=False):
+    """为控制器添加标签（与标签工具一致，compact 为 True 时保存到 ckTags），相同标签的控制器一次添加"""
+    by_tags = {}
+    for entry in entries:
+        if entry["tags"]:
+            by_tags.setdefault(tuple(entry["tags"]), []).append(entry["names"]["ctrl"])
+    index = tag_index.get_index()
+    for tags, ctrls in by_tags.items():
+        changed = tag_storage.add_tags(ctrls, list(tags), compact=compact)
+        # 新建的控制器尚未被 Tag 索引跟踪，需要显式加入
+        for tag in tags:
+            index.add(tag, changed)
+
+
+def build_rig(spec):
+    """
+    校验并批量构建规格中的全部控制器
+
+    构建顺序：创建全部组与控制器 -> 一次读取目标矩阵并匹配 -> 批量创建子控制器
+    -> 批量设置父级 -> 按方式批量创建约束 -> 添加标签
+
+    返回:
+        dict: 构建结果（controllers 为控制器名称列表），校验失败时返回 None
+    """
+    errors = validate_spec(spec)
+    if errors:
+        for error in errors:
+            cmds.warning(f"规格校验失败: {error}")
+        return None
+
+    entries = normalize_spec(spec)
+    by_ctrl = {entry["names"]["ctrl"]: entry for entry in entries}
+
+    # 第一步：创建组层级与控制器
+    for entry in entries:
+        names = entry["names"]
+        parent = cmds.group(empty=True, name=names["zero"])
+        for group in names["groups"]:
+            parent = cmds.group(empty=True, name=group, parent=parent)
+        ctrl = controller_shapes.create_custom_controller(names["ctrl"], entry["shape"], entry["size"])
+        controller_shapes.rename_controller_shape(ctrl)
+        cmds.parent(ctrl, parent, relative=True)
+        cmds.setAttr(f"{ctrl}.rotateOrder", channelBox=True, keyable=True)
+
+    # 全部控制器颜色一次写入
+    color_scheme.set_override_colors([(entry["names"]["ctrl"], _entry_color(entry)) for entry in entries])
+
+    # 第二步：一次读取全部目标矩阵，将 zero 组匹配到目标物体
+    match_world_transforms([(entry["names"]["zero"], entry["target"]) for entry in entries if entry["target"]])
+
+    # 第三步：批量创建子控制器与输出组
+    sub_entries = [entry for entry in entries if entry["sub"]]
+    if sub_entries:
+        sub_controller_builder.build_sub_controllers(
+            [entry["names"]["ctrl"] for entry in sub_entries],
+            [entry["names"]["sub"] for entry in sub_entries],
+            [entry["names"]["output"] for entry in sub_entries])
+
+    def driver_of(entry):
+        return entry["names"]["output"] if entry["sub"] else entry["names"]["ctrl"]
+
+    # 第四步：批量设置父级（规格内的父级使用其 output 组或控制器）
+    root = spec.get("root")
+    if root and not cmds.objExists(root):
+        root = cmds.group(empty=True, name=root)
+    operations = []
+    for entry in entries:
+        parent = entry["parent"]
+        if parent in by_ctrl:
+            parent = driver_of(by_ctrl[parent])
+        parent = parent or root
+        if parent:
+            operations.append((entry["names"]["zero"], parent, True))
+    reparent_planner.reparent_nodes(operations)
+
+    # 第五步：按约束方式批量创建约束
+    pairs_by_mode = {}
+    for entry in entries:
+        if entry["constraint"] != "none":
+            pairs_by_mode.setdefault(entry["constraint"], []).append((driver_of(entry), entry["target"]))
+    _apply_constraints(pairs_by_mode)
+
+    # 第六步：标签
+    _apply_tags(entries, compact=bool(spec.get("compact_tags")))
+
+    return {"controllers": [entry["names"]["ctrl"] for entry in entries], "root": root}
+
+
+def build_rig_from_file(path):
+    """读取规格文件并构建，返回值同 build_rig"""
+    return build_rig(load_spec(path))
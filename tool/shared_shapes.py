@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+"""
+共享（实例化）控制器形状工具
+相同类型、大小与颜色的控制器引用同一个实例化形状节点（parent -add -shape），
+编辑该形状会同时更新所有引用它的控制器，显著减少曲线形状节点数量与文件大小。
+编辑单个控制器前可先取消共享，为其生成独立的形状副本。
+
+作者: CK Tool
+"""
+
+import maya.cmds as cmds
+
+# 记录共享形状键的字符串属性，位于作为原型的形状节点上
+SHARED_KEY_ATTR = "ckSharedShapeKey"
+
+
+def shape_key(controller_type, size, ctrl):
+    """
+    根据控制器类型、大小与形状颜色生成共享键
+
+    参数:
+        controller_type (str): 控制器类型
+        size (float): 控制器大小
+        ctrl (str): 已着色的控制器，用于读取颜色设置
+    """
+    shapes = cmds.listRelatives(ctrl, shapes=True, fullPath=True) or []
+    color = ""
+    if shapes:
+        shape = shapes[0]
+        if cmds.getAttr(f"{shape}.overrideRGBColors"):
+            color = "rgb" + ",".join(f"{c:.3f}" for c in cmds.getAttr(f"{shape}.overrideColorRGB")[0])
+        else:
+            color = f"index{cmds.getAttr(f'{shape}.overrideColor')}"
+    return f"{controller_type}|{size:g}|{color}"
+
+
+def find_shared_shapes(key):
+    """返回带有指定共享键的原型形状节点列表"""
+    tagged = cmds.ls(f"*.{SHARED_KEY_ATTR}", objectsOnly=True, long=True) or []
+    return [shape for shape in tagged if cmds.getAttr(f"{shape}.{SHARED_KEY_ATTR}") == key]
+
+
+def is_instanced(shape):
+    """形状是否被多个变换节点共享"""
+    return len(cmds.listRelatives(shape, allParents=True, fullPath=True) or []) > 1
+
+
+def remove_shapes(node):
+    """
+    移除节点下的全部形状：共享形状仅移除当前实例，独立形状直接删除
+    """
+    shapes = cmds.listRelatives(node, shapes=True, fullPath=True) or []
+    owned = []
+    for shape in shapes:
+        if is_instanced(shape):
+            cmds.parent(shape, removeObject=True, shape=True)
+        else:
+            owned.append(shape)
+    if owned:
+        cmds.delete(owned)
+
+
+def instance_shapes(source, targets, replace=True):
+    """
+    将源节点的全部形状以实例方式添加到目标节点
+
+    参数:
+        replace (bool): 是否先移除目标节点原有的形状，为 False 时在原有形状之外追加
+
+    返回:
+        list: 成功添加实例形状的目标节点
+    """
+    shapes = cmds.listRelatives(source, shapes=True, fullPath=True) or []
+    if not shapes:
+        cmds.warning(f"物体 {source} 下没有找到形状节点")
+        return []
+    done = []
+    for target in targets:
+        if replace:
+            remove_shapes(target)
+        cmds.parent(shapes, target, add=True, shape=True)
+        done.append(target)
+    return done
+
+
+def adopt_shared_shape(ctrl, key):
+    """
+    让新建的控制器使用共享形状：已存在相同键的原型时改为引用原型形状，否则将自身形状标记为原型
+
+    返回:
+        bool: 是否引用了已存在的共享形状
+    """
+    prototypes = find_shared_shapes(key)
+    if prototypes:
+        source = cmds.listRelatives(prototypes[0], parent=True, fullPath=True)[0]
+        instance_shapes(source, [ctrl])
+        return True
+
+    for shape in cmds.listRelatives(ctrl, shapes=True, fullPath=True) or []:
+        if not cmds.attributeQuery(SHARED_KEY_ATTR, node=shape, exists=True):
+            cmds.addAttr(shape, longName=SHARED_KEY_ATTR, dataType="string")
+        cmds.setAttr(f"{shape}.{SHARED_KEY_ATTR}", key, type="string")
+    return False
+
+
+def unshare_shapes(ctrls):
+    """
+    取消控制器的形状共享：为每个共享形状创建独立副本（保留颜色设置）并移除实例
+
+    返回:
+        int: 取消共享的形状数量
+    """
+    count = 0
+    for ctrl in ctrls:
+        leaf = ctrl.split("|")[-1]
+        for shape in cmds.listRelatives(ctrl, shapes=True, fullPath=True) or []:
+            if not is_instanced(shape) or cmds.nodeType(shape) != "nurbsCurve":
+                continue
+            # 通过 local -> create 连接复制曲线数据，求值后断开，新形状保留几何数据
+            new_shape = cmds.createNode("nurbsCurve", name=f"{leaf}Shape#", parent=ctrl)
+            cmds.connectAttr(f"{shape}.local", f"{new_shape}.create")
+            cmds.dgeval(new_shape)
+            cmds.disconnectAttr(f"{shape}.local", f"{new_shape}.create")
+            for attr in ("overrideEnabled", "overrideRGBColors", "overrideColor", "lineWidth"):
+                cmds.setAttr(f"{new_shape}.{attr}", cmds.getAttr(f"{shape}.{attr}"))
+            cmds.setAttr(f"{new_shape}.overrideColorRGB", *cmds.getAttr(f"{shape}.overrideColorRGB")[0])
+            cmds.parent(shape, removeObject=True, shape=True)
+            count += 1
+    return count
@@ -1,4 +1,8 @@
 import maya.cmds as cmds
+import maya.api.OpenMaya as om2
+import api_modifier
+import combine_curves
+from common_utils import get_dag_paths
 import logging
 import sys
 
@@ -28,6 +32,74 @@ def get_short_name(obj_name):
     return obj_name.split('|')[-1]
 
 
+def _unique_names(base_names):
+    """
+    Returns unique node names for the given base names (Maya's "name", "name1", "name2" convention),
+    checking one query of existing DAG names instead of objExists per name.
+    """
+    used = set(node.split("|")[-1] for node in cmds.ls(dag=True) or [])
+    names = []
+    for base in base_names:
+        name = base
+        index = 1
+        while name in used:
+            name = f"{base}{index}"
+            index += 1
+        used.add(name)
+        names.append(name)
+    return names
+
+
+def separate_curves(curve_names):
+    """
+    Batch separates all multi-shape curve transforms at once.
+    World transforms are baked into the CVs once per source (no makeIdentity per shape), then every new transform
+    is created, named and receives its shape in a single modifier pass; emptied sources are deleted in one call.
+
+    Args:
+        curve_names (list): Transforms holding multiple curve shapes.
+    Returns:
+        dict: {source transform: [new transforms]} for every source that was separated.
+    """
+    transforms = cmds.ls(curve_names, long=True, type="transform") if curve_names else []
+    shapes = (cmds.listRelatives(transforms, shapes=True, fullPath=True, noIntermediate=True,
+                                 type=CURVE_TYPES) or []) if transforms else []
+    shapes_by_source = dict((transform, []) for transform in transforms)
+    for shape in shapes:
+        shapes_by_source[shape.rsplit("|", 1)[0]].append(shape)
+
+    for source, source_shapes in shapes_by_source.items():
+        if not source_shapes:
+            logger.warning(f'Unable to separate "{source}". No valid shapes were found under this object.')
+        elif len(source_shapes) == 1:
+            logger.debug(f'"{source}" contains only one shape. Nothing to separate.')
+    sources = [source for source, source_shapes in shapes_by_source.items() if len(source_shapes) > 1]
+    if not sources:
+        return {}
+    shapes = [shape for source in sources for shape in shapes_by_source[source]]
+
+    # Bake world transforms into the CVs once for all shapes, then move them under world-level transforms
+    combine_curves.bake_world_transforms(shapes)
+    names = _unique_names([get_short_name(shape).replace("Shape", "") for shape in shapes])
+
+    modifier = om2.MDagModifier()
+    created = []
+    for shape_path, name in zip(get_dag_paths(shapes), names):
+        transform_obj = modifier.createNode("transform")
+        modifier.renameNode(transform_obj, name)
+        modifier.reparentNode(shape_path.node(), transform_obj)
+        created.append(transform_obj)
+    api_modifier.execute(modifier)
+
+    new_transforms = [om2.MDagPath.getAPathTo(obj).fullPathName() for obj in created]
+    result = {}
+    for shape, transform in zip(shapes, new_transforms):
+        result.setdefault(shape.rsplit("|", 1)[0], []).append(transform)
+
+    combine_curves.delete_empty_transforms(sources)
+    return result
+
+
 def separate_curve_shapes_into_transforms(curve_name):
     """
     Moves the shapes instead of a curve to individual transforms (separating curves)
@@ -39,24 +111,14 @@ def separate_curve_shapes_into_transforms(curve_name):
     function_name = "Separate Curves"
     try:
         cmds.undoInfo(openChunk=True, chunkName=function_name)
-        nurbs_shapes = []
-        bezier_shapes = []
-        parent_transforms = []
 
         if not curve_name or not isinstance(curve_name, str) or not cmds.objExists(curve_name):
             logger.warning(f'Unable to separate curve shapes. Missing provided curve: "{curve_name}".')
             return
 
-        new_transforms = []
-
-        shapes = cmds.listRelatives(curve_name, shapes=True, fullPath=True) or []
-        for shape in shapes:
-            if cmds.objectType(shape) == CURVE_TYPE_BEZIER:
-                bezier_shapes.append(shape)
-            if cmds.objectType(shape) == CURVE_TYPE_NURBS:
-                nurbs_shapes.append(shape)
-
-        if not nurbs_shapes and not bezier_shapes:  # No valid shapes
+        shapes = cmds.listRelatives(curve_name, shapes=True, fullPath=True, noIntermediate=True,
+                                    type=CURVE_TYPES) or []
+        if not shapes:  # No valid shapes
             logger.warning(f"Unable to separate curves. No valid shapes were found under the provided object.")
             return
 
@@ -64,21 +126,7 @@ def separate_curve_shapes_into_transforms(curve_name):
             logger.debug("Provided curve contains only one shape. Nothing to separate.")
             return curve_name
 
-        for obj in nurbs_shapes + bezier_shapes:
-            parent = cmds.listRelatives(obj, parent=True) or []
-            for par in parent:
-                if par not in parent_transforms:
-                    parent_transforms.append(par)
-                cmds.makeIdentity(par, apply=True, rotate=True, scale=True, translate=True)
-            group = cmds.group(empty=True, world=True, name=get_short_name(obj).replace("Shape", ""))
-            cmds.parent(obj, group, relative=True, shape=True)
-            new_transforms.append(group)
-
-        for obj in parent_transforms:
-            shapes = cmds.listRelatives(obj, shapes=True, fullPath=True) or []
-            if cmds.objExists(obj) and cmds.objectType(obj) == "transform" and len(shapes) == 0:
-                cmds.delete(obj)
-        return new_transforms
+        return [transform for transforms in separate_curves([curve_name]).values() for transform in transforms]
     except Exception as e:
         logger.warning(f"An error occurred when separating the curve. Issue: {e}")
     finally:
@@ -87,7 +135,8 @@ def separate_curve_shapes_into_transforms(curve_name):
 
 def selected_curves_separate():
     """
-    Moves the shapes instead of a curve to individual transforms (separating curves)
+    Moves the shapes instead of a curve to individual transforms (separating curves).
+    All selected multi-shape curves are separated together in one batch.
     Returns:
         list: List of transforms generated out of the operation (each separated shape goes under a new transform)
     """
@@ -100,24 +149,11 @@ def selected_curves_separate():
             logger.warning("You need to select at least one curve.")
             return
 
-        parent_transforms = []
-        for obj in selection:
-            nurbs_shapes = []
-            bezier_shapes = []
-            shapes = cmds.listRelatives(obj, shapes=True, fullPath=True) or []
-            for shape in shapes:
-                if cmds.objectType(shape) == CURVE_TYPE_BEZIER:
-                    bezier_shapes.append(shape)
-                if cmds.objectType(shape) == CURVE_TYPE_NURBS:
-                    nurbs_shapes.append(shape)
-
-            curve_shapes = nurbs_shapes + bezier_shapes
-            if len(curve_shapes) == 0:
-                logger.warning(f'Unable to separate "{obj}". No valid shapes were found under this object.')
-            elif len(curve_shapes) > 1:
-                parent_transforms.extend(separate_curve_shapes_into_transforms(obj))
-            else:
-                cmds.warning("The selected curve contains only one shape.")
+        separated = separate_curves(selection)
+        parent_transforms = [transform for transforms in separated.values() for transform in transforms]
+        if not parent_transforms:
+            cmds.warning("The selected curves contain no multi-shape curve to separate.")
+            return []
 
         cmds.select(parent_transforms)
         sys.stdout.write("\n" + str(len(parent_transforms)) + " shapes extracted.")
@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+"""
+原型冲压工具
+先完整创建一个配置好的控制器层级作为原型，再通过批量 duplicate 复制出其余层级，
+最后在一个修改器中统一重命名（可撤销）并批量写入变换，避免为每个组件重复创建形状、组、属性与连接。
+
+作者: CK Tool
+"""
+
+import maya.cmds as cmds
+import maya.api.OpenMaya as om2
+
+import api_modifier
+from common_utils import get_dag_paths
+
+
+def duplicate_hierarchy(root, count):
+    """
+    复制层级 count 次，每次复制当前已有的全部层级（复制次数为 log2(count)）
+    层级内部节点之间的连接会随复制保留
+
+    返回:
+        list: 新层级根节点的完整路径列表
+    """
+    copies = []
+    sources = [root]
+    while len(copies) < count:
+        batch = sources[:count - len(copies)]
+        new_roots = cmds.duplicate(batch, returnRootsOnly=True) or []
+        new_roots = cmds.ls(new_roots, long=True)
+        copies.extend(new_roots)
+        sources = sources + new_roots
+    return copies
+
+
+def stamp_hierarchies(prototype, prototype_token, tokens):
+    """
+    以原型层级为模板批量生成新层级，并将所有节点名称中的原型标记替换为新标记
+
+    参数:
+        prototype (str): 原型层级的根节点
+        prototype_token (str): 原型节点名称中可替换的部分，例如 "_l_arm_001"
+        tokens (list): 每个新层级对应的名称标记
+
+    返回:
+        list: 与 tokens 顺序一致的新层级根节点名称
+    """
+    if not tokens:
+        return []
+
+    prototype_path = cmds.ls(prototype, long=True)[0]
+    descendants = cmds.listRelatives(prototype_path, allDescendents=True, fullPath=True) or []
+    relative_paths = [""] + [path[len(prototype_path):] for path in descendants]
+    leaf_names = [(prototype_path + rel).split("|")[-1] for rel in relative_paths]
+
+    copies = duplicate_hierarchy(prototype_path, len(tokens))
+    # 重命名前一次解析全部复制节点（MObject 在重命名后依然有效）
+    objects = [path.node() for path in get_dag_paths([copy_root + rel for copy_root in copies
+                                                       for rel in relative_paths])]
+    count = len(relative_paths)
+
+    modifier = om2.MDagModifier()
+    # 复制出的根节点会自动递增序号，可能占用其他层级的目标名称，先在同一个修改器中改为临时名称
+    for index in range(len(copies)):
+        modifier.renameNode(objects[index * count], f"stampTemp{index + 1}")
+    for index, token in enumerate(tokens):
+        for offset, old_name in enumerate(leaf_names):
+            new_name = old_name.replace(prototype_token, token)
+            if offset == 0 or new_name != old_name:
+                modifier.renameNode(objects[index * count + offset], new_name)
+    api_modifier.execute(modifier)
+
+    return [om2.MDagPath.getAPathTo(objects[index * count]).partialPathName() for index in range(len(copies))]
+
@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+"""
+次级控制器批量创建工具
+直接读取父控制器曲线的 CV 数据并在内存中缩放生成子控制器形状（不复制历史与子物体），
+所有 sub/output 节点、形状数据、颜色、可见性属性与连接记录在同一个修改器中一次性执行。
+
+作者: CK Tool
+"""
+
+import maya.cmds as cmds
+import maya.api.OpenMaya as om2
+
+import api_modifier
+from common_utils import get_dag_paths
+
+SUB_SCALE = 0.9
+OUTPUT_CHANNELS = ("translate", "rotate", "rotateOrder", "scale")
+SUB_VIS_ATTR = "subCtrlVis"
+
+
+def default_sub_name(ctrl):
+    """默认子控制器名称：控制器名 + Sub"""
+    return ctrl.split("|")[-1] + "Sub"
+
+
+def default_output_name(ctrl):
+    """默认输出组名称：将控制器名开头的 ctrl 替换为 output"""
+    leaf = ctrl.split("|")[-1]
+    if leaf.startswith("ctrl"):
+        return "output" + leaf[len("ctrl"):]
+    return leaf + "_output"
+
+
+def _curve_shapes(path):
+    """返回变换节点下所有非中间对象的曲线形状路径"""
+    shapes = []
+    for i in range(path.numberOfShapesDirectlyBelow()):
+        shape = om2.MDagPath(path)
+        shape.extendToShapeDirectlyBelow(i)
+        if shape.apiType() == om2.MFn.kNurbsCurve and not om2.MFnDagNode(shape).isIntermediateObject:
+            shapes.append(shape)
+    return shapes
+
+
+def _scaled_curve_data(shape, scale):
+    """读取曲线的物体空间 CV 并缩放，生成内存中的曲线数据"""
+    curve_fn = om2.MFnNurbsCurve(shape)
+    cvs = om2.MPointArray([om2.MPoint(p.x * scale, p.y * scale, p.z * scale)
+                           for p in curve_fn.cvPositions(om2.MSpace.kObject)])
+    data = om2.MFnNurbsCurveData().create()
+    om2.MFnNurbsCurve().create(cvs, curve_fn.knots(), curve_fn.degree, curve_fn.form, False, True, data)
+    return data
+
+
+def _copy_color(modifier, source_fn, target_fn):
+    """将父控制器形状的颜色覆盖设置复制到子控制器形状"""
+    for attr in ("overrideEnabled", "overrideRGBColors"):
+        modifier.newPlugValueBool(target_fn.findPlug(attr, False), source_fn.findPlug(attr, False).asBool())
+    modifier.newPlugValueInt(target_fn.findPlug("overrideColor", False),
+                             source_fn.findPlug("overrideColor", False).asInt())
+    for attr in ("overrideColorR", "overrideColorG", "overrideColorB"):
+        modifier.newPlugValueFloat(target_fn.findPlug(attr, False), source_fn.findPlug(attr, False).asFloat())
+
+
+def _sub_vis_plug(modifier, ctrl_obj):
+    """获取控制器的 subCtrlVis 属性插头，不存在时在修改器中添加（默认关闭，通道框可见但不可关键帧）"""
+    ctrl_fn = om2.MFnDependencyNode(ctrl_obj)
+    if ctrl_fn.hasAttribute(SUB_VIS_ATTR):
+        return ctrl_fn.findPlug(SUB_VIS_ATTR, False)
+    attr_fn = om2.MFnNumericAttribute()
+    attr = attr_fn.create(SUB_VIS_ATTR, SUB_VIS_ATTR, om2.MFnNumericData.kBoolean, False)
+    attr_fn.keyable = False
+    attr_fn.channelBox = True
+    modifier.addAttribute(ctrl_obj, attr)
+    return om2.MPlug(ctrl_obj, attr)
+
+
+def build_sub_controllers(ctrls, sub_names=None, output_names=None, scale=SUB_SCALE,
+                          matrix_output=False, lock_visibility=False):
+    """
+    为多个控制器批量创建子控制器与输出组
+
+    子控制器形状由父控制器 CV 缩放生成并复制颜色，子控制器与输出组都放在控制器下，
+    子控制器变换驱动输出组，可见性由控制器的 subCtrlVis 属性控制。
+
+    参数:
+        ctrls (list): 控制器列表
+        sub_names (list): 子控制器名称，默认为控制器名 + Sub
+        output_names (list): 输出组名称，默认将 ctrl 前缀替换为 output
+        scale (float): 子控制器形状相对父控制器的缩放
+        matrix_output (bool): 使用 sub.matrix -> output.offsetParentMatrix 单一连接代替逐通道连接（Maya 2020+）
+        lock_visibility (bool): 是否锁定并隐藏控制器与子控制器的 visibility 通道
+
+    返回:
+        list: 与 ctrls 顺序一致的 (子控制器, 输出组) 列表
+    """
+    if not ctrls:
+        return []
+    sub_names = sub_names or [default_sub_name(ctrl) for ctrl in ctrls]
+    output_names = output_names or [default_output_name(ctrl) for ctrl in ctrls]
+
+    modifier = om2.MDagModifier()
+    created = []
+    for ctrl_path, sub_name, output_name in zip(get_dag_paths(ctrls), sub_names, output_names):
+        ctrl_obj = ctrl_path.node()
+        sub_obj = modifier.createNode("transform", ctrl_obj)
+        output_obj = modifier.createNode("transform", ctrl_obj)
+        modifier.renameNode(sub_obj, sub_name)
+        modifier.renameNode(output_obj, output_name)
+
+        shapes = _curve_shapes(ctrl_path)
+        for index, shape in enumerate(shapes):
+            shape_obj = modifier.createNode("nurbsCurve", sub_obj)
+            modifier.renameNode(shape_obj, f"{sub_name}Shape" + (str(index) if index else ""))
+            shape_fn = om2.MFnDependencyNode(shape_obj)
+            modifier.newPlugValue(shape_fn.findPlug("cached", False), _scaled_curve_data(shape, scale))
+            _copy_color(modifier, om2.MFnDependencyNode(shape.node()), shape_fn)
+
+        sub_fn = om2.MFnDependencyNode(sub_obj)
+        output_fn = om2.MFnDependencyNode(output_obj)
+        if matrix_output:
+            modifier.connect(sub_fn.findPlug("matrix", False), output_fn.findPlug("offsetParentMatrix", False))
+        else:
+            for channel in OUTPUT_CHANNELS:
+                modifier.connect(sub_fn.findPlug(channel, False), output_fn.findPlug(channel, False))
+        modifier.connect(_sub_vis_plug(modifier, ctrl_obj), sub_fn.findPlug("visibility", False))
+        created.append((ctrl_obj, sub_obj, output_obj))
+
+    api_modifier.execute(modifier)
+
+    results = []
+    for ctrl_obj, sub_obj, output_obj in created:
+        ctrl = om2.MDagPath.getAPathTo(ctrl_obj).partialPathName()
+        sub = om2.MDagPath.getAPathTo(sub_obj).partialPathName()
+        output = om2.MDagPath.getAPathTo(output_obj).partialPathName()
+        # 通道框显示设置使用 cmds，保证可随撤销恢复
+        cmds.setAttr(f"{ctrl}.{SUB_VIS_ATTR}", channelBox=True, keyable=False)
+        cmds.setAttr(f"{ctrl}.rotateOrder", channelBox=True)
+        cmds.setAttr(f"{sub}.rotateOrder", channelBox=True)
+        if lock_visibility:
+            for node in (ctrl, sub):
+                try:
+                    cmds.setAttr(f"{node}.visibility", keyable=False, channelBox=False, lock=True)
+                except Exception:
+                    pass
+        results.append((sub, output))
+    return results
+
+
+def build_sub_controller(ctrl, sub_name=None, output_name=None, scale=SUB_SCALE,
+                         matrix_output=False, lock_visibility=False):
+    """为单个控制器创建子控制器与输出组，返回 (子控制器, 输出组)"""
+    return build_sub_controllers([ctrl], [sub_name or default_sub_name(ctrl)],
+                                 [output_name or default_output_name(ctrl)],
+                                 scale, matrix_output, lock_visibility)[0]
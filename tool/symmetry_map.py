@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+"""
+基于位置的左右对称映射
+一次读取全部候选节点（骨骼与曲线控制器）的世界位置，沿选定平面镜像后用 KD 树查找最近的镜像节点，
+互为最近且在容差内的节点配成一对（次近节点同样在容差内且距离相近时视为有歧义、不配对），结果通过 message 连接缓存在场景中的网络节点上（重命名后依然有效）。
+镜像曲线、按侧面着色等依赖 _l_ / _r_ 命名的功能可改用该映射，数千个节点也无需两两比较。
+
+作者: CK Tool
+"""
+
+import maya.cmds as cmds
+import maya.api.OpenMaya as om2
+
+import api_modifier
+from common_utils import get_dag_paths, get_world_matrices
+from color_scheme import is_sub_controller
+from nearest_snap import KDTree, AMBIGUITY_RATIO
+
+MAP_NODE = "ckSymmetryMap"
+# 镜像平面 -> 取反的坐标轴
+PLANE_AXES = {"yz": 0, "xz": 1, "xy": 2}
+SIDE_ATTRS = {"left": "leftNodes", "right": "rightNodes", "center": "centerNodes"}
+
+
+def candidate_nodes():
+    """默认候选节点：场景中全部骨骼与带曲线形状的变换节点"""
+    joints = cmds.ls(type="joint", long=True) or []
+    curves = cmds.ls(type="nurbsCurve", long=True, noIntermediate=True) or []
+    ctrls = list(dict.fromkeys(cmds.listRelatives(curves, parent=True, fullPath=True) or [])) if curves else []
+    return joints + ctrls
+
+
+def build_symmetry_map(nodes=None, plane="yz", tolerance=0.01):
+    """
+    按位置计算对称映射：骨骼只与骨骼配对，子控制器只与子控制器配对（子控制器与其控制器位置重合），
+    其余控制器只与控制器配对
+
+    参数:
+        nodes (list): 候选节点，默认为全部骨骼与曲线控制器
+        plane (str): 镜像平面 "yz"、"xz" 或 "xy"
+        tolerance (float): 镜像位置的最大偏差
+
+    返回:
+        dict: {"pairs": [(正方向节点, 负方向节点)], "center": [中线节点], "unmatched": [未配对节点],
+               "ambiguous": [有两个距离相近的镜像候选、未配对的节点]}
+    """
+    paths = {}
+    for path in get_dag_paths(nodes if nodes is not None else candidate_nodes()):
+        paths.setdefault(path.fullPathName(), path)
+    nodes = list(paths)
+    axis = PLANE_AXES[plane]
+    positions = [(m[12], m[13], m[14]) for m in get_world_matrices(nodes)]
+
+    categories = {}
+    for index, node in enumerate(nodes):
+        is_joint = paths[node].hasFn(om2.MFn.kJoint)
+        categories.setdefault((is_joint, not is_joint and is_sub_controller(node)), []).append(index)
+
+    result = {"pairs": [], "center": [], "unmatched": [], "ambiguous": []}
+    for indices in categories.values():
+        tree = KDTree([positions[i] for i in indices])
+        partner = {}
+        ambiguous = set()
+        for local, index in enumerate(indices):
+            mirrored = list(positions[index])
+            mirrored[axis] = -mirrored[axis]
+            found = tree.nearest(mirrored, 2)
+            distance, match = found[0]
+            if distance > tolerance:
+                continue
+            # 与 nearest_snap 相同：次近节点也在容差内且距离相近时不猜测配对
+            if len(found) > 1 and found[1][0] <= tolerance and found[1][0] <= distance * AMBIGUITY_RATIO + 1e-6:
+                ambiguous.add(local)
+            else:
+                partner[local] = match
+
+        for local, index in enumerate(indices):
+            match = partner.get(local)
+            if local in ambiguous:
+                result["ambiguous"].append(nodes[index])
+            elif match is None or partner.get(match) != local:
+                result["unmatched"].append(nodes[index])
+            elif match == local:
+                result["center"].append(nodes[index])
+            elif local < match:
+                a, b = nodes[index], nodes[indices[match]]
+                # 位于镜像轴正方向的节点记为左侧（Maya 角色朝向 +Z 时 +X 为左）
+                if positions[index][axis] < positions[indices[match]][axis]:
+                    a, b = b, a
+                result["pairs"].append((a, b))
+    return result
+
+
+def save_symmetry_map(result, plane="yz", tolerance=0.01):
+    """将对称映射写入场景中的网络节点（覆盖已有映射），返回网络节点名称"""
+    if cmds.objExists(MAP_NODE):
+        cmds.delete(MAP_NODE)
+    node = cmds.createNode("network", name=MAP_NODE)
+    cmds.addAttr(node, longName="plane", dataType="string")
+    cmds.setAttr(f"{node}.plane", plane, type="string")
+    cmds.addAttr(node, longName="tolerance", attributeType="double", defaultValue=tolerance)
+    for attr in SIDE_ATTRS.values():
+        cmds.addAttr(node, longName=attr, attributeType="message", multi=True)
+
+    sides = {"left": [a for a, _ in result["pairs"]], "right": [b for _, b in result["pairs"]],
+             "center": result["center"]}
+    selection = om2.MSelectionList()
+    selection.add(node)
+    map_fn = om2.MFnDependencyNode(selection.getDependNode(0))
+    modifier = om2.MDGModifier()
+    for side, members in sides.items():
+        array_plug = map_fn.findPlug(SIDE_ATTRS[side], False)
+        for index, path in enumerate(get_dag_paths(members)):
+            source = om2.MFnDependencyNode(path.node()).findPlug("message", False)
+            modifier.connect(source, array_plug.elementByLogicalIndex(index))
+    api_modifier.execute(modifier)
+    return node
+
+
+def load_symmetry_map():
+    """
+    读取场景中缓存的对称映射（已删除的节点会被忽略）
+
+    返回:
+        dict: {"pairs": [(左, 右)], "center": [中线节点], "plane": 平面}，不存在时返回 None
+    """
+    if not cmds.objExists(MAP_NODE):
+        return None
+    selection = om2.MSelectionList()
+    selection.add(MAP_NODE)
+    map_fn = om2.MFnDependencyNode(selection.getDependNode(0))
+
+    def members(attr):
+        array_plug = map_fn.findPlug(attr, False)
+        connected = {}
+        for index in array_plug.getExistingArrayAttributeIndices():
+            sources = array_plug.elementByLogicalIndex(index).connectedTo(True, False)
+            if sources:
+                connected[index] = om2.MDagPath.getAPathTo(sources[0].node()).fullPathName()
+        return connected
+
+    left, right = members(SIDE_ATTRS["left"]), members(SIDE_ATTRS["right"])
+    return {"pairs": [(left[i], right[i]) for i in sorted(left) if i in right],
+            "center": list(members(SIDE_ATTRS["center"]).values()),
+            "plane": cmds.getAttr(f"{MAP_NODE}.plane") or "yz"}
+
+
+def mirror_lookup(symmetry=None):
+    """
+    返回 {节点完整路径: (侧面, 对应节点)}，侧面为 "left"、"right" 或 "center"（中线节点对应自身）
+    """
+    symmetry = symmetry or load_symmetry_map()
+    if not symmetry:
+        return {}
+    lookup = {}
+    for left, right in symmetry["pairs"]:
+        lookup[left] = ("left", right)
+        lookup[right] = ("right", left)
+    for node in symmetry["center"]:
+        lookup[node] = ("center", node)
+    return lookup
+
+
+def build_and_cache(nodes=None, plane="yz", tolerance=0.01):
+    """计算对称映射并缓存到场景，返回计算结果"""
+    result = build_symmetry_map(nodes, plane, tolerance)
+    save_symmetry_map(result, plane, tolerance)
+    return result
@@ -0,0 +1,159 @@
+# -*- coding: utf-8 -*-
+"""
+Tag 索引
+每次查询都用一次 ls 通配查询（包含所有命名空间）重新建立 Tag 的节点集合（同时包含 ckTags 紧凑存储），
+任何方式添加的 Tag（其他工具、脚本编辑器、复制、导入或引用）都能在下次查询时找到；
+属性回调只用于在两次查询之间剔除被删除的 Tag，场景打开/新建时清空索引。
+按 Tag 选择的耗时只与带 Tag 的节点数量有关，与场景节点总数无关。
+
+作者: CK Tool
+"""
+
+import maya.cmds as cmds
+import maya.api.OpenMaya as om2
+
+import tag_storage
+
+_index = None
+
+
+class TagIndex(object):
+    """
+    Tag -> 节点集合的索引
+
+    节点以 MObjectHandle 保存，重命名与改变父级后依然有效；已删除的节点在查询时跳过或剔除。
+    每个已索引节点注册一个属性变化回调，只用于剔除被删除的 Tag 属性与从 ckTags 中移除的 Tag（包括撤销与重做）。
+    """
+
+    def __init__(self):
+        self._tags = {}
+        self._node_callbacks = {}
+        self._scene_callbacks = []
+
+    def start(self):
+        """注册场景回调（打开或新建场景时清空索引）"""
+        if self._scene_callbacks:
+            return
+        for message in (om2.MSceneMessage.kAfterOpen, om2.MSceneMessage.kAfterNew):
+            self._scene_callbacks.append(om2.MSceneMessage.addCallback(message, self._on_scene_changed))
+
+    def stop(self):
+        """移除全部回调并清空索引"""
+        self.clear()
+        for callback in self._scene_callbacks:
+            om2.MMessage.removeCallback(callback)
+        self._scene_callbacks = []
+
+    def clear(self):
+        """清空索引与节点回调，下次查询时重新扫描"""
+        for callback in self._node_callbacks.values():
+            try:
+                om2.MMessage.removeCallback(callback)
+            except RuntimeError:
+                pass
+        self._node_callbacks = {}
+        self._tags = {}
+
+    def _on_scene_changed(self, *args):
+        self.clear()
+
+    def _track(self, obj):
+        """为节点注册属性变化回调（每个节点只注册一次）"""
+        handle = om2.MObjectHandle(obj)
+        key = handle.hashCode()
+        if key not in self._node_callbacks:
+            self._node_callbacks[key] = om2.MNodeMessage.addAttributeChangedCallback(obj, self._on_attribute_changed)
+        return key, handle
+
+    def _on_attribute_changed(self, message, plug, other_plug, client_data):
+        removed = message & om2.MNodeMessage.kAttributeRemoved
+        name = om2.MFnAttribute(plug.attribute()).name
+        obj = plug.node()
+        key = om2.MObjectHandle(obj).hashCode()
+
+        # 添加的 Tag 由每次查询的重新扫描获得，这里只处理移除
+        if name == tag_storage.TAGS_ATTR:
+            if not (removed or message & om2.MNodeMessage.kAttributeSet):
+                return
+            compact_tags = set() if removed else set(tag_storage.read_compact_tags(obj))
+            node_fn = om2.MFnDependencyNode(obj)
+            for tag, nodes in self._tags.items():
+                if key in nodes and tag not in compact_tags and not node_fn.hasAttribute(tag):
+                    del nodes[key]
+            return
+
+        nodes = self._tags.get(name)
+        if nodes is not None and removed and name not in tag_storage.read_compact_tags(obj):
+            nodes.pop(key, None)
+
+    def _scan(self, tag):
+        """一次 ls 通配查询（递归所有命名空间）建立 Tag 的节点集合，并合并 ckTags 中的 Tag"""
+        nodes = {}
+        found = cmds.ls(f"*.{tag}", objectsOnly=True, long=True, recursive=True, type="transform") or []
+        selection = om2.MSelectionList()
+        for node in found:
+            selection.add(node)
+        for index in range(selection.length()):
+            key, handle = self._track(selection.getDependNode(index))
+            nodes[key] = handle
+
+        # 紧凑存储：一次查询全部带 ckTags 的节点，读取其中的 Tag
+        selection = om2.MSelectionList()
+        for node in tag_storage.compact_nodes():
+            selection.add(node)
+        for index in range(selection.length()):
+            obj = selection.getDependNode(index)
+            if tag in tag_storage.read_compact_tags(obj):
+                key, handle = self._track(obj)
+                nodes[key] = handle
+        self._tags[tag] = nodes
+        return nodes
+
+    def add(self, tag, nodes):
+        """记录已添加 Tag 的节点（Tag 尚未索引时忽略，查询时会重新扫描）"""
+        if tag not in self._tags:
+            return
+        selection = om2.MSelectionList()
+        for node in nodes:
+            selection.add(node)
+        for index in range(selection.length()):
+            key, handle = self._track(selection.getDependNode(index))
+            self._tags[tag][key] = handle
+
+    def nodes(self, tag):
+        """
+        返回具有指定 Tag 的节点完整路径（剔除已删除的节点）
+        """
+        # 每次查询都重新扫描，索引之外添加的 Tag 不会被遗漏；已跟踪的节点复用现有的属性回调
+        entries = self._scan(tag)
+        paths = []
+        for key, handle in list(entries.items()):
+            if not handle.isAlive():
+                del entries[key]
+                continue
+            if not handle.isValid():
+                # 已删除但仍可撤销的节点暂时跳过
+                continue
+            obj = handle.object()
+            if obj.hasFn(om2.MFn.kDagNode):
+                paths.append(om2.MDagPath.getAPathTo(obj).fullPathName())
+            else:
+                paths.append(om2.MFnDependencyNode(obj).name())
+        return paths
+
+
+def get_index():
+    """返回全局 Tag 索引（首次调用时创建并注册回调）"""
+    global _index
+    if _index is None:
+        _index = TagIndex()
+        _index.start()
+    return _index
+
+
+def release_index():
+    """移除全局 Tag 索引的全部回调（工具窗口关闭时调用）"""
+    global _index
+    if _index is not None:
+        _index.stop()
+        _index = None
@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+"""
+Tag 查询表达式
+支持 &（与）、|（或）、!（非）与括号，例如 "face & ctrl & !sub"、"(l | r) & fk"。
+表达式中的每个 Tag 只通过 Tag 索引解析一次为节点集合，再用 Python 集合运算求值；
+取反在与其他集合相交时直接作差，只有整体结果为取反时才读取一次场景中的全部变换节点。
+
+作者: CK Tool
+"""
+
+import re
+
+import maya.cmds as cmds
+
+import tag_index
+
+TOKEN_PATTERN = re.compile(r"\s*(?:([A-Za-z_]\w*)|(.))")
+TAG_NAME_PATTERN = re.compile(r"^[A-Za-z_]\w*$")
+
+
+def is_tag_name(text):
+    """是否为合法的单个 Tag 名称（可作为属性名）"""
+    return bool(TAG_NAME_PATTERN.match(text))
+
+
+def tokenize(expression):
+    """将表达式拆分为 Tag 名称与运算符"""
+    tokens = []
+    for match in TOKEN_PATTERN.finditer(expression.strip()):
+        name, symbol = match.groups()
+        if name:
+            tokens.append(("tag", name))
+        elif symbol in "&|!()":
+            tokens.append((symbol, symbol))
+        elif symbol and not symbol.isspace():
+            raise ValueError(f"无法识别的字符 '{symbol}'")
+    return tokens
+
+
+def parse(expression):
+    """
+    解析表达式为语法树，优先级：! 高于 & 高于 |
+
+    返回:
+        tuple: ("tag", 名称) / ("not", 子树) / ("and", 左, 右) / ("or", 左, 右)
+    """
+    tokens = tokenize(expression)
+    if not tokens:
+        raise ValueError("表达式为空")
+    position = [0]
+
+    def peek():
+        return tokens[position[0]][0] if position[0] < len(tokens) else None
+
+    def take(kind):
+        if peek() != kind:
+            found = tokens[position[0]][1] if position[0] < len(tokens) else "结尾"
+            raise ValueError(f"表达式语法错误：此处应为 '{kind}'，实际为 '{found}'")
+        token = tokens[position[0]]
+        position[0] += 1
+        return token
+
+    def parse_or():
+        node = parse_and()
+        while peek() == "|":
+            take("|")
+            node = ("or", node, parse_and())
+        return node
+
+    def parse_and():
+        node = parse_not()
+        while peek() == "&":
+            take("&")
+            node = ("and", node, parse_not())
+        return node
+
+    def parse_not():
+        if peek() == "!":
+            take("!")
+            return ("not", parse_not())
+        if peek() == "(":
+            take("(")
+            node = parse_or()
+            take(")")
+            return node
+        return ("tag", take("tag")[1])
+
+    tree = parse_or()
+    if position[0] != len(tokens):
+        raise ValueError(f"表达式语法错误：多余的 '{tokens[position[0]][1]}'")
+    return tree
+
+
+def tag_names(tree):
+    """返回语法树中出现的全部 Tag 名称"""
+    if tree[0] == "tag":
+        return {tree[1]}
+    return set().union(*(tag_names(child) for child in tree[1:]))
+
+
+def _evaluate(tree, sets):
+    """求值，返回 (集合, 是否为补集)"""
+    kind = tree[0]
+    if kind == "tag":
+        return sets[tree[1]], False
+    if kind == "not":
+        nodes, negated = _evaluate(tree[1], sets)
+        return nodes, not negated
+
+    (a, a_negated), (b, b_negated) = _evaluate(tree[1], sets), _evaluate(tree[2], sets)
+    if kind == "and":
+        if not a_negated and not b_negated:
+            return a & b, False
+        if not a_negated:
+            return a - b, False
+        if not b_negated:
+            return b - a, False
+        return a | b, True
+    if not a_negated and not b_negated:
+        return a | b, False
+    if not a_negated:
+        return b - a, True
+    if not b_negated:
+        return a - b, True
+    return a & b, True
+
+
+def evaluate(expression, resolve, universe=None):
+    """
+    计算表达式
+
+    参数:
+        expression (str): Tag 查询表达式
+        resolve (callable): Tag 名称 -> 节点集合，每个 Tag 只调用一次
+        universe (callable): 结果为补集时返回全部候选节点集合
+
+    返回:
+        set: 满足表达式的节点
+    """
+    tree = parse(expression)
+    sets = {tag: set(resolve(tag)) for tag in tag_names(tree)}
+    nodes, negated = _evaluate(tree, sets)
+    if negated:
+        return set(universe() if universe else ()) - nodes
+    return nodes
+
+
+def query(expression):
+    """使用 Tag 索引计算表达式，返回节点完整路径集合"""
+    index = tag_index.get_index()
+    return evaluate(expression, index.nodes,
+                    universe=lambda: cmds.ls(type="transform", long=True) or [])
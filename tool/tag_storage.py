@@ -0,0 +1,225 @@
+# -*- coding: utf-8 -*-
+"""
+Tag 存储
+默认每个 Tag 是节点上的一个布尔属性；紧凑模式将节点的全部 Tag 保存在一个 ckTags 字符串数组属性中，
+大量 Tag 与控制器时可避免成千上万个动态属性拖慢文件与 DG 查询。
+提供两种存储之间的双向迁移，以及批量添加/删除：先在内存中筛选需要修改的节点，
+再将全部 addAttr / deleteAttr / ckTags 写入放在同一个修改器中一次执行（可撤销）。
+
+作者: CK Tool
+"""
+
+import maya.cmds as cmds
+import maya.api.OpenMaya as om2
+
+import api_modifier
+
+TAGS_ATTR = "ckTags"
+
+
+def _depend_nodes(nodes):
+    """返回与输入顺序一致的 (节点名称, MObject) 列表，跳过不存在的节点"""
+    result = []
+    for node in nodes:
+        selection = om2.MSelectionList()
+        try:
+            selection.add(node)
+        except RuntimeError:
+            continue
+        result.append((node, selection.getDependNode(0)))
+    return result
+
+
+def read_compact_tags(obj):
+    """读取节点 ckTags 属性中的 Tag 列表（MObject），没有该属性时返回空列表"""
+    node_fn = om2.MFnDependencyNode(obj)
+    if not node_fn.hasAttribute(TAGS_ATTR):
+        return []
+    try:
+        return list(om2.MFnStringArrayData(node_fn.findPlug(TAGS_ATTR, False).asMObject()).array())
+    except RuntimeError:
+        return []
+
+
+def is_tag_attribute(plug):
+    """布尔 Tag 属性的判定：动态顶层属性、布尔类型、不可关键帧且不在通道框中显示（与添加 Tag 时的设置一致）"""
+    attr = plug.attribute()
+    return (plug.isDynamic
+            and om2.MFnAttribute(attr).parent.isNull()
+            and attr.hasFn(om2.MFn.kNumericAttribute)
+            and om2.MFnNumericAttribute(attr).numericType() == om2.MFnNumericData.kBoolean
+            and not plug.isKeyable
+            and not plug.isChannelBox)
+
+
+def read_attribute_tags(obj):
+    """读取节点（MObject）上以布尔属性保存的 Tag，直接遍历属性，不逐个属性调用 getAttr"""
+    node_fn = om2.MFnDependencyNode(obj)
+    tags = []
+    for index in range(node_fn.attributeCount()):
+        plug = om2.MPlug(obj, node_fn.attribute(index))
+        if is_tag_attribute(plug):
+            tags.append(om2.MFnAttribute(plug.attribute()).name)
+    return tags
+
+
+def read_tags(nodes):
+    """
+    读取节点的全部 Tag（布尔属性与 ckTags 合并）
+
+    返回:
+        dict: {节点: Tag 列表}
+    """
+    tags = {}
+    for node, obj in _depend_nodes(nodes):
+        merged = read_attribute_tags(obj)
+        merged += [tag for tag in read_compact_tags(obj) if tag not in merged]
+        tags[node] = merged
+    return tags
+
+
+def _add_tag_attribute(modifier, obj, tag):
+    """在修改器中添加布尔 Tag 属性（默认开启，不可关键帧且不在通道框中显示）"""
+    attr_fn = om2.MFnNumericAttribute()
+    attr = attr_fn.create(tag, tag, om2.MFnNumericData.kBoolean, True)
+    attr_fn.keyable = False
+    attr_fn.channelBox = False
+    modifier.addAttribute(obj, attr)
+
+
+def _write_compact(modifier, obj, tags):
+    """在修改器中写入节点的 ckTags（属性不存在时一并添加）"""
+    node_fn = om2.MFnDependencyNode(obj)
+    if node_fn.hasAttribute(TAGS_ATTR):
+        plug = node_fn.findPlug(TAGS_ATTR, False)
+    else:
+        attr_fn = om2.MFnTypedAttribute()
+        attr = attr_fn.create(TAGS_ATTR, TAGS_ATTR, om2.MFnData.kStringArray)
+        attr_fn.keyable = False
+        attr_fn.channelBox = False
+        modifier.addAttribute(obj, attr)
+        plug = om2.MPlug(obj, attr)
+    modifier.newPlugValue(plug, om2.MFnStringArrayData().create(list(tags)))
+
+
+def add_tags(nodes, tags, compact=False):
+    """
+    为节点批量添加 Tag
+
+    参数:
+        nodes (list): 节点列表
+        tags (list): Tag 名称列表
+        compact (bool): 是否保存到 ckTags（每个节点只写入一次）
+
+    返回:
+        list: 实际发生变化的节点
+    """
+    changed = []
+    modifier = om2.MDGModifier()
+    for node, obj in _depend_nodes(nodes):
+        if compact:
+            current = read_compact_tags(obj)
+            missing = [tag for tag in tags if tag not in current]
+            if missing:
+                _write_compact(modifier, obj, current + missing)
+        else:
+            node_fn = om2.MFnDependencyNode(obj)
+            missing = [tag for tag in tags if not node_fn.hasAttribute(tag)]
+            for tag in missing:
+                _add_tag_attribute(modifier, obj, tag)
+        if missing:
+            changed.append(node)
+    if changed:
+        api_modifier.execute(modifier)
+    return changed
+
+
+def remove_tags(nodes, tags):
+    """
+    从节点批量删除 Tag（同时处理布尔属性与 ckTags，ckTags 每个节点只写入一次）
+
+    返回:
+        list: 实际发生变化的节点
+    """
+    changed = []
+    modifier = om2.MDGModifier()
+    for node, obj in _depend_nodes(nodes):
+        node_changed = False
+        current = read_compact_tags(obj)
+        remaining = [tag for tag in current if tag not in tags]
+        if len(remaining) != len(current):
+            _write_compact(modifier, obj, remaining)
+            node_changed = True
+        node_fn = om2.MFnDependencyNode(obj)
+        for tag in tags:
+            if node_fn.hasAttribute(tag):
+                modifier.removeAttribute(obj, node_fn.attribute(tag))
+                node_changed = True
+        if node_changed:
+            changed.append(node)
+    if changed:
+        api_modifier.execute(modifier)
+    return changed
+
+
+def compact_nodes():
+    """场景中所有带 ckTags 属性的节点（包含所有命名空间）"""
+    return cmds.ls(f"*.{TAGS_ATTR}", objectsOnly=True, long=True, recursive=True) or []
+
+
+def migrate_to_compact(nodes, tags=None):
+    """
+    将节点的布尔 Tag 属性迁移到 ckTags 并删除原属性
+
+    参数:
+        nodes (list): 节点列表
+        tags (list): 需要迁移的 Tag，默认为符合布尔 Tag 判定的全部属性
+
+    返回:
+        int: 迁移的 Tag 数量
+    """
+    count = 0
+    modifier = om2.MDGModifier()
+    for node, obj in _depend_nodes(nodes):
+        attribute_tags = read_attribute_tags(obj)
+        if tags is not None:
+            attribute_tags = [tag for tag in attribute_tags if tag in tags]
+        if not attribute_tags:
+            continue
+        # 先写入 ckTags 再删除布尔属性，Tag 索引回调在删除时仍能在 ckTags 中找到该 Tag
+        current = read_compact_tags(obj)
+        _write_compact(modifier, obj, current + [tag for tag in attribute_tags if tag not in current])
+        node_fn = om2.MFnDependencyNode(obj)
+        for tag in attribute_tags:
+            modifier.removeAttribute(obj, node_fn.attribute(tag))
+        count += len(attribute_tags)
+    if count:
+        api_modifier.execute(modifier)
+    return count
+
+
+def migrate_to_attributes(nodes):
+    """
+    将节点 ckTags 中的 Tag 迁移为布尔属性并删除 ckTags
+
+    返回:
+        int: 迁移的 Tag 数量
+    """
+    count = 0
+    modifier = om2.MDGModifier()
+    changed = False
+    for node, obj in _depend_nodes(nodes):
+        node_fn = om2.MFnDependencyNode(obj)
+        if not node_fn.hasAttribute(TAGS_ATTR):
+            continue
+        compact_tags = read_compact_tags(obj)
+        # 先添加布尔属性再删除 ckTags，与 migrate_to_compact 的顺序对称
+        for tag in compact_tags:
+            if not node_fn.hasAttribute(tag):
+                _add_tag_attribute(modifier, obj, tag)
+        modifier.removeAttribute(obj, node_fn.attribute(TAGS_ATTR))
+        count += len(compact_tags)
+        changed = True
+    if changed:
+        api_modifier.execute(modifier)
+    return count
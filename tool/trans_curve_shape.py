@@ -1,11 +1,14 @@
 # coding=utf-8
 import maya.cmds as cmds
 
+import shared_shapes
 
-def trans_curve_shape():
+
+def trans_curve_shape(shared=False):
     """
     替换目标曲线形状：
     - 将源曲线的形状复制到一个或多个目标曲线，替换目标曲线的现有形状。
+    - shared 为 True 时目标曲线以实例方式共享源曲线的形状，不再复制。
     - 需要选择至少两个有效的曲线对象（第一个为源曲线，其余为目标曲线），否则会弹出警告。
     - 支持全局撤销功能，可以一次性撤销所有操作。
 
@@ -40,8 +43,14 @@ def trans_curve_shape():
     cmds.undoInfo(openChunk=True, chunkName="替换曲线形状")
     
     try:
+        # 共享模式：一次性将源形状实例到全部目标曲线
+        if shared:
+            processed_targets = shared_shapes.instance_shapes(source_curve, target_curves)
+            target_curves = []
+        else:
+            processed_targets = []
+
         # 处理每个目标曲线
-        processed_targets = []
         for target_curve in target_curves:
             # 获取目标曲线的短名称
             target_short_name = cmds.ls(target_curve, shortNames=True)[0]
@@ -54,10 +63,8 @@ def trans_curve_shape():
                 cmds.delete(temp_curve)
                 continue
 
-            # 删除目标曲线的现有形状
-            target_shapes = cmds.listRelatives(target_curve, shapes=True, fullPath=True)
-            if target_shapes:
-                cmds.delete(target_shapes)
+            # 删除目标曲线的现有形状（共享形状仅移除当前实例，不影响其他控制器）
+            shared_shapes.remove_shapes(target_curve)
 
             # 转移并重命名形状到目标曲线
             for shape in source_shapes:
@@ -905,6 +905,8 @@ class CombinedTool(QMainWindow):
         self.match_rotation = True
         self.match_scale = False
         self.color_rgb = [1.0, 1.0, 1.0]
+        # 规则配色使用的规则列表，None 表示默认规则
+        self.color_rules = None
         self.use_hierarchy_logic = True
         self.controller_type = "sphere"
         # 集中定义预设颜色（RGB 0-1），用于颜色网格与颜色对话框
@@ -1323,12 +1325,34 @@ class CombinedTool(QMainWindow):
         random_color_button = DelayedToolTipButton("随机颜色", "为选中的物体赋予随机颜色材质")
         random_color_button.clicked.connect(self.apply_random_colors)
         color_buttons_layout.addWidget(random_color_button, 1)  # stretch factor = 1
+
+        self.palette_color_check = QCheckBox("调色板")
+        self.palette_color_check.setChecked(True)
+        self.palette_color_check.setToolTip("随机颜色从 32 种均匀分布的颜色中选取，每种颜色只使用一个材质并在重复着色时复用\n"
+                                            "关闭时每个物体创建独立的随机颜色材质")
+        color_buttons_layout.addWidget(self.palette_color_check)
         
         gradient_color_button = DelayedToolTipButton("渐变颜色", "打开渐变颜色工具，为选中的物体应用渐变色彩效果")
         gradient_color_button.clicked.connect(self.open_gradient_color_tool)
         color_buttons_layout.addWidget(gradient_color_button, 1)  # stretch factor = 1
         
         color_layout.addLayout(color_buttons_layout, 4, 0, 1, 2)
+
+        # 规则配色按钮 - 横向平均分布
+        color_scheme_layout = QHBoxLayout()
+        color_scheme_layout.setSpacing(5)  # 设置按钮间距
+
+        rule_color_button = DelayedToolTipButton("规则配色",
+                                                 "按配色规则（侧面、名称、Tag、层级深度、主/子控制器）一次为控制器重新着色\n"
+                                                 "有选择时仅处理选择及其子级，否则处理整个场景，只写入颜色不同的形状")
+        rule_color_button.clicked.connect(self.apply_rule_color_scheme)
+        color_scheme_layout.addWidget(rule_color_button, 1)  # stretch factor = 1
+
+        load_rules_button = DelayedToolTipButton("加载配色规则", "选择 JSON / YAML 配色规则文件，取消则恢复默认规则")
+        load_rules_button.clicked.connect(self.load_color_rules)
+        color_scheme_layout.addWidget(load_rules_button, 1)  # stretch factor = 1
+
+        color_layout.addLayout(color_scheme_layout, 5, 0, 1, 2)
         
         color_group.setLayout(color_layout)
         scroll_layout.addWidget(color_group)
@@ -1433,6 +1457,22 @@ class CombinedTool(QMainWindow):
         self.hierarchy_check.setChecked(True)
         self.hierarchy_check.stateChanged.connect(self.toggle_hierarchy_logic)
         main_settings_layout.addWidget(self.hierarchy_check, 6, 2, 1, 2)
+        self.incremental_rebuild_check = QCheckBox("增量重建")
+        self.incremental_rebuild_check.setChecked(False)
+        self.incremental_rebuild_check.setToolTip("重复创建时复用已存在的 zero/ctrl/sub/output 节点\n只创建缺失部分，并仅修正错误的父级、变换与约束（同时作用于创建与FK层级）")
+        main_settings_layout.addWidget(self.incremental_rebuild_check, 7, 0, 1, 2)
+        self.stamp_mode_check = QCheckBox("原型冲压")
+        self.stamp_mode_check.setChecked(False)
+        self.stamp_mode_check.setToolTip("每个侧面只完整创建一个组件作为原型，其余组件批量复制后统一重命名与匹配变换\n适合一次创建大量组件（增量重建开启时不生效）")
+        main_settings_layout.addWidget(self.stamp_mode_check, 7, 2, 1, 2)
+        self.shared_shape_check = QCheckBox("共享形状")
+        self.shared_shape_check.setChecked(False)
+        self.shared_shape_check.setToolTip("相同类型、大小与颜色的控制器引用同一个实例化形状节点，编辑一个即更新全部\n同时作用于替换曲线形状与添加形状节点（编辑单个控制器前请先取消共享）")
+        main_settings_layout.addWidget(self.shared_shape_check, 8, 0, 1, 2)
+        self.auto_fit_check = QCheckBox("自动适配大小")
+        self.auto_fit_check.setChecked(False)
+        self.auto_fit_check.setToolTip("按目标骨骼的蒙皮顶点（权重 ≥ 0.2）或目标物体的模型计算主方向包围盒\n将新建控制器的形状缩放并旋转到包围盒（同时作用于创建与FK层级，共享形状不适配）")
+        main_settings_layout.addWidget(self.auto_fit_check, 8, 2, 1, 2)
         
         
         joint_ctrl_layout.addLayout(main_settings_layout)
@@ -1458,6 +1498,24 @@ class CombinedTool(QMainWindow):
         match_button.clicked.connect(self.match_selected_transforms)
         match_layout.addWidget(match_button, 3, 0)
 
+        # 最近目标吸附：按空间位置自动配对控制器与目标
+        match_layout.addWidget(QLabel("吸附目标："), 4, 0)
+        self.snap_target_combo = QComboBox()
+        self.snap_target_combo.addItems(["骨骼", "定位器", "模型顶点"])
+        match_layout.addWidget(self.snap_target_combo, 4, 1)
+        match_layout.addWidget(QLabel("容差："), 5, 0)
+        self.snap_tolerance_spin = QDoubleSpinBox()
+        self.snap_tolerance_spin.setMinimum(0.001)
+        self.snap_tolerance_spin.setMaximum(10000.0)
+        self.snap_tolerance_spin.setDecimals(3)
+        self.snap_tolerance_spin.setValue(1.0)
+        match_layout.addWidget(self.snap_tolerance_spin, 5, 1)
+        snap_button = DelayedToolTipButton("最近目标吸附",
+                                           "将选中控制器的 zero 组吸附到容差范围内最近的目标（沿用上方的匹配选项）\n"
+                                           "模型顶点模式下请同时选择目标模型；未匹配与有歧义的控制器会在脚本编辑器中列出")
+        snap_button.clicked.connect(self.snap_to_nearest_targets)
+        match_layout.addWidget(snap_button, 6, 0, 1, 2)
+
         match_group.setLayout(match_layout)
         joint_ctrl_layout.addWidget(match_group)
 
@@ -1488,7 +1546,7 @@ class CombinedTool(QMainWindow):
         first_row_layout.addWidget(reparent_shape_button, 1)  # stretch factor = 1
         joint_ctrl_layout.addLayout(first_row_layout)
         
-        # 第二行：曲线Shape重命名、切换显示在前面
+        # 第二行：曲线Shape重命名、切换显示在前面、清理曲线历史
         second_row_layout = QHBoxLayout()
         second_row_layout.setSpacing(5)  # 设置按钮间距
         
@@ -1501,9 +1559,14 @@ class CombinedTool(QMainWindow):
                                                          "切换选中曲线的alwaysDrawOnTop属性，使其显示在其他物体前面")
         always_draw_on_top_button.clicked.connect(self.toggle_always_draw_on_top)
         second_row_layout.addWidget(always_draw_on_top_button, 1)  # stretch factor = 1
+
+        purge_history_button = DelayedToolTipButton("清理曲线历史",
+                                                    "批量删除控制器曲线上无用的构建历史（如 makeNurbCircle）\n有选择时仅处理选择及其子级，否则处理整个场景")
+        purge_history_button.clicked.connect(self.purge_controller_history)
+        second_row_layout.addWidget(purge_history_button, 1)  # stretch factor = 1
         joint_ctrl_layout.addLayout(second_row_layout)
         
-        # 第三行：结合曲线、拆分曲线
+        # 第三行：结合曲线、拆分曲线、取消共享形状
         third_row_layout = QHBoxLayout()
         third_row_layout.setSpacing(5)  # 设置按钮间距
         
@@ -1516,8 +1579,41 @@ class CombinedTool(QMainWindow):
                                                       "将包含多个形状的曲线拆分为独立的曲线对象")
         separate_curves_button.clicked.connect(self.separate_selected_curves)
         third_row_layout.addWidget(separate_curves_button, 1)  # stretch factor = 1
+
+        unshare_shapes_button = DelayedToolTipButton("取消共享形状",
+                                                     "为选中控制器的共享形状创建独立副本，之后可单独编辑")
+        unshare_shapes_button.clicked.connect(self.unshare_controller_shapes)
+        third_row_layout.addWidget(unshare_shapes_button, 1)  # stretch factor = 1
         joint_ctrl_layout.addLayout(third_row_layout)
 
+        # 第四行：构建对称映射、按对称映射着色
+        fourth_row_layout = QHBoxLayout()
+        fourth_row_layout.setSpacing(5)  # 设置按钮间距
+
+        fourth_row_layout.addWidget(QLabel("镜像平面："))
+        self.symmetry_plane_combo = QComboBox()
+        self.symmetry_plane_combo.addItems(["yz", "xz", "xy"])
+        fourth_row_layout.addWidget(self.symmetry_plane_combo)
+        fourth_row_layout.addWidget(QLabel("容差："))
+        self.symmetry_tolerance_spin = QDoubleSpinBox()
+        self.symmetry_tolerance_spin.setMinimum(0.001)
+        self.symmetry_tolerance_spin.setMaximum(10000.0)
+        self.symmetry_tolerance_spin.setDecimals(3)
+        self.symmetry_tolerance_spin.setValue(0.01)
+        fourth_row_layout.addWidget(self.symmetry_tolerance_spin)
+
+        build_symmetry_button = DelayedToolTipButton("构建对称映射",
+                                                     "按世界位置沿所选镜像平面配对左右骨骼与控制器（不依赖 _l_ / _r_ 命名）并缓存到场景\n"
+                                                     "有选择时仅处理选择，否则处理全部骨骼与曲线控制器；镜像位置附近有两个相近候选时不配对")
+        build_symmetry_button.clicked.connect(self.build_symmetry_map)
+        fourth_row_layout.addWidget(build_symmetry_button, 1)  # stretch factor = 1
+
+        symmetry_color_button = DelayedToolTipButton("按对称映射着色",
+                                                     "按缓存的对称映射为控制器着色：左侧蓝色、右侧红色、中线黄色")
+        symmetry_color_button.clicked.connect(self.apply_symmetry_colors)
+        fourth_row_layout.addWidget(symmetry_color_button, 1)  # stretch factor = 1
+        joint_ctrl_layout.addLayout(fourth_row_layout)
+
         # 添加FK层级功能
         fk_hierarchy_separator = QFrame()
         fk_hierarchy_separator.setFrameShape(QFrame.HLine)
@@ -1574,6 +1670,17 @@ class CombinedTool(QMainWindow):
             offset_check.setMinimumWidth(80)  # 确保有足够宽度显示文字
             constraints_layout.addWidget(offset_check, row, 1)
 
+        # 矩阵约束选项：使用 multMatrix/decomposeMatrix 网络替代约束节点
+        self.matrix_constraint_check = QCheckBox("使用矩阵约束")
+        self.matrix_constraint_check.setChecked(False)
+        self.matrix_constraint_check.setToolTip("使用 multMatrix -> offsetParentMatrix / decomposeMatrix 网络替代约束节点\n求值更轻量，保持偏移在创建时烘焙（需要 Maya 2020 或以上）\n子控制器输出组同样改用单一 matrix -> offsetParentMatrix 连接")
+        constraints_layout.addWidget(self.matrix_constraint_check, len(constraint_types), 0, 1, 2)
+
+        convert_matrix_button = DelayedToolTipButton("转换约束为矩阵",
+                                                     "将选中物体（未选择时为整个场景）的单目标约束转换为矩阵约束网络\n多目标或带权重的约束保持不变，并输出转换前后的性能分析结果")
+        convert_matrix_button.clicked.connect(self.convert_constraints_to_matrix)
+        constraints_layout.addWidget(convert_matrix_button, len(constraint_types) + 1, 0, 1, 2)
+
         constraints_group.setLayout(constraints_layout)
         fk_hierarchy_layout.addWidget(constraints_group)
 
@@ -1596,6 +1703,24 @@ class CombinedTool(QMainWindow):
         """)
         create_fk_hierarchy_button.clicked.connect(self.create_fk_hierarchy)
         fk_hierarchy_layout.addWidget(create_fk_hierarchy_button)
+
+        # 创建FK树按钮 - 为包含分支的骨骼树（如手掌与全部手指）一次性创建控制器
+        create_fk_tree_button = DelayedToolTipButton("创建FK树（含分支）",
+                                                     "为选中的根骨骼及其所有分支一次性创建FK控制器层级，沿用上方的命名与约束设置")
+        create_fk_tree_button.clicked.connect(self.create_fk_tree)
+        fk_hierarchy_layout.addWidget(create_fk_tree_button)
+
+        # 按选择创建骨骼链按钮 - 按选择顺序在物体位置批量创建骨骼并统一设置朝向
+        create_joint_chain_button = DelayedToolTipButton("按选择创建骨骼链",
+                                                         "按选择顺序在选中物体的位置一次性创建骨骼链\n主轴指向下一个骨骼（xyz / yup），沿用上方的名称与侧面")
+        create_joint_chain_button.clicked.connect(self.create_joint_chain_from_selection)
+        fk_hierarchy_layout.addWidget(create_joint_chain_button)
+
+        # 骨骼生成曲线按钮 - 为选中的多条骨骼链批量创建曲线
+        create_curve_from_joints_button = DelayedToolTipButton("骨骼生成曲线",
+                                                               "打开骨骼生成曲线工具，为选中的多条骨骼链（如头发、尾巴）一次性创建 1 次或 3 次曲线")
+        create_curve_from_joints_button.clicked.connect(self.open_create_curve_from_joints)
+        fk_hierarchy_layout.addWidget(create_curve_from_joints_button)
         
         # 添加FK约束打组工具按钮
         fk_constraint_group_button = DelayedToolTipButton("FK约束打组工具", "打开高级FK约束打组工具界面")
@@ -1669,7 +1794,7 @@ class CombinedTool(QMainWindow):
         ctrl_connect_button.clicked.connect(self.open_ctrl_connect)
         controller_first_row_layout.addWidget(ctrl_connect_button, 1)  # 使用stretch factor平均分布
         
-        # 第二行：选定物体创建控制器、基础层级
+        # 第二行：选定物体创建控制器、基础层级、从规格构建
         controller_second_row_layout = QHBoxLayout()
         controller_second_row_layout.setSpacing(5)  # 设置按钮间距
         create_obj_ctrl_button = DelayedToolTipButton("选定物体创建控制器", "为选定的物体创建控制器并匹配变换")
@@ -1679,6 +1804,10 @@ class CombinedTool(QMainWindow):
         create_controller_hierarchy_button = DelayedToolTipButton("基础层级", "创建包含控制器和层级结构的骨骼系统")
         create_controller_hierarchy_button.clicked.connect(self.open_create_controller_hierarchy)
         controller_second_row_layout.addWidget(create_controller_hierarchy_button, 1)  # 使用stretch factor平均分布
+
+        build_from_spec_button = DelayedToolTipButton("从规格构建", "读取 JSON/YAML 控制器规格文件（名称、侧面、形状、大小、颜色、父级、目标、约束、标签）\n校验后一次性批量构建全部控制器")
+        build_from_spec_button.clicked.connect(self.build_rig_from_spec)
+        controller_second_row_layout.addWidget(build_from_spec_button, 1)  # 使用stretch factor平均分布
         
         # 将两行布局添加到主布局中
         group_prefix_layout.addLayout(controller_first_row_layout, 7, 0, 1, 2)
@@ -1723,6 +1852,7 @@ class CombinedTool(QMainWindow):
         tag_name_label = QLabel("Tag 名称:")
         tag_name_layout.addWidget(tag_name_label)
         self.tag_name_input = QLineEdit("isCtrl")
+        self.tag_name_input.setToolTip("Tag 名称；选择时也可输入表达式，支持 &（与）、|（或）、!（非）与括号\n例如：face & ctrl & !sub 或 (l | r) & fk")
         tag_name_layout.addWidget(self.tag_name_input)
         tag_layout.addLayout(tag_name_layout)
 
@@ -1734,7 +1864,7 @@ class CombinedTool(QMainWindow):
         add_tag_button.clicked.connect(self.add_tag_attribute)
         tag_first_row_layout.addWidget(add_tag_button, 1)  # stretch factor = 1
 
-        select_tag_button = DelayedToolTipButton("选择有tag的物体", "选择场景中具有指定 Tag 的所有物体")
+        select_tag_button = DelayedToolTipButton("选择有tag的物体", "选择场景中具有指定 Tag 的所有物体\n支持 Tag 表达式，例如 face & ctrl & !sub")
         select_tag_button.clicked.connect(self.select_objects_with_tag)
         tag_first_row_layout.addWidget(select_tag_button, 1)  # stretch factor = 1
         
@@ -1754,6 +1884,25 @@ class CombinedTool(QMainWindow):
         
         tag_layout.addLayout(tag_second_row_layout)
 
+        # 第三行：紧凑存储选项与双向迁移
+        tag_third_row_layout = QHBoxLayout()
+        tag_third_row_layout.setSpacing(5)  # 设置按钮间距
+
+        self.compact_tag_check = QCheckBox("紧凑存储")
+        self.compact_tag_check.setChecked(False)
+        self.compact_tag_check.setToolTip("添加 Tag 时将物体的全部 Tag 保存在一个 ckTags 字符串数组属性中\n代替每个 Tag 一个布尔属性，适合大量 Tag 与控制器")
+        tag_third_row_layout.addWidget(self.compact_tag_check)
+
+        to_compact_button = DelayedToolTipButton("转为紧凑存储", "将选中物体的布尔 Tag 属性迁移到 ckTags 并删除原属性")
+        to_compact_button.clicked.connect(self.migrate_tags_to_compact)
+        tag_third_row_layout.addWidget(to_compact_button, 1)  # stretch factor = 1
+
+        to_attributes_button = DelayedToolTipButton("转为布尔属性", "将 ckTags 中的 Tag 迁移回布尔属性\n有选择时仅处理选择，否则处理整个场景")
+        to_attributes_button.clicked.connect(self.migrate_tags_to_attributes)
+        tag_third_row_layout.addWidget(to_attributes_button, 1)  # stretch factor = 1
+
+        tag_layout.addLayout(tag_third_row_layout)
+
         tag_history_label = QLabel("历史 Tag 记录:")
         tag_layout.addWidget(tag_history_label)
         self.tag_history_combo = QComboBox()
@@ -1816,6 +1965,10 @@ class CombinedTool(QMainWindow):
         # 关闭所有子窗口
         if hasattr(self, 'snap_to_pivot_tool') and self.snap_to_pivot_tool:
             self.snap_to_pivot_tool.close()
+
+        # 移除 Tag 索引的回调
+        if "tag_index" in sys.modules:
+            sys.modules["tag_index"].release_index()
         
         # 继续事件传递
         super().closeEvent(event)